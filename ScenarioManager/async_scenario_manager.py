@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2018 Intel Labs.
+# authors: Fabian Oboril (fabian.oboril@intel.com)
+#
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides an asyncio front end for the ScenarioManager.
+
+The tick callback of CARLA runs on a thread of the CARLA client. The
+AsyncScenarioManager forwards the end of a scenario (and optionally the
+progress after every tick) into an asyncio event loop, so that a single
+controller process can drive scenarios on several worlds concurrently:
+
+    managers = [AsyncScenarioManager(world) for world in worlds]
+    statuses = await asyncio.gather(
+        *[manager.run(scenario) for manager, scenario in zip(managers, scenarios)])
+"""
+
+import asyncio
+import threading
+import time
+
+from ScenarioManager.carla_data_provider import CarlaDataProvider
+from ScenarioManager.scenario_manager import ScenarioManager
+from ScenarioManager.timer import GameTime
+
+
+class AsyncScenarioManager(ScenarioManager):
+
+    """
+    ScenarioManager whose scenarios are awaited instead of polled.
+
+    GameTime is shared by the whole process. Each AsyncScenarioManager therefore
+    keeps its own game time and installs it into GameTime while its scenario is
+    ticked. Ticks of different managers are serialized for that purpose.
+
+    Important parameters:
+    - progress: Optional asyncio.Queue passed to run(), receiving a tuple
+                (frame, game time, tree status) after every tick. If the queue
+                is full, the update is dropped.
+    - tick_timeout: If the world does not tick for tick_timeout seconds (system
+                    time), run() stops the scenario and raises a RuntimeError
+    """
+
+    _tick_lock = threading.Lock()
+
+    def __init__(self, world, _debug_mode=False, tick_timeout=10.0):
+        self._game_time_state = (0.0, 0)
+        self._tick_timeout = tick_timeout
+        self._last_tick_system_time = 0.0
+        self._loop = None
+        self._finished = None
+        self._progress = None
+        super(AsyncScenarioManager, self).__init__(world, _debug_mode)
+
+    async def run(self, scenario, progress=None):
+        """
+        Load the scenario, run it and wait until it finished/failed
+        without blocking the event loop.
+        Returns the final status of the scenario tree.
+        """
+        self.load_scenario(scenario)
+        print("Running scenario {}".format(self.scenario_tree.name))
+
+        loop = asyncio.get_running_loop()
+        with self._my_lock:
+            self._loop = loop
+            self._finished = loop.create_future()
+            self._progress = progress
+
+            self.start_system_time = time.time()
+            self._last_tick_system_time = self.start_system_time
+            start_game_time = self._game_time_state[0]
+            self._running = True
+            finished = self._finished
+
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(asyncio.shield(finished), self._tick_timeout)
+                    break
+                except asyncio.TimeoutError:
+                    if time.time() - self._last_tick_system_time > self._tick_timeout:
+                        with self._my_lock:
+                            self._running = False
+                        self.stop_scenario()
+                        raise RuntimeError("No world tick for {} seconds, scenario {} stopped".format(
+                            self._tick_timeout, self.scenario_tree.name))
+        finally:
+            self._running = False
+            self._loop = None
+            self._progress = None
+
+        self.end_system_time = time.time()
+        self.scenario_duration_system = self.end_system_time - \
+            self.start_system_time
+        self.scenario_duration_game = self._game_time_state[0] - start_game_time
+
+        return self.scenario_tree.status
+
+    def restart(self):
+        """
+        Reset all parameters, without touching the game time of other managers
+        """
+        with AsyncScenarioManager._tick_lock:
+            state = GameTime.get_state()
+            super(AsyncScenarioManager, self).restart()
+            GameTime.set_state(state)
+        self._game_time_state = (0.0, self._game_time_state[1])
+
+    def stop_scenario(self):
+        """
+        Terminate the scenario and only unregister the vehicles of this manager
+        """
+        if self.scenario is not None:
+            self.scenario.terminate()
+
+        self._stop_telemetry()
+        if self.ego_vehicle is not None:
+            CarlaDataProvider.unregister_vehicles(
+                [self.ego_vehicle] + self.other_vehicles)
+
+    def _tick_scenario(self, timestamp):
+        """
+        Run next tick of scenario with the game time of this manager and
+        forward the progress into the event loop
+        """
+        self._last_tick_system_time = time.time()
+        with AsyncScenarioManager._tick_lock:
+            GameTime.set_state(self._game_time_state)
+            super(AsyncScenarioManager, self)._tick_scenario(timestamp)
+            self._game_time_state = GameTime.get_state()
+
+        loop = self._loop
+        if loop is None or self.scenario_tree is None:
+            return
+
+        if self._progress is not None:
+            loop.call_soon_threadsafe(
+                self._put_progress, self._progress,
+                (timestamp.frame_count, self._game_time_state[0], self.scenario_tree.status))
+
+        if not self._running:
+            loop.call_soon_threadsafe(self._set_finished, self._finished)
+
+    @staticmethod
+    def _put_progress(queue, update):
+        """
+        Called within the event loop
+        """
+        try:
+            queue.put_nowait(update)
+        except asyncio.QueueFull:
+            pass
+
+    @staticmethod
+    def _set_finished(future):
+        """
+        Called within the event loop
+        """
+        if not future.done():
+            future.set_result(None)
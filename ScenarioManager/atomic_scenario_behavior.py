@@ -203,11 +203,12 @@ class DriveDistance(AtomicBehavior):
 
         self._target_distance = distance
         self._distance = 0
-        self._location = None
+        self._start_odometer = 0.0
         self._vehicle = vehicle
 
     def initialise(self):
-        self._location = CarlaDataProvider.get_location(self._vehicle)
+        # The odometer starts at 0 once the location is known
+        self._start_odometer = CarlaDataProvider.get_odometer(self._vehicle) or 0.0
         super(DriveDistance, self).initialise()
 
     def update(self):
@@ -216,9 +217,10 @@ class DriveDistance(AtomicBehavior):
         """
         new_status = py_trees.common.Status.RUNNING
 
-        new_location = CarlaDataProvider.get_location(self._vehicle)
-        self._distance += calculate_distance(self._location, new_location)
-        self._location = new_location
+        odometer = CarlaDataProvider.get_odometer(self._vehicle)
+        if odometer is None:
+            return new_status
+        self._distance = odometer - self._start_odometer
 
         if self._distance > self._target_distance:
             new_status = py_trees.common.Status.SUCCESS
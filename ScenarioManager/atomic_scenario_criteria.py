@@ -1,13 +1,24 @@
 import weakref
 
+import numpy as np
 import py_trees
-import carla
 
 from ScenarioManager.carla_data_provider import CarlaDataProvider
 from ScenarioManager.timer import GameTime
+from utility.event_queue import EventQueue, collision_record, lane_invasion_record
+from utility.sensor_hub import SensorHub
 
 
 class Criterion(py_trees.behaviour.Behaviour):
+
+    """
+    Base class for all criteria
+
+    A criterion is final once its result cannot change anymore (e.g. after
+    the first collision). Final criteria are no longer updated, their
+    test_status and actual_value are frozen.
+    """
+
     def __init__(self,
                  name,
                  vehicle,
@@ -24,6 +35,26 @@ class Criterion(py_trees.behaviour.Behaviour):
         self.expected_value_acceptable = expected_value_acceptable
         self.actual_value = 0
         self.optional = optional
+        self.final = False
+
+    @property
+    def terminate_on_failure(self):
+        return self._terminate_on_failure
+
+    @terminate_on_failure.setter
+    def terminate_on_failure(self, terminate_on_failure):
+        self._terminate_on_failure = terminate_on_failure
+
+    def tick(self):
+        """
+        Skip the update of final criteria
+        """
+        if self.final:
+            yield self
+            return
+        for node in super(Criterion, self).tick():
+            yield node
+
 
 class MaxVelocityTest(Criterion):
 
@@ -53,6 +84,7 @@ class MaxVelocityTest(Criterion):
 
         if velocity > self.expected_value_success:
             self.test_status = "FAILURE"
+            self.final = True
         else:
             self.test_status = "SUCCESS"
 
@@ -79,10 +111,10 @@ class DrivenDistanceTest(Criterion):
         """
         super(DrivenDistanceTest, self).__init__(
             name, vehicle, distance_success, distance_acceptable, optional)
-        self._last_location = None
+        self._start_odometer = 0.0
 
     def initialise(self):
-        self._last_location = CarlaDataProvider.get_location(self.vehicle)
+        self._start_odometer = CarlaDataProvider.get_odometer(self.vehicle) or 0.0
         super(DrivenDistanceTest, self).initialise()
 
     def update(self):
@@ -94,20 +126,16 @@ class DrivenDistanceTest(Criterion):
         if self.vehicle is None:
             return new_status
 
-        location = CarlaDataProvider.get_location(self.vehicle)
+        odometer = CarlaDataProvider.get_odometer(self.vehicle)
 
-        if location is None:
+        if odometer is None:
             return new_status
 
-        if self._last_location is None:
-            self._last_location = location
-            return new_status
-
-        self.actual_value += location.distance(self._last_location)
-        self._last_location = location
+        self.actual_value = odometer - self._start_odometer
 
         if self.actual_value > self.expected_value_success:
             self.test_status = "SUCCESS"
+            self.final = True
         elif (self.expected_value_acceptable is not None and
               self.actual_value > self.expected_value_acceptable):
             self.test_status = "ACCEPTABLE"
@@ -139,11 +167,10 @@ class AverageVelocityTest(Criterion):
                                                   avg_velocity_success,
                                                   avg_velocity_acceptable,
                                                   optional)
-        self._last_location = None
-        self._distance = 0.0
+        self._start_odometer = 0.0
 
     def initialise(self):
-        self._last_location = CarlaDataProvider.get_location(self.vehicle)
+        self._start_odometer = CarlaDataProvider.get_odometer(self.vehicle) or 0.0
         super(AverageVelocityTest, self).initialise()
 
     def update(self):
@@ -155,21 +182,14 @@ class AverageVelocityTest(Criterion):
         if self.vehicle is None:
             return new_status
 
-        location = CarlaDataProvider.get_location(self.vehicle)
-
-        if location is None:
-            return new_status
+        odometer = CarlaDataProvider.get_odometer(self.vehicle)
 
-        if self._last_location is None:
-            self._last_location = location
+        if odometer is None:
             return new_status
 
-        self._distance += location.distance(self._last_location)
-        self._last_location = location
-
         elapsed_time = GameTime.get_time()
         if elapsed_time > 0.0:
-            self.actual_value = self._distance / elapsed_time
+            self.actual_value = (odometer - self._start_odometer) / elapsed_time
 
         if self.actual_value > self.expected_value_success:
             self.test_status = "SUCCESS"
@@ -197,12 +217,13 @@ class CollisionTest(Criterion):
         """
         super(CollisionTest, self).__init__(name, vehicle, 0, None, optional)
 
-        world = self.vehicle.get_world()
-        blueprint = world.get_blueprint_library().find('sensor.other.collision')
-        self._collision_sensor = world.spawn_actor(
-            blueprint, carla.Transform(), attach_to=self.vehicle)
-        self._collision_sensor.listen(
-            lambda event: self._count_collisions(weakref.ref(self), event))
+        self.events = []
+        self._event_queue = EventQueue()
+
+        weak_self = weakref.ref(self)
+        self._collision_subscription = SensorHub.subscribe(
+            self.vehicle, 'sensor.other.collision',
+            lambda event: CollisionTest._count_collisions(weak_self, event))
 
     def update(self):
         """
@@ -210,8 +231,15 @@ class CollisionTest(Criterion):
         """
         new_status = py_trees.common.Status.RUNNING
 
+        events = self._event_queue.drain()
+        self.events.extend(events)
+        # Records dropped from a full queue were events as well
+        self.actual_value += len(events) + self._event_queue.take_dropped()
+
         if self.actual_value > 0:
             self.test_status = "FAILURE"
+            self.final = True
+            self._collision_subscription.unsubscribe()
         else:
             self.test_status = "SUCCESS"
 
@@ -224,20 +252,21 @@ class CollisionTest(Criterion):
         """
         Cleanup sensor
         """
-        if self._collision_sensor is not None:
-            self._collision_sensor.destroy()
-        self._collision_sensor = None
+        self._collision_subscription.unsubscribe()
+        # Count the events that arrived after the last tick
+        if not self.final:
+            self.update()
         super(CollisionTest, self).terminate(new_status)
 
     @staticmethod
     def _count_collisions(weak_self, event):
         """
-        Callback to update collision count
+        Callback to queue the collision, counted on the next tick
         """
         self = weak_self()
         if not self:
             return
-        self.actual_value += 1
+        self._event_queue.put(collision_record(event))
 
 
 class KeepLaneTest(Criterion):
@@ -252,13 +281,13 @@ class KeepLaneTest(Criterion):
         """
         super(KeepLaneTest, self).__init__(name, vehicle, 0, None, optional)
 
-        world = self.vehicle.get_world()
-        blueprint = world.get_blueprint_library().find(
-            'sensor.other.lane_detector')
-        self._lane_sensor = world.spawn_actor(
-            blueprint, carla.Transform(), attach_to=self.vehicle)
-        self._lane_sensor.listen(
-            lambda event: self._count_lane_invasion(weakref.ref(self), event))
+        self.events = []
+        self._event_queue = EventQueue()
+
+        weak_self = weakref.ref(self)
+        self._lane_subscription = SensorHub.subscribe(
+            self.vehicle, 'sensor.other.lane_detector',
+            lambda event: KeepLaneTest._count_lane_invasion(weak_self, event))
 
     def update(self):
         """
@@ -266,8 +295,15 @@ class KeepLaneTest(Criterion):
         """
         new_status = py_trees.common.Status.RUNNING
 
+        events = self._event_queue.drain()
+        self.events.extend(events)
+        # Records dropped from a full queue were events as well
+        self.actual_value += len(events) + self._event_queue.take_dropped()
+
         if self.actual_value > 0:
             self.test_status = "FAILURE"
+            self.final = True
+            self._lane_subscription.unsubscribe()
         else:
             self.test_status = "SUCCESS"
 
@@ -280,17 +316,548 @@ class KeepLaneTest(Criterion):
         """
         Cleanup sensor
         """
-        if self._lane_sensor is not None:
-            self._lane_sensor.destroy()
-        self._lane_sensor = None
+        self._lane_subscription.unsubscribe()
+        # Count the events that arrived after the last tick
+        if not self.final:
+            self.update()
         super(KeepLaneTest, self).terminate(new_status)
 
     @staticmethod
     def _count_lane_invasion(weak_self, event):
         """
-        Callback to update lane invasion count
+        Callback to queue the lane invasion, counted on the next tick
+        """
+        self = weak_self()
+        if not self:
+            return
+        self._event_queue.put(lane_invasion_record(event))
+
+
+class ComfortTest(Criterion):
+
+    """
+    Base class of the comfort criteria (acceleration, jerk, lateral acceleration).
+
+    On every tick the quantity is derived with finite differences from the
+    velocities of the last window frames in the history of the
+    CarlaDataProvider, so the cost of an update does not depend on the length
+    of the scenario.
+
+    Important parameters:
+    - metric: "rms" (root mean square over the window) or "peak" (largest
+      absolute value in the window)
+    - window: Number of frames of the window (at most
+      CarlaDataProvider.HISTORY_LENGTH - order)
+
+    actual_value is the largest windowed value so far. The test succeeds while
+    it stays below expected_value_success, is acceptable below
+    expected_value_acceptable and fails otherwise.
+    """
+
+    # Number of finite differences, i.e. history frames in addition to the window
+    order = 1
+
+    def __init__(self,
+                 name,
+                 vehicle,
+                 limit_success,
+                 limit_acceptable=None,
+                 metric="rms",
+                 window=20,
+                 optional=False):
+        super(ComfortTest, self).__init__(name, vehicle, limit_success, limit_acceptable, optional)
+        if metric not in ("rms", "peak"):
+            raise ValueError("Unknown comfort metric '{}'".format(metric))
+        if window + self.order > CarlaDataProvider.HISTORY_LENGTH:
+            raise ValueError("Comfort window of {} frames exceeds the history".format(window))
+        self.metric = metric
+        self.window = window
+
+    def update(self):
+        """
+        Check the windowed value
+        """
+        new_status = py_trees.common.Status.RUNNING
+
+        if self.vehicle is None:
+            return new_status
+
+        times, velocities = CarlaDataProvider.get_history(self.vehicle, self.window + self.order)
+        if len(times) <= self.order:
+            return new_status
+
+        values = self._values(times, velocities[:, :2])
+        if self.metric == "rms":
+            value = float(np.sqrt(np.mean(values**2)))
+        else:
+            value = float(np.abs(values).max())
+        self.actual_value = max(value, self.actual_value)
+
+        if self.actual_value <= self.expected_value_success:
+            self.test_status = "SUCCESS"
+        elif (self.expected_value_acceptable is not None and
+              self.actual_value <= self.expected_value_acceptable):
+            self.test_status = "ACCEPTABLE"
+        else:
+            self.test_status = "FAILURE"
+            self.final = True
+
+        if self._terminate_on_failure and (self.test_status == "FAILURE"):
+            new_status = py_trees.common.Status.FAILURE
+
+        return new_status
+
+    def _values(self, times, velocities):
+        """
+        Returns the quantity of the window from the given times (n,) and
+        velocities (n, 2), oldest first
+        """
+        raise NotImplementedError(
+            "This function is re-implemented by all comfort tests"
+            "If this error becomes visible the class hierarchy is somehow broken")
+
+    @staticmethod
+    def _longitudinal_acceleration(times, velocities):
+        """
+        Rate of change of the speed between consecutive frames
+        """
+        return np.diff(np.hypot(velocities[:, 0], velocities[:, 1])) / np.diff(times)
+
+
+class AccelerationTest(ComfortTest):
+
+    """
+    This class contains an atomic test for the longitudinal acceleration
+    (acceleration and deceleration) in m/s^2
+    """
+
+    def __init__(self, vehicle, acceleration_success, acceleration_acceptable=None,
+                 metric="rms", window=20, optional=False, name="CheckAcceleration"):
+        super(AccelerationTest, self).__init__(name, vehicle, acceleration_success,
+                                               acceleration_acceptable, metric, window,
+                                               optional)
+
+    def _values(self, times, velocities):
+        return self._longitudinal_acceleration(times, velocities)
+
+
+class JerkTest(ComfortTest):
+
+    """
+    This class contains an atomic test for the longitudinal jerk in m/s^3
+    """
+
+    order = 2
+
+    def __init__(self, vehicle, jerk_success, jerk_acceptable=None,
+                 metric="rms", window=20, optional=False, name="CheckJerk"):
+        super(JerkTest, self).__init__(name, vehicle, jerk_success, jerk_acceptable,
+                                       metric, window, optional)
+
+    def _values(self, times, velocities):
+        acceleration = self._longitudinal_acceleration(times, velocities)
+        midpoints = (times[1:] + times[:-1]) / 2.0
+        return np.diff(acceleration) / np.diff(midpoints)
+
+
+class LateralAccelerationTest(ComfortTest):
+
+    """
+    This class contains an atomic test for the lateral (centripetal)
+    acceleration in m/s^2
+    """
+
+    def __init__(self, vehicle, acceleration_success, acceleration_acceptable=None,
+                 metric="rms", window=20, optional=False, name="CheckLateralAcceleration"):
+        super(LateralAccelerationTest, self).__init__(name, vehicle, acceleration_success,
+                                                      acceleration_acceptable, metric, window,
+                                                      optional)
+
+    def _values(self, times, velocities):
+        acceleration = np.diff(velocities, axis=0) / np.diff(times)[:, None]
+        velocity = (velocities[1:] + velocities[:-1]) / 2.0
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        # Component of the acceleration perpendicular to the direction of travel
+        cross = velocity[:, 0] * acceleration[:, 1] - velocity[:, 1] * acceleration[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(speed > 0.1, cross / speed, 0.0)
+
+
+# Status codes of batched criteria, index into STATUS_NAMES
+INIT, RUNNING, SUCCESS, ACCEPTABLE, FAILURE = range(5)
+STATUS_NAMES = ("INIT", "RUNNING", "SUCCESS", "ACCEPTABLE", "FAILURE")
+
+
+class BatchCriterion(py_trees.behaviour.Behaviour):
+
+    """
+    Base class for criteria of the same type evaluated for many vehicles.
+
+    Thresholds, running values and states of all vehicles are kept in
+    NumPy arrays and updated with vectorized expressions on every tick,
+    within a single py_trees node. For the evaluation the batch is expanded
+    into one criterion per vehicle (see criteria).
+
+    Important parameters:
+    - expected_value_success / expected_value_acceptable: Scalar (same for
+      all vehicles) or one value per vehicle
+    - final_mask: Vehicles whose result cannot change anymore, their status
+      and value are frozen. The whole batch is final once all vehicles are.
+    """
+
+    def __init__(self,
+                 name,
+                 vehicles,
+                 expected_value_success,
+                 expected_value_acceptable=None,
+                 optional=False):
+        super(BatchCriterion, self).__init__(name)
+        self._terminate_on_failure = False
+
+        self.name = name
+        self.vehicles = list(vehicles)
+        self.optional = optional
+
+        count = len(self.vehicles)
+        self.expected_values_success = np.broadcast_to(
+            np.asarray(expected_value_success, dtype=np.float64), (count,)).copy()
+        self.expected_values_acceptable = None
+        if expected_value_acceptable is not None:
+            self.expected_values_acceptable = np.broadcast_to(
+                np.asarray(expected_value_acceptable, dtype=np.float64), (count,)).copy()
+        self.actual_values = np.zeros(count)
+        self.test_statuses = np.full(count, INIT, dtype=np.int8)
+        self.final_mask = np.zeros(count, dtype=bool)
+
+        self.criteria = [BatchCriterionView(self, i) for i in range(count)]
+
+    @property
+    def final(self):
+        return bool(self.final_mask.all())
+
+    @property
+    def terminate_on_failure(self):
+        return self._terminate_on_failure
+
+    @terminate_on_failure.setter
+    def terminate_on_failure(self, terminate_on_failure):
+        self._terminate_on_failure = terminate_on_failure
+
+    def tick(self):
+        """
+        Skip the update of final batches
+        """
+        if self.final:
+            yield self
+            return
+        for node in super(BatchCriterion, self).tick():
+            yield node
+
+    def _status_above(self, values):
+        """
+        Status codes for criteria that succeed if values exceed the expected values
+        """
+        status = np.where(values > self.expected_values_success, SUCCESS, RUNNING)
+        if self.expected_values_acceptable is not None:
+            status = np.where((status == RUNNING) & (values > self.expected_values_acceptable),
+                              ACCEPTABLE, status)
+        return status.astype(np.int8)
+
+    def _count_events(self):
+        """
+        Add the events queued by the sensor callbacks since the last tick
+        to the counts of their (non-final) vehicles (one queue per vehicle)
+        """
+        for index, event_queue in enumerate(self._event_queues):
+            events = event_queue.drain()
+            # Records dropped from a full queue were events as well
+            count = len(events) + event_queue.take_dropped()
+            if count and not self.final_mask[index]:
+                self.events.extend((index, event) for event in events)
+                self.actual_values[index] += count
+
+    def _discard_events(self):
+        """
+        Drop the queued events and the counts of all vehicles whose result is not final yet
+        """
+        for event_queue in self._event_queues:
+            event_queue.drain()
+            event_queue.take_dropped()
+        self.events = [(index, event) for index, event in self.events if self.final_mask[index]]
+        self.actual_values[~self.final_mask] = 0
+
+    def _freeze_failures(self, subscriptions):
+        """
+        Failures of event based criteria are final, their sensors are no longer needed
+        """
+        failed = (self.test_statuses == FAILURE) & ~self.final_mask
+        for index in np.flatnonzero(failed):
+            subscriptions[index].unsubscribe()
+        self.final_mask |= failed
+
+    def _new_status(self):
+        """
+        Status of the batch node after an update
+        """
+        if self._terminate_on_failure and (self.test_statuses == FAILURE).any():
+            return py_trees.common.Status.FAILURE
+        return py_trees.common.Status.RUNNING
+
+
+class BatchCriterionView(object):
+
+    """
+    Criterion of a single vehicle within a BatchCriterion, providing the
+    attributes used for the evaluation of the scenario
+    """
+
+    def __init__(self, batch, index):
+        self._batch = batch
+        self._index = index
+        self.name = batch.name
+        self.vehicle = batch.vehicles[index]
+        self.optional = batch.optional
+
+    @property
+    def test_status(self):
+        return STATUS_NAMES[self._batch.test_statuses[self._index]]
+
+    @property
+    def actual_value(self):
+        return float(self._batch.actual_values[self._index])
+
+    @property
+    def expected_value_success(self):
+        return float(self._batch.expected_values_success[self._index])
+
+    @property
+    def expected_value_acceptable(self):
+        if self._batch.expected_values_acceptable is None:
+            return None
+        return float(self._batch.expected_values_acceptable[self._index])
+
+
+class MaxVelocityBatchTest(BatchCriterion):
+
+    """
+    MaxVelocityTest for many vehicles
+    """
+
+    def __init__(self, vehicles, max_velocity_allowed, optional=False, name="CheckMaximumVelocity"):
+        super(MaxVelocityBatchTest, self).__init__(
+            name, vehicles, max_velocity_allowed, None, optional)
+
+    def update(self):
+        """
+        Check velocities
+        """
+        velocities = CarlaDataProvider.get_velocities(self.vehicles)
+        active = ~self.final_mask
+        self.actual_values = np.where(
+            active, np.maximum(self.actual_values, velocities), self.actual_values)
+        self.test_statuses = np.where(
+            active,
+            np.where(velocities > self.expected_values_success, FAILURE, SUCCESS),
+            self.test_statuses).astype(np.int8)
+        self.final_mask |= self.test_statuses == FAILURE
+
+        return self._new_status()
+
+
+class DrivenDistanceBatchTest(BatchCriterion):
+
+    """
+    DrivenDistanceTest for many vehicles
+    """
+
+    def __init__(self,
+                 vehicles,
+                 distance_success,
+                 distance_acceptable=None,
+                 optional=False,
+                 name="CheckDrivenDistance"):
+        super(DrivenDistanceBatchTest, self).__init__(
+            name, vehicles, distance_success, distance_acceptable, optional)
+        self._start_odometers = np.zeros(len(self.vehicles))
+
+    def initialise(self):
+        self._start_odometers = np.nan_to_num(CarlaDataProvider.get_odometers(self.vehicles))
+        super(DrivenDistanceBatchTest, self).initialise()
+
+    def update(self):
+        """
+        Check distances
+        """
+        odometers = CarlaDataProvider.get_odometers(self.vehicles)
+        valid = ~np.isnan(odometers) & ~self.final_mask
+
+        self.actual_values = np.where(
+            valid, odometers - self._start_odometers, self.actual_values)
+
+        self.test_statuses = np.where(
+            valid, self._status_above(self.actual_values), self.test_statuses).astype(np.int8)
+        self.final_mask |= self.test_statuses == SUCCESS
+
+        return self._new_status()
+
+
+class AverageVelocityBatchTest(BatchCriterion):
+
+    """
+    AverageVelocityTest for many vehicles
+    """
+
+    def __init__(self,
+                 vehicles,
+                 avg_velocity_success,
+                 avg_velocity_acceptable=None,
+                 optional=False,
+                 name="CheckAverageVelocity"):
+        super(AverageVelocityBatchTest, self).__init__(
+            name, vehicles, avg_velocity_success, avg_velocity_acceptable, optional)
+        self._start_odometers = np.zeros(len(self.vehicles))
+
+    def initialise(self):
+        self._start_odometers = np.nan_to_num(CarlaDataProvider.get_odometers(self.vehicles))
+        super(AverageVelocityBatchTest, self).initialise()
+
+    def update(self):
+        """
+        Check average velocities
+        """
+        odometers = CarlaDataProvider.get_odometers(self.vehicles)
+        valid = ~np.isnan(odometers)
+
+        elapsed_time = GameTime.get_time()
+        if elapsed_time > 0.0:
+            self.actual_values = np.where(
+                valid, (odometers - self._start_odometers) / elapsed_time, self.actual_values)
+
+        self.test_statuses = np.where(
+            valid, self._status_above(self.actual_values), self.test_statuses).astype(np.int8)
+
+        return self._new_status()
+
+
+class CollisionBatchTest(BatchCriterion):
+
+    """
+    CollisionTest for many vehicles
+    """
+
+    def __init__(self, vehicles, optional=False, name="CheckCollisions"):
+        """
+        Construction with one sensor subscription per vehicle
+        """
+        super(CollisionBatchTest, self).__init__(name, vehicles, 0, None, optional)
+
+        # (vehicle index, event record) of all vehicles
+        self.events = []
+        # Sensors of different vehicles may call back from different threads
+        self._event_queues = [EventQueue() for _ in self.vehicles]
+
+        weak_self = weakref.ref(self)
+        self._collision_subscriptions = [
+            SensorHub.subscribe(
+                vehicle, 'sensor.other.collision',
+                lambda event, i=i: CollisionBatchTest._count_collisions(weak_self, i, event))
+            for i, vehicle in enumerate(self.vehicles)]
+
+    def initialise(self):
+        """
+        Discard collisions that happened while the scenario was prepared
+        """
+        self._discard_events()
+        super(CollisionBatchTest, self).initialise()
+
+    def update(self):
+        """
+        Check collision counts
+        """
+        self._count_events()
+        self.test_statuses = np.where(self.actual_values > 0, FAILURE, SUCCESS).astype(np.int8)
+        self._freeze_failures(self._collision_subscriptions)
+
+        return self._new_status()
+
+    def terminate(self, new_status):
+        """
+        Cleanup sensors
+        """
+        for subscription in self._collision_subscriptions:
+            subscription.unsubscribe()
+        # Count the events that arrived after the last tick
+        self.update()
+        super(CollisionBatchTest, self).terminate(new_status)
+
+    @staticmethod
+    def _count_collisions(weak_self, index, event):
+        """
+        Callback to queue the collision, counted on the next tick
+        """
+        self = weak_self()
+        if not self:
+            return
+        self._event_queues[index].put(collision_record(event))
+
+
+class KeepLaneBatchTest(BatchCriterion):
+
+    """
+    KeepLaneTest for many vehicles
+    """
+
+    def __init__(self, vehicles, optional=False, name="CheckKeepLane"):
+        """
+        Construction with one sensor subscription per vehicle
+        """
+        super(KeepLaneBatchTest, self).__init__(name, vehicles, 0, None, optional)
+
+        # (vehicle index, event record) of all vehicles
+        self.events = []
+        # Sensors of different vehicles may call back from different threads
+        self._event_queues = [EventQueue() for _ in self.vehicles]
+
+        weak_self = weakref.ref(self)
+        self._lane_subscriptions = [
+            SensorHub.subscribe(
+                vehicle, 'sensor.other.lane_detector',
+                lambda event, i=i: KeepLaneBatchTest._count_lane_invasion(weak_self, i, event))
+            for i, vehicle in enumerate(self.vehicles)]
+
+    def initialise(self):
+        """
+        Discard lane invasions that happened while the scenario was prepared
+        """
+        self._discard_events()
+        super(KeepLaneBatchTest, self).initialise()
+
+    def update(self):
+        """
+        Check lane invasion counts
+        """
+        self._count_events()
+        self.test_statuses = np.where(self.actual_values > 0, FAILURE, SUCCESS).astype(np.int8)
+        self._freeze_failures(self._lane_subscriptions)
+
+        return self._new_status()
+
+    def terminate(self, new_status):
+        """
+        Cleanup sensors
+        """
+        for subscription in self._lane_subscriptions:
+            subscription.unsubscribe()
+        # Count the events that arrived after the last tick
+        self.update()
+        super(KeepLaneBatchTest, self).terminate(new_status)
+
+    @staticmethod
+    def _count_lane_invasion(weak_self, index, event):
+        """
+        Callback to queue the lane invasion, counted on the next tick
         """
         self = weak_self()
         if not self:
             return
-        self.actual_value += 1
+        self._event_queues[index].put(lane_invasion_record(event))
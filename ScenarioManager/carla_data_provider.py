@@ -13,6 +13,10 @@ local buffers to avoid blocking calls to CARLA
 
 import math
 
+import numpy as np
+
+from ScenarioManager.timer import GameTime
+
 
 def calculate_velocity(vehicle):
     """
@@ -23,6 +27,40 @@ def calculate_velocity(vehicle):
     return math.sqrt(velocity_squared)
 
 
+class VehicleHistory(object):
+
+    """
+    Ring buffer with the velocity vectors of a vehicle over the last frames,
+    together with the game time of each frame
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.count = 0
+        self._times = np.zeros(length)
+        self._velocities = np.zeros((length, 3))
+
+    def append(self, time, velocity):
+        """
+        Add the state of a new frame. Repeated updates within the same frame are ignored
+        """
+        if self.count and time <= self._times[(self.count - 1) % self.length]:
+            return
+        index = self.count % self.length
+        self._times[index] = time
+        self._velocities[index] = (velocity.x, velocity.y, velocity.z)
+        self.count += 1
+
+    def get_last(self, frames):
+        """
+        Returns the game times (n,) and velocities (n, 3) of the last n <= frames
+        frames, oldest first
+        """
+        frames = min(frames, self.count, self.length)
+        indices = np.arange(self.count - frames, self.count) % self.length
+        return self._times[indices], self._velocities[indices]
+
+
 class CarlaDataProvider(object):
 
     """
@@ -32,14 +70,19 @@ class CarlaDataProvider(object):
     Currently available data:
     - Absolute velocity
     - Location
+    - Velocity vectors of the last HISTORY_LENGTH frames
+    - Odometer (distance driven since the first known location)
 
     Potential additions:
-    - Acceleration
     - Transform
     """
 
+    HISTORY_LENGTH = 64
+
     _vehicle_velocity_map = dict()
     _vehicle_location_map = dict()
+    _vehicle_history_map = dict()
+    _vehicle_odometer_map = dict()
 
     @staticmethod
     def register_vehicle(vehicle):
@@ -59,6 +102,10 @@ class CarlaDataProvider(object):
         else:
             CarlaDataProvider._vehicle_location_map[vehicle] = None
 
+        CarlaDataProvider._vehicle_history_map[vehicle] = VehicleHistory(
+            CarlaDataProvider.HISTORY_LENGTH)
+        CarlaDataProvider._vehicle_odometer_map[vehicle] = 0.0
+
     @staticmethod
     def register_vehicles(vehicles):
         """
@@ -68,19 +115,46 @@ class CarlaDataProvider(object):
             CarlaDataProvider.register_vehicle(vehicle)
 
     @staticmethod
-    def on_carla_tick():
+    def unregister_vehicles(vehicles):
+        """
+        Remove a set of vehicles from the dictionaries
+        Vehicles that are not registered are ignored
+        """
+        for vehicle in vehicles:
+            CarlaDataProvider._vehicle_velocity_map.pop(vehicle, None)
+            CarlaDataProvider._vehicle_location_map.pop(vehicle, None)
+            CarlaDataProvider._vehicle_history_map.pop(vehicle, None)
+            CarlaDataProvider._vehicle_odometer_map.pop(vehicle, None)
+
+    @staticmethod
+    def on_carla_tick(vehicles=None):
         """
         Callback from CARLA
+        If vehicles is given, only the data of these vehicles is updated
         """
-        for vehicle in CarlaDataProvider._vehicle_velocity_map:
-            if vehicle is not None and vehicle.is_alive:
+        if vehicles is None:
+            vehicles = list(CarlaDataProvider._vehicle_velocity_map)
+
+        game_time = GameTime.get_time()
+        for vehicle in vehicles:
+            if (vehicle is not None and vehicle.is_alive and
+                    vehicle in CarlaDataProvider._vehicle_velocity_map):
+                velocity = vehicle.get_velocity()
                 CarlaDataProvider._vehicle_velocity_map[
-                    vehicle] = calculate_velocity(vehicle)
+                    vehicle] = math.sqrt(velocity.x**2 + velocity.y**2)
+                CarlaDataProvider._vehicle_history_map[vehicle].append(game_time, velocity)
 
-        for vehicle in CarlaDataProvider._vehicle_location_map:
-            if vehicle is not None and vehicle.is_alive:
-                CarlaDataProvider._vehicle_location_map[
-                    vehicle] = vehicle.get_location()
+        for vehicle in vehicles:
+            if (vehicle is not None and vehicle.is_alive and
+                    vehicle in CarlaDataProvider._vehicle_location_map):
+                location = vehicle.get_location()
+                last_location = CarlaDataProvider._vehicle_location_map[vehicle]
+                if last_location is not None:
+                    CarlaDataProvider._vehicle_odometer_map[vehicle] += math.sqrt(
+                        (location.x - last_location.x)**2 +
+                        (location.y - last_location.y)**2 +
+                        (location.z - last_location.z)**2)
+                CarlaDataProvider._vehicle_location_map[vehicle] = location
 
     @staticmethod
     def get_velocity(vehicle):
@@ -106,6 +180,61 @@ class CarlaDataProvider(object):
         else:
             return CarlaDataProvider._vehicle_location_map[vehicle]
 
+    @staticmethod
+    def get_odometer(vehicle):
+        """
+        returns the distance the given vehicle drove since its first known
+        location, or None if its location is not known yet.
+        Users capture the reading when they start and subtract it later on.
+        """
+        if CarlaDataProvider.get_location(vehicle) is None:
+            return None
+        return CarlaDataProvider._vehicle_odometer_map[vehicle]
+
+    @staticmethod
+    def get_odometers(vehicles):
+        """
+        returns the odometer readings of the given vehicles as array
+        Entries of vehicles without known location are NaN
+        """
+        odometers = np.full(len(vehicles), np.nan)
+        for i, vehicle in enumerate(vehicles):
+            odometer = CarlaDataProvider.get_odometer(vehicle)
+            if odometer is not None:
+                odometers[i] = odometer
+        return odometers
+
+    @staticmethod
+    def get_history(vehicle, frames):
+        """
+        returns the game times and velocity vectors of the given vehicle
+        over the last (at most) frames frames, see VehicleHistory.get_last()
+        """
+        if vehicle not in CarlaDataProvider._vehicle_history_map:
+            return np.zeros(0), np.zeros((0, 3))
+        return CarlaDataProvider._vehicle_history_map[vehicle].get_last(frames)
+
+    @staticmethod
+    def get_velocities(vehicles):
+        """
+        returns the absolute velocities of the given vehicles as array
+        """
+        return np.array([CarlaDataProvider.get_velocity(vehicle) for vehicle in vehicles],
+                        dtype=np.float64)
+
+    @staticmethod
+    def get_locations(vehicles):
+        """
+        returns the locations of the given vehicles as (n, 3) array
+        Rows of vehicles without known location are NaN
+        """
+        locations = np.full((len(vehicles), 3), np.nan)
+        for i, vehicle in enumerate(vehicles):
+            location = CarlaDataProvider.get_location(vehicle)
+            if location is not None:
+                locations[i] = (location.x, location.y, location.z)
+        return locations
+
     @staticmethod
     def cleanup():
         """
@@ -113,3 +242,5 @@ class CarlaDataProvider(object):
         """
         CarlaDataProvider._vehicle_velocity_map.clear()
         CarlaDataProvider._vehicle_location_map.clear()
+        CarlaDataProvider._vehicle_history_map.clear()
+        CarlaDataProvider._vehicle_odometer_map.clear()
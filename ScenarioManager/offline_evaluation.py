@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2018 Intel Labs.
+# authors: Fabian Oboril (fabian.oboril@intel.com)
+#
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module re-evaluates test criteria on recorded telemetry
+(see utility.telemetry), i.e. without a running CARLA server.
+
+Two ways are provided:
+- replay_criteria() feeds a recording tick by tick through the
+  CarlaDataProvider and GameTime into the existing criteria classes.
+  This works for all criteria that only use the data provider.
+- rescore() evaluates vectorized equivalents of the velocity and distance
+  criteria with NumPy, which re-scores thousands of recordings in seconds.
+
+Example (check a new velocity limit on all recorded runs):
+    rescore(glob.glob("records/*.tel"),
+            [("CheckMaximumVelocity", 12.0, None)])
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+
+import numpy as np
+
+from ScenarioManager.carla_data_provider import CarlaDataProvider
+from ScenarioManager.timer import GameTime
+from utility.telemetry import load_telemetry
+
+
+class ReplayLocation(object):
+
+    """
+    Minimal stand-in for carla.Location as used by the criteria
+    """
+
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def distance(self, other):
+        """
+        Returns the euclidean distance to the other location
+        """
+        return math.sqrt((self.x - other.x)**2 + (self.y - other.y)**2 + (self.z - other.z)**2)
+
+
+class ReplayVehicle(object):
+
+    """
+    Stand-in for a recorded vehicle, providing the state of the current
+    replay record via the same methods as a carla.Vehicle
+    """
+
+    def __init__(self, actor_id, type_id):
+        self.id = actor_id
+        self.type_id = type_id
+        self.is_alive = True
+        self._state = None
+
+    def set_state(self, state):
+        """
+        Set the recorded state (ACTOR_DTYPE entry) of the current tick
+        """
+        self._state = state
+
+    def get_location(self):
+        return ReplayLocation(float(self._state['x']), float(self._state['y']),
+                              float(self._state['z']))
+
+    def get_velocity(self):
+        return ReplayLocation(float(self._state['vx']), float(self._state['vy']),
+                              float(self._state['vz']))
+
+
+def replay_criteria(filename, create_criteria):
+    """
+    Replay a recording through criteria objects.
+
+    create_criteria is called with the list of replayed vehicles (in the order
+    of the recording, i.e. the ego vehicle first) and has to return a list of
+    criteria, e.g.:
+        lambda vehicles: [MaxVelocityTest(vehicles[0], 12.0)]
+
+    Returns the criteria after the last recorded tick.
+    Note: This uses the (static) CarlaDataProvider and GameTime and must not
+    be called while a scenario is running in the same process.
+    """
+    header, records = load_telemetry(filename)
+    vehicles = [ReplayVehicle(actor_id, type_id)
+                for actor_id, type_id in zip(header["actor_ids"], header["actor_types"])]
+    criteria = create_criteria(vehicles)
+
+    game_time_state = GameTime.get_state()
+    CarlaDataProvider.register_vehicles(vehicles)
+    try:
+        for record in records:
+            GameTime.set_state((float(record['game_time']), int(record['frame'])))
+            for vehicle, state in zip(vehicles, record['actors']):
+                vehicle.set_state(state)
+            CarlaDataProvider.on_carla_tick(vehicles)
+
+            for criterion in criteria:
+                criterion.tick_once()
+    finally:
+        CarlaDataProvider.unregister_vehicles(vehicles)
+        GameTime.set_state(game_time_state)
+
+    return criteria
+
+
+def velocities(records, actor=0):
+    """
+    Returns the absolute (2D) velocity of an actor for all records
+    """
+    actors = records['actors'][:, actor]
+    return np.hypot(actors['vx'], actors['vy'])
+
+
+def driven_distances(records, actor=0):
+    """
+    Returns the distance driven by an actor between consecutive records
+    """
+    actors = records['actors'][:, actor]
+    positions = np.stack((actors['x'], actors['y'], actors['z']), axis=-1).astype(np.float64)
+    return np.linalg.norm(np.diff(positions, axis=0), axis=1)
+
+
+def evaluate_max_velocity(records, success, acceptable=None, actor=0):
+    """
+    Vectorized MaxVelocityTest, returns (status, actual value)
+    """
+    if len(records) == 0:
+        return "INIT", 0.0
+    velocity = velocities(records, actor)
+    exceeded = np.flatnonzero(velocity > success)
+    if len(exceeded):
+        # The first violation is final, the value is frozen there
+        return "FAILURE", max(float(velocity[:exceeded[0] + 1].max()), 0.0)
+    return "SUCCESS", max(float(velocity.max()), 0.0)
+
+
+def evaluate_driven_distance(records, success, acceptable=None, actor=0):
+    """
+    Vectorized DrivenDistanceTest, returns (status, actual value)
+    """
+    if len(records) == 0:
+        return "INIT", 0.0
+    distance = np.cumsum(driven_distances(records, actor))
+    reached = np.flatnonzero(distance > success)
+    if len(reached):
+        # Reaching the distance is final, the value is frozen there
+        return "SUCCESS", float(distance[reached[0]])
+    distance = float(distance[-1]) if len(distance) else 0.0
+    return _status_above(distance, success, acceptable), distance
+
+
+def evaluate_average_velocity(records, success, acceptable=None, actor=0):
+    """
+    Vectorized AverageVelocityTest, returns (status, actual value)
+    """
+    if len(records) == 0:
+        return "INIT", 0.0
+    elapsed_time = float(records['game_time'][-1])
+    velocity = 0.0
+    if elapsed_time > 0.0:
+        velocity = float(driven_distances(records, actor).sum()) / elapsed_time
+    return _status_above(velocity, success, acceptable), velocity
+
+
+def _status_above(value, success, acceptable):
+    """
+    Status of criteria which succeed if the value exceeds the expected value
+    """
+    if value > success:
+        return "SUCCESS"
+    if acceptable is not None and value > acceptable:
+        return "ACCEPTABLE"
+    return "RUNNING"
+
+
+# Vectorized evaluation per criterion name (see atomic_scenario_criteria)
+VECTORIZED_CRITERIA = {
+    "CheckMaximumVelocity": evaluate_max_velocity,
+    "CheckDrivenDistance": evaluate_driven_distance,
+    "CheckAverageVelocity": evaluate_average_velocity,
+}
+
+
+def rescore_recording(filename, criteria, actor=0):
+    """
+    Evaluate the given criteria on one recording.
+    criteria is a list of (criterion name, expected value success,
+    expected value acceptable) tuples.
+    Returns a dict similar to the result records of result_writer
+    """
+    header, records = load_telemetry(filename)
+    results = []
+    for name, success, acceptable in criteria:
+        status, actual_value = VECTORIZED_CRITERIA[name](records, success, acceptable, actor)
+        results.append({
+            "name": name,
+            "vehicle_id": header["actor_ids"][actor],
+            "status": status,
+            "actual_value": actual_value,
+            "expected_value_success": success,
+            "expected_value_acceptable": acceptable})
+
+    return {
+        "file": filename,
+        "scenario": header["metadata"].get("scenario"),
+        "seed": header["metadata"].get("seed"),
+        "criteria": results}
+
+
+def rescore(filenames, criteria, actor=0, processes=None):
+    """
+    Evaluate the given criteria on many recordings, optionally distributed
+    over several processes. Returns one dict per recording (see rescore_recording)
+    """
+    if not processes:
+        return [rescore_recording(filename, criteria, actor) for filename in filenames]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(rescore_recording, filenames,
+                                 [criteria] * len(filenames), [actor] * len(filenames),
+                                 chunksize=64))
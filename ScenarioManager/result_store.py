@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2018 Intel Labs.
+# authors: Fabian Oboril (fabian.oboril@intel.com)
+#
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module contains a persistent store for the results of CARLA scenarios.
+
+Every scenario execution is stored in a local SQLite database, including
+the scenario parameters, the random seed, durations, tick statistics and
+the status and values of every criterion. Indexes on scenario, seed and
+criterion allow to query campaigns with millions of runs without parsing
+any junit or log output.
+"""
+
+import json
+import sqlite3
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    scenario TEXT NOT NULL,
+    result TEXT NOT NULL,
+    seed INTEGER,
+    parameters TEXT,
+    start_time REAL,
+    end_time REAL,
+    duration_system REAL,
+    duration_game REAL,
+    timeout REAL,
+    tick_count INTEGER,
+    tick_duration_mean REAL,
+    tick_duration_max REAL
+);
+CREATE TABLE IF NOT EXISTS criteria (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    name TEXT NOT NULL,
+    vehicle_type TEXT,
+    vehicle_id INTEGER,
+    optional INTEGER,
+    status TEXT,
+    actual_value REAL,
+    expected_value_success REAL,
+    expected_value_acceptable REAL
+);
+CREATE INDEX IF NOT EXISTS runs_scenario ON runs (scenario, start_time);
+CREATE INDEX IF NOT EXISTS runs_seed ON runs (seed);
+CREATE INDEX IF NOT EXISTS criteria_run ON criteria (run_id);
+CREATE INDEX IF NOT EXISTS criteria_name ON criteria (name, status);
+"""
+
+
+class ResultStore(object):
+
+    """
+    SQLite store for scenario results.
+
+    The store is a report for ScenarioManager.analyze_scenario(), i.e. every
+    record passed to add() (see result_writer.scenario_record()) is inserted
+    and committed immediately. Use as context manager, or call close().
+    """
+
+    def __init__(self, filename):
+        """
+        Open (or create) the database in the given file
+        """
+        self._connection = sqlite3.connect(filename, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, record):
+        """
+        Insert the record of one scenario execution
+        Returns the id of the new run
+        """
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (scenario, result, seed, parameters, start_time, end_time, "
+                "duration_system, duration_game, timeout, tick_count, tick_duration_mean, "
+                "tick_duration_max) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (record["scenario"],
+                 record["result"],
+                 record["seed"],
+                 json.dumps(record.get("parameters", {}), sort_keys=True),
+                 record["start_time"],
+                 record["end_time"],
+                 record["scenario_duration_system"],
+                 record["scenario_duration_game"],
+                 record["timeout"],
+                 record.get("tick_count"),
+                 record.get("tick_duration_mean"),
+                 record.get("tick_duration_max")))
+            run_id = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO criteria (run_id, name, vehicle_type, vehicle_id, optional, status, "
+                "actual_value, expected_value_success, expected_value_acceptable) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id,
+                  criterion["name"],
+                  criterion["vehicle_type"],
+                  criterion["vehicle_id"],
+                  int(criterion["optional"]),
+                  criterion["status"],
+                  criterion["actual_value"],
+                  criterion["expected_value_success"],
+                  criterion["expected_value_acceptable"]) for criterion in record["criteria"]])
+        return run_id
+
+    def pass_rates(self, since=None):
+        """
+        Returns (scenario, runs, successful runs) for every scenario,
+        optionally only for runs started after the given time
+        """
+        return self.execute(
+            "SELECT scenario, COUNT(*), SUM(result = 'SUCCESS' OR result = 'ACCEPTABLE') "
+            "FROM runs WHERE start_time >= ? GROUP BY scenario ORDER BY scenario",
+            (since if since is not None else float('-inf'),))
+
+    def criterion_values(self, scenario, criterion):
+        """
+        Returns (run id, seed, status, actual value) of a criterion for all
+        runs of a scenario, in the order the runs were started
+        """
+        return self.execute(
+            "SELECT runs.id, runs.seed, criteria.status, criteria.actual_value "
+            "FROM runs JOIN criteria ON criteria.run_id = runs.id "
+            "WHERE runs.scenario = ? AND criteria.name = ? ORDER BY runs.start_time",
+            (scenario, criterion))
+
+    def failures(self, criterion, since=None):
+        """
+        Returns (run id, scenario, seed, actual value, expected value) of all
+        runs in which the given criterion did not succeed
+        """
+        return self.execute(
+            "SELECT runs.id, runs.scenario, runs.seed, criteria.actual_value, "
+            "criteria.expected_value_success "
+            "FROM criteria JOIN runs ON criteria.run_id = runs.id "
+            "WHERE criteria.name = ? AND criteria.status != 'SUCCESS' AND runs.start_time >= ? "
+            "ORDER BY runs.start_time",
+            (criterion, since if since is not None else float('-inf')))
+
+    def execute(self, query, parameters=()):
+        """
+        Run an arbitrary SQL query and return all rows
+        """
+        return self._connection.execute(query, parameters).fetchall()
+
+    def close(self):
+        """
+        Close the database
+        """
+        self._connection.close()
@@ -11,8 +11,12 @@ This module contains the result gatherer and write for CARLA scenarios.
 It shall be used from the ScenarioManager only.
 """
 
+import json
 import logging
 import time
+from xml.sax.saxutils import escape, quoteattr
+
+from utility.log_pipeline import LogPipeline
 
 
 class ResultOutputProvider(object):
@@ -22,45 +26,60 @@ class ResultOutputProvider(object):
     It shall be used from the ScenarioManager only.
     """
 
-    def __init__(self, data, result, stdout=True, filename=None, junit=None):
+    _handlers = dict()  # Output handlers shared by all results
+
+    def __init__(self, data, result, stdout=True, filename=None):
         """
         Setup all parameters
         - _data contains all scenario-related information
         - _result is overall pass/fail info
         - _stdout (True/False) is used to (de)activate terminal output
         - _filename is used to (de)activate file output in tabular form
-        - _junit is used to (de)activate file output in _junit form
+
+        Junit output is written by a ReportWriter owned by the caller, so that
+        the results of all repetitions end up in one file.
         """
         self._data = data
         self._result = result
         self._stdout = stdout
         self._filename = filename
-        self._junit = junit
 
         self._start_time = time.strftime('%Y-%m-%d %H:%M:%S',
                                          time.localtime(self._data.start_system_time))
         self._end_time = time.strftime('%Y-%m-%d %H:%M:%S',
                                        time.localtime(self._data.end_system_time))
 
-        self.logger = logging.getLogger()
+        # Use a dedicated logger, the root logger belongs to the application
+        self.logger = logging.getLogger("ScenarioManager.results")
         self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
 
     def write(self):
         """
         Public write function
         """
-        if self._stdout:
-            channel = logging.StreamHandler()
-            self.logger.addHandler(channel)
-        if self._filename is not None:
-            filehandle = logging.FileHandler(self._filename)
-            self.logger.addHandler(filehandle)
-        if self._junit is not None:
-            self._write_to_junit()
-
         if self._stdout or (self._filename is not None):
-            self._write_to_logger()
             self.logger.handlers = []
+            if self._stdout:
+                self.logger.addHandler(self._get_handler(None))
+            if self._filename is not None:
+                self.logger.addHandler(self._get_handler(self._filename))
+            self._write_to_logger()
+
+    @staticmethod
+    def _get_handler(filename):
+        """
+        Returns the handler for stdout (filename None) or the given file
+        Handlers are created once and reused by all later results. The
+        output is formatted and written by the writer thread of the LogPipeline.
+        """
+        if filename not in ResultOutputProvider._handlers:
+            if filename is None:
+                target = logging.StreamHandler()
+            else:
+                target = logging.FileHandler(filename)
+            ResultOutputProvider._handlers[filename] = LogPipeline.handler(target)
+        return ResultOutputProvider._handlers[filename]
 
     def _write_to_logger(self):
         """
@@ -75,6 +94,7 @@ class ResultOutputProvider(object):
         self.logger.info("Duration: System Time %5.2fs --- Game Time %5.2fs",
                          self._data.scenario_duration_system,
                          self._data.scenario_duration_game)
+        self.logger.info("Random seed:    %s", self._data.seed)
         self.logger.info("Ego vehicle:    %s", self._data.ego_vehicle)
 
         vehicle_string = ""
@@ -118,86 +138,156 @@ class ResultOutputProvider(object):
 
         self.logger.info("\n")
 
-    def _write_to_junit(self):
+
+def scenario_record(data, result):
+    """
+    Collect all results of a finished scenario into a plain dictionary
+    - data is the ScenarioManager holding the scenario-related information
+    - result is overall pass/fail info
+    """
+    criteria = []
+    for criterion in data.scenario.test_criteria:
+        criteria.append({
+            "name": criterion.name,
+            "vehicle_type": criterion.vehicle.type_id,
+            "vehicle_id": criterion.vehicle.id,
+            "optional": criterion.optional,
+            "status": criterion.test_status,
+            "actual_value": float(criterion.actual_value),
+            "expected_value_success": criterion.expected_value_success,
+            "expected_value_acceptable": criterion.expected_value_acceptable})
+
+    return {
+        "scenario": data.scenario_tree.name,
+        "result": result,
+        "seed": data.seed,
+        "parameters": data.scenario_parameters,
+        "start_time": data.start_system_time,
+        "end_time": data.end_system_time,
+        "scenario_duration_system": data.scenario_duration_system,
+        "scenario_duration_game": data.scenario_duration_game,
+        "timeout": data.scenario.timeout,
+        "tick_count": data.tick_count,
+        "tick_duration_mean": data.tick_duration_total / max(data.tick_count, 1),
+        "tick_duration_max": data.tick_duration_max,
+        "criteria": criteria}
+
+
+class ReportWriter(object):
+
+    """
+    Streaming writer for the results of many scenario executions.
+
+    Every record passed to add() is appended to one aggregated junit file
+    (one testsuite per scenario execution) and/or one JSON-lines file, and
+    flushed immediately. Nothing is kept in memory between records, so the
+    writer can be used for campaigns with an arbitrary number of runs.
+
+    Use as context manager, or call close() to finish the junit file.
+    """
+
+    def __init__(self, junit=None, json_lines=None):
         """
-        Writing to Junit XML
+        Setup all parameters
+        - junit is the name of the aggregated junit file (or None)
+        - json_lines is the name of the JSON-lines file (or None)
         """
-        test_count = 0
-        failure_count = 0
-        for criterion in self._data.scenario.test_criteria:
-            test_count += 1
-            if criterion.test_status != "SUCCESS":
-                failure_count += 1
+        self._junit_file = None
+        self._json_file = None
 
-        # handle timeout
-        test_count += 1
-        if self._data.scenario_duration_game >= self._data.scenario.timeout:
-            failure_count += 1
+        if junit is not None:
+            self._junit_file = open(junit, "w")
+            self._junit_file.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n")
+            self._junit_file.write("<testsuites name=\"Simulation\" package=\"Scenarios\">\n")
+        if json_lines is not None:
+            self._json_file = open(json_lines, "a")
 
-        junit_file = open(self._junit, "w")
+    def __enter__(self):
+        return self
 
-        junit_file.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n")
+    def __exit__(self, *args):
+        self.close()
 
-        test_suites_string = ("<testsuites tests=\"%d\" failures=\"%d\" disabled=\"0\" "
-                              "errors=\"0\" timestamp=\"%s\" time=\"%5.2f\" "
-                              "name=\"Simulation\" package=\"Scenarios\">\n" %
-                              (test_count,
-                               failure_count,
-                               self._start_time,
-                               self._data.scenario_duration_system))
-        junit_file.write(test_suites_string)
+    def add(self, record):
+        """
+        Append the record of one scenario execution (see scenario_record())
+        """
+        if self._junit_file is not None:
+            self._junit_file.write(self._junit_testsuite(record))
+            self._junit_file.flush()
+        if self._json_file is not None:
+            self._json_file.write(json.dumps(record) + "\n")
+            self._json_file.flush()
 
-        test_suite_string = ("  <testsuite name=\"%s\" tests=\"%d\" failures=\"%d\" "
-                             "disabled=\"0\" errors=\"0\" time=\"%5.2f\">\n" %
-                             (self._data.scenario_tree.name,
-                              test_count,
-                              failure_count,
-                              self._data.scenario_duration_system))
-        junit_file.write(test_suite_string)
+    def close(self):
+        """
+        Finish and close all files
+        """
+        if self._junit_file is not None:
+            self._junit_file.write("</testsuites>\n")
+            self._junit_file.close()
+            self._junit_file = None
+        if self._json_file is not None:
+            self._json_file.close()
+            self._json_file = None
 
-        for criterion in self._data.scenario.test_criteria:
-            testcase_name = criterion.name + "_" + \
-                criterion.vehicle.type_id[8:] + "_" + str(criterion.vehicle.id)
-            result_string = ("    <testcase name=\"{}\" status=\"run\" "
-                             "time=\"0\" classname=\"Scenarios.{}\">\n".format(
-                                 testcase_name, self._data.scenario_tree.name))
-            if criterion.test_status != "SUCCESS":
-                result_string += "      <failure message=\"{}\"  type=\"\"><!\[CDATA\[\n".format(
-                    criterion.name)
-                result_string += "  Actual:   {}\n".format(
-                    criterion.actual_value)
-                result_string += "  Expected: {}\n".format(
-                    criterion.expected_value_success)
-                result_string += "\n"
-                result_string += "  Exact Value: {} = {}\]\]></failure>\n".format(
-                    criterion.name, criterion.actual_value)
-            else:
-                result_string += "  Exact Value: {} = {}\n".format(
-                    criterion.name, criterion.actual_value)
-            result_string += "    </testcase>\n"
-            junit_file.write(result_string)
+    @staticmethod
+    def _junit_testsuite(record):
+        """
+        Build the testsuite element of one record
+        """
+        classname = "Scenarios." + record["scenario"]
+        timed_out = record["scenario_duration_game"] >= record["timeout"]
+
+        test_count = len(record["criteria"]) + 1
+        failure_count = len([criterion for criterion in record["criteria"]
+                             if criterion["status"] != "SUCCESS"])
+        if timed_out:
+            failure_count += 1
+
+        lines = []
+        lines.append("  <testsuite name=%s tests=\"%d\" failures=\"%d\" disabled=\"0\" "
+                     "errors=\"0\" timestamp=%s time=\"%5.2f\">" % (
+                         quoteattr(record["scenario"]),
+                         test_count,
+                         failure_count,
+                         quoteattr(time.strftime('%Y-%m-%dT%H:%M:%S',
+                                                 time.localtime(record["start_time"]))),
+                         record["scenario_duration_system"]))
+        lines.append("    <properties>")
+        lines.append("      <property name=\"seed\" value=%s/>" % quoteattr(str(record["seed"])))
+        lines.append("      <property name=\"result\" value=%s/>" % quoteattr(record["result"]))
+        lines.append("    </properties>")
+
+        for criterion in record["criteria"]:
+            testcase_name = "{}_{}_{}".format(
+                criterion["name"], criterion["vehicle_type"][8:], criterion["vehicle_id"])
+            lines.extend(ReportWriter._junit_testcase(
+                testcase_name, classname, 0, criterion["name"],
+                criterion["status"] != "SUCCESS",
+                criterion["actual_value"], criterion["expected_value_success"]))
 
         # Handle timeout separately
-        result_string = ("    <testcase name=\"Duration\" status=\"run\" time=\"{}\" "
-                         "classname=\"Scenarios.{}\">\n".format(
-                             self._data.scenario_duration_system,
-                             self._data.scenario_tree.name))
-        if self._data.scenario_duration_game >= self._data.scenario.timeout:
-            result_string += "      <failure message=\"{}\"  type=\"\"><!\[CDATA\[\n".format(
-                "Duration")
-            result_string += "  Actual:   {}\n".format(
-                self._data.scenario_duration_game)
-            result_string += "  Expected: {}\n".format(
-                self._data.scenario.timeout)
-            result_string += "\n"
-            result_string += "  Exact Value: {} = {}\]\]></failure>\n".format(
-                "Duration", self._data.scenario_duration_game)
+        lines.extend(ReportWriter._junit_testcase(
+            "Duration", classname, record["scenario_duration_system"], "Duration", timed_out,
+            record["scenario_duration_game"], record["timeout"]))
+
+        lines.append("  </testsuite>")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _junit_testcase(name, classname, duration, value_name, failed, actual, expected):
+        """
+        Build the testcase element of one criterion
+        """
+        lines = ["    <testcase name=%s status=\"run\" time=\"%s\" classname=%s>" % (
+            quoteattr(name), duration, quoteattr(classname))]
+        exact_value = "Exact Value: {} = {}".format(value_name, actual)
+        if failed:
+            message = "  Actual:   {}\n  Expected: {}\n\n  {}".format(actual, expected, exact_value)
+            lines.append("      <failure message=%s type=\"\"><![CDATA[\n%s]]></failure>" % (
+                quoteattr(value_name), message.replace("]]>", "]]]]><![CDATA[>")))
         else:
-            result_string += "  Exact Value: {} = {}\n".format(
-                "Duration", self._data.scenario_duration_game)
-        result_string += "    </testcase>\n"
-        junit_file.write(result_string)
-
-        junit_file.write("  </testsuite>\n")
-        junit_file.write("</testsuites>\n")
-        junit_file.close()
+            lines.append("      <system-out>%s</system-out>" % escape(exact_value))
+        lines.append("    </testcase>")
+        return lines
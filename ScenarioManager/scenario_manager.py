@@ -12,15 +12,19 @@ These must not be modified and are for reference only!
 """
 
 from __future__ import print_function
+import os
 import sys
 import time
 import threading
 
 import py_trees
 
+from ScenarioManager.atomic_scenario_criteria import BatchCriterion
 from ScenarioManager.carla_data_provider import CarlaDataProvider
-from ScenarioManager.result_writer import ResultOutputProvider
+from ScenarioManager.result_writer import ResultOutputProvider, scenario_record
 from ScenarioManager.timer import GameTime, TimeOut
+from utility.random_source import RandomSource
+from utility.telemetry import TelemetryRecorder
 
 
 class Scenario(object):
@@ -33,22 +37,33 @@ class Scenario(object):
 
     Important parameters:
     - behavior: User defined scenario with py_tree
-    - criteria_list: List of user defined test criteria with py_tree
+    - criteria_list: List of user defined test criteria with py_tree.
+                     Batched criteria (BatchCriterion) are expanded into one
+                     criterion per vehicle in test_criteria
     - timeout (default = 60s): Timeout of the scenario in seconds
-    - terminate_on_failure: Terminate scenario on first failure
+    - terminate_on_failure: Terminate scenario on first failure, or as soon
+                            as all required criteria are final
     """
 
     def __init__(self, behavior, criteria, name, timeout=60, terminate_on_failure=False):
         self.behavior = behavior
-        self.test_criteria = criteria
         self.timeout = timeout
+        self.terminate_on_failure = terminate_on_failure
+        self.criteria_nodes = criteria
 
-        for criterion in self.test_criteria:
+        for criterion in criteria:
             criterion.terminate_on_failure = terminate_on_failure
 
+        self.test_criteria = []
+        for criterion in criteria:
+            if isinstance(criterion, BatchCriterion):
+                self.test_criteria.extend(criterion.criteria)
+            else:
+                self.test_criteria.append(criterion)
+
         # Create py_tree for test criteria
         self.criteria_tree = py_trees.composites.Parallel(name="Test Criteria")
-        self.criteria_tree.add_children(self.test_criteria)
+        self.criteria_tree.add_children(criteria)
         self.criteria_tree.setup(timeout=1)
 
         # Create node for timeout
@@ -63,6 +78,13 @@ class Scenario(object):
         self.scenario_tree.add_child(self.criteria_tree)
         self.scenario_tree.setup(timeout=1)
 
+    def criteria_decided(self):
+        """
+        Returns True if the result of all required criteria is final
+        """
+        required = [criterion for criterion in self.criteria_nodes if not criterion.optional]
+        return bool(required) and all(criterion.final for criterion in required)
+
     def terminate(self):
         """
         This function sets the status of all leaves in the scenario tree to INVALID
@@ -120,6 +142,17 @@ class ScenarioManager(object):
         self.scenario_duration_game = 0.0
         self.start_system_time = None
         self.end_system_time = None
+        self.seed = None
+        self.scenario_parameters = dict()
+
+        # Tick statistics (system time spent per scenario tick)
+        self.tick_count = 0
+        self.tick_duration_total = 0.0
+        self.tick_duration_max = 0.0
+
+        # Directory for per-tick telemetry recordings (None = do not record)
+        self.telemetry_directory = None
+        self._telemetry = None
 
         world.on_tick(self._tick_scenario)
 
@@ -132,10 +165,20 @@ class ScenarioManager(object):
         self.scenario_tree = self.scenario.scenario_tree
         self.ego_vehicle = scenario.ego_vehicle
         self.other_vehicles = scenario.other_vehicles
+        self.seed = RandomSource.get_seed()
+        self.scenario_parameters = scenario.get_parameters()
 
         CarlaDataProvider.register_vehicle(self.ego_vehicle)
         CarlaDataProvider.register_vehicles(self.other_vehicles)
 
+        if self.telemetry_directory is not None:
+            filename = "{}_{}_{}.tel".format(
+                self.scenario_tree.name, self.seed, time.strftime("%Y%m%d-%H%M%S"))
+            self._telemetry = TelemetryRecorder(
+                os.path.join(self.telemetry_directory, filename),
+                [self.ego_vehicle] + self.other_vehicles,
+                metadata={"scenario": self.scenario_tree.name, "seed": self.seed})
+
         # To print the scenario tree uncomment the next line
         # py_trees.display.render_dot_tree(self.scenario_tree)
 
@@ -150,6 +193,9 @@ class ScenarioManager(object):
         self.scenario_duration_game = 0.0
         self.start_system_time = None
         self.end_system_time = None
+        self.tick_count = 0
+        self.tick_duration_total = 0.0
+        self.tick_duration_max = 0.0
         GameTime.restart()
 
     def run_scenario(self):
@@ -189,13 +235,18 @@ class ScenarioManager(object):
         with self._my_lock:
             if self._running and self._timestamp_last_run < timestamp.elapsed_seconds:
                 self._timestamp_last_run = timestamp.elapsed_seconds
+                tick_start_time = time.time()
 
                 if self._debug_mode:
                     print("\n--------- Tick ---------\n")
 
                 # Update game time and vehicle information
                 GameTime.on_carla_tick(timestamp)
-                CarlaDataProvider.on_carla_tick()
+                CarlaDataProvider.on_carla_tick(
+                    [self.ego_vehicle] + self.other_vehicles)
+
+                if self._telemetry is not None:
+                    self._telemetry.record(timestamp.frame_count, GameTime.get_time())
 
                 # Tick scenario
                 self.scenario_tree.tick_once()
@@ -208,6 +259,13 @@ class ScenarioManager(object):
 
                 if self.scenario_tree.status != py_trees.common.Status.RUNNING:
                     self._running = False
+                elif self.scenario.terminate_on_failure and self.scenario.criteria_decided():
+                    self._running = False
+
+                tick_duration = time.time() - tick_start_time
+                self.tick_count += 1
+                self.tick_duration_total += tick_duration
+                self.tick_duration_max = max(self.tick_duration_max, tick_duration)
 
     def stop_scenario(self):
         """
@@ -216,13 +274,27 @@ class ScenarioManager(object):
         if self.scenario is not None:
             self.scenario.terminate()
 
+        self._stop_telemetry()
         CarlaDataProvider.cleanup()
 
-    def analyze_scenario(self, stdout, filename, junit):
+    def _stop_telemetry(self):
+        """
+        Close the telemetry recording of the current scenario (if any)
+        """
+        with self._my_lock:
+            if self._telemetry is not None:
+                self._telemetry.close()
+                self._telemetry = None
+
+    def analyze_scenario(self, stdout, filename, reports=None):
         """
         This function is intended to be called from outside and provide
         statistics about the scenario (human-readable, in form of a junit
         report, etc.)
+
+        reports is an optional list of objects with an add(record) method,
+        which receive the results as scenario_record(). For junit output,
+        pass one ReportWriter for all scenario executions.
         """
 
         failure = False
@@ -241,7 +313,12 @@ class ScenarioManager(object):
             timeout = True
             result = "TIMEOUT"
 
-        output = ResultOutputProvider(self, result, stdout, filename, junit)
+        output = ResultOutputProvider(self, result, stdout, filename)
         output.write()
 
+        if reports:
+            record = scenario_record(self, result)
+            for report in reports:
+                report.add(record)
+
         return failure or timeout
@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2018 Intel Labs.
+# authors: Fabian Oboril (fabian.oboril@intel.com)
+#
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module aggregates the results of many scenario executions
+(e.g. a whole campaign) without keeping the single results in memory.
+
+Distributions (criterion values, durations) are stored in mergeable
+quantile sketches with bounded relative error, so statistics of parallel
+workers can be combined by merging their exports:
+
+    statistics = CampaignStatistics.load("worker_1.json")
+    statistics.merge(CampaignStatistics.load("worker_2.json"))
+    print(statistics.summary())
+"""
+
+import json
+import math
+import os
+
+
+class _Buckets(dict):
+
+    """
+    Counts of a QuantileSketch by bucket index, together with the lowest index in use
+    """
+
+    def __init__(self, *args):
+        super(_Buckets, self).__init__(*args)
+        self.lowest = min(self) if self else None
+
+
+class QuantileSketch(object):
+
+    """
+    Streaming quantile sketch with relative accuracy (DDSketch).
+
+    Values are counted in logarithmically sized buckets, each quantile is
+    returned with a relative error of at most relative_accuracy. Two
+    sketches with the same accuracy can be merged without loss.
+    If more than max_buckets buckets are used, the lowest ones are collapsed.
+    Non-finite values (NaN, +-inf) cannot be bucketed, they are only counted
+    in non_finite and are not part of count, sum, min, max or the quantiles.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.non_finite = 0
+        self._zeros = 0
+        self._positive = _Buckets()
+        self._negative = _Buckets()
+
+    def add(self, value):
+        """
+        Add a value to the sketch
+        """
+        value = float(value)
+        if math.isnan(value) or math.isinf(value):
+            self.non_finite += 1
+            return
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+        if value > 0.0:
+            self._add_to_bucket(self._positive, self._index(value))
+        elif value < 0.0:
+            self._add_to_bucket(self._negative, self._index(-value))
+        else:
+            self._zeros += 1
+
+    def merge(self, other):
+        """
+        Add all values of another sketch (with the same accuracy)
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches of different accuracy")
+
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.non_finite += other.non_finite
+        self._zeros += other._zeros
+        for index, count in other._positive.items():
+            self._add_to_bucket(self._positive, index, count)
+        for index, count in other._negative.items():
+            self._add_to_bucket(self._negative, index, count)
+
+    def mean(self):
+        """
+        Returns the (exact) mean of all values
+        """
+        return self.sum / self.count if self.count else float('nan')
+
+    def quantile(self, q):
+        """
+        Returns the q-quantile (0 <= q <= 1) of all values
+        """
+        if not self.count:
+            return float('nan')
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self._negative, reverse=True):
+            seen += self._negative[index]
+            if seen > rank:
+                return self._clamp(-self._value(index))
+        seen += self._zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(self._positive):
+            seen += self._positive[index]
+            if seen > rank:
+                return self._clamp(self._value(index))
+        return self.max
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "non_finite": self.non_finite,
+            "zeros": self._zeros,
+            "positive": [[index, count] for index, count in self._positive.items()],
+            "negative": [[index, count] for index, count in self._negative.items()]}
+
+    @staticmethod
+    def from_dict(data):
+        sketch = QuantileSketch(data["relative_accuracy"], data["max_buckets"])
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        sketch.non_finite = data.get("non_finite", 0)
+        sketch._zeros = data["zeros"]
+        sketch._positive = _Buckets((index, count) for index, count in data["positive"])
+        sketch._negative = _Buckets((index, count) for index, count in data["negative"])
+        return sketch
+
+    def _index(self, value):
+        return int(math.ceil(math.log(value) / self._log_gamma))
+
+    def _value(self, index):
+        """
+        Representative value of a bucket (relative error <= relative_accuracy)
+        """
+        return 2.0 * self._gamma ** index / (self._gamma + 1.0)
+
+    def _clamp(self, value):
+        """
+        Bucket values may lie slightly outside of the observed range
+        """
+        return min(max(value, self.min), self.max)
+
+    def _add_to_bucket(self, buckets, index, count=1):
+        if index in buckets:
+            buckets[index] += count
+            return
+        if len(buckets) >= self.max_buckets and index < buckets.lowest:
+            # A new lowest bucket would be collapsed into the current one right away
+            buckets[buckets.lowest] += count
+            return
+
+        buckets[index] = count
+        if buckets.lowest is None or index < buckets.lowest:
+            buckets.lowest = index
+        if len(buckets) > self.max_buckets:
+            # Collapse the two lowest buckets. The lowest index only grows while
+            # the sketch is full, so the search for the next one is amortized.
+            following = buckets.lowest + 1
+            while following not in buckets:
+                following += 1
+            buckets[following] += buckets.pop(buckets.lowest)
+            buckets.lowest = following
+
+
+class _Aggregate(object):
+
+    """
+    Pass rate and value distribution of a scenario or criterion
+    """
+
+    def __init__(self, relative_accuracy):
+        self.runs = 0
+        self.passed = 0
+        self.values = QuantileSketch(relative_accuracy)
+
+    def add(self, passed, value):
+        self.runs += 1
+        if passed:
+            self.passed += 1
+        self.values.add(value)
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.passed += other.passed
+        self.values.merge(other.values)
+
+    def to_dict(self):
+        return {"runs": self.runs, "passed": self.passed, "values": self.values.to_dict()}
+
+    @staticmethod
+    def from_dict(data):
+        aggregate = _Aggregate(data["values"]["relative_accuracy"])
+        aggregate.runs = data["runs"]
+        aggregate.passed = data["passed"]
+        aggregate.values = QuantileSketch.from_dict(data["values"])
+        return aggregate
+
+
+class CampaignStatistics(object):
+
+    """
+    Streaming statistics per scenario (pass rate, system and game duration)
+    and per scenario criterion (pass rate, actual value).
+
+    The statistics are a report for ScenarioManager.analyze_scenario(), i.e.
+    they are updated with every record passed to add() (see
+    result_writer.scenario_record()). If a filename is given, the statistics
+    are exported to this file after every update (rolling export).
+    """
+
+    def __init__(self, filename=None, relative_accuracy=0.01):
+        self._filename = filename
+        self._relative_accuracy = relative_accuracy
+        self._scenarios = dict()
+        self._system_durations = dict()
+        self._criteria = dict()
+
+    def add(self, record):
+        """
+        Update the statistics with the record of one scenario execution
+        """
+        scenario = record["scenario"]
+        passed = record["result"] in ("SUCCESS", "ACCEPTABLE")
+        self._aggregate(self._scenarios, scenario).add(
+            passed, record["scenario_duration_game"])
+        self._aggregate(self._system_durations, scenario).add(
+            passed, record["scenario_duration_system"])
+
+        for criterion in record["criteria"]:
+            self._aggregate(self._criteria, (scenario, criterion["name"])).add(
+                criterion["status"] in ("SUCCESS", "ACCEPTABLE"), criterion["actual_value"])
+
+        if self._filename is not None:
+            self.save(self._filename)
+
+    def merge(self, other):
+        """
+        Add the statistics of another campaign (e.g. a parallel worker)
+        """
+        for mine, theirs in ((self._scenarios, other._scenarios),
+                             (self._system_durations, other._system_durations),
+                             (self._criteria, other._criteria)):
+            for key, aggregate in theirs.items():
+                self._aggregate(mine, key).merge(aggregate)
+
+    def summary(self):
+        """
+        Returns the statistics as human-readable table
+        """
+        lines = ["{:>40} | {:>7} | {:>9} | {:>10} | {:>10} | {:>10} | {:>10}".format(
+            "Scenario / Criterion", "Runs", "Pass rate", "Mean", "p50", "p95", "p99")]
+        lines.append("-" * len(lines[0]))
+        for scenario in sorted(self._scenarios):
+            lines.append(self._summary_line(
+                scenario + " (game time)", self._scenarios[scenario]))
+            lines.append(self._summary_line(
+                scenario + " (system time)", self._system_durations[scenario]))
+            for key in sorted(key for key in self._criteria if key[0] == scenario):
+                lines.append(self._summary_line("  " + key[1], self._criteria[key]))
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self._relative_accuracy,
+            "scenarios": {key: value.to_dict() for key, value in self._scenarios.items()},
+            "system_durations": {key: value.to_dict()
+                                 for key, value in self._system_durations.items()},
+            "criteria": [[key[0], key[1], value.to_dict()]
+                         for key, value in self._criteria.items()]}
+
+    @staticmethod
+    def from_dict(data):
+        statistics = CampaignStatistics(relative_accuracy=data["relative_accuracy"])
+        statistics._scenarios = {key: _Aggregate.from_dict(value)
+                                 for key, value in data["scenarios"].items()}
+        statistics._system_durations = {key: _Aggregate.from_dict(value)
+                                        for key, value in data["system_durations"].items()}
+        statistics._criteria = {(scenario, name): _Aggregate.from_dict(value)
+                                for scenario, name, value in data["criteria"]}
+        return statistics
+
+    def save(self, filename):
+        """
+        Export the statistics as JSON (replacing the file atomically)
+        """
+        temp_file = filename + '.tmp'
+        with open(temp_file, 'w') as file_handle:
+            json.dump(self.to_dict(), file_handle)
+        os.replace(temp_file, filename)
+
+    @staticmethod
+    def load(filename):
+        """
+        Import statistics previously exported with save()
+        """
+        with open(filename) as file_handle:
+            return CampaignStatistics.from_dict(json.load(file_handle))
+
+    def close(self):
+        """
+        Write the final export (if a filename is given)
+        """
+        if self._filename is not None:
+            self.save(self._filename)
+
+    def _aggregate(self, aggregates, key):
+        if key not in aggregates:
+            aggregates[key] = _Aggregate(self._relative_accuracy)
+        return aggregates[key]
+
+    @staticmethod
+    def _summary_line(name, aggregate):
+        values = aggregate.values
+        return "{:>40} | {:7d} | {:8.1f}% | {:10.2f} | {:10.2f} | {:10.2f} | {:10.2f}".format(
+            name[-40:], aggregate.runs, 100.0 * aggregate.passed / max(aggregate.runs, 1),
+            values.mean(), values.quantile(0.5), values.quantile(0.95), values.quantile(0.99))
@@ -13,6 +13,8 @@ timeout behavior using the CARLA game time
 
 import py_trees
 
+from utility.log_pipeline import lazy_debug
+
 
 class GameTime(object):
 
@@ -50,6 +52,20 @@ class GameTime(object):
         """
         return GameTime._current_game_time
 
+    @staticmethod
+    def get_state():
+        """
+        Returns the complete timer state (elapsed game time and last frame)
+        """
+        return (GameTime._current_game_time, GameTime._last_frame)
+
+    @staticmethod
+    def set_state(state):
+        """
+        Restore a timer state previously returned by get_state()
+        """
+        GameTime._current_game_time, GameTime._last_frame = state
+
 
 class TimeOut(py_trees.behaviour.Behaviour):
 
@@ -64,18 +80,18 @@ class TimeOut(py_trees.behaviour.Behaviour):
         Setup timeout
         """
         super(TimeOut, self).__init__(name)
-        self.logger.debug("%s.__init__()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.__init__()", self.__class__.__name__)
         self._timeout_value = timeout
         self._start_time = 0.0
         self.timeout = False
 
     def setup(self, unused_timeout=15):
-        self.logger.debug("%s.setup()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.setup()", self.__class__.__name__)
         return True
 
     def initialise(self):
         self._start_time = GameTime.get_time()
-        self.logger.debug("%s.initialise()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.initialise()", self.__class__.__name__)
 
     def update(self):
         """
@@ -91,11 +107,11 @@ class TimeOut(py_trees.behaviour.Behaviour):
             new_status = py_trees.common.Status.SUCCESS
             self.timeout = True
 
-        self.logger.debug("%s.update()[%s->%s]" %
-                          (self.__class__.__name__, self.status, new_status))
+        lazy_debug(self.logger, "%s.update()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
 
         return new_status
 
     def terminate(self, new_status):
-        self.logger.debug("%s.terminate()[%s->%s]" % (
-            self.__class__.__name__, self.status, new_status))
+        lazy_debug(self.logger, "%s.terminate()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
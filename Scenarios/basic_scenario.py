@@ -11,12 +11,12 @@ This module provide the basic class for all user-defined scenarios.
 """
 
 from __future__ import print_function
-import random
 import sys
 
 import py_trees
 
 from ScenarioManager.scenario_manager import Scenario
+from utility.blueprint_catalog import BlueprintCatalog
 
 
 def setup_vehicle(world, model, spawn_point, hero=False):
@@ -24,10 +24,8 @@ def setup_vehicle(world, model, spawn_point, hero=False):
     Function to setup the most relevant vehicle parameters,
     incl. spawn point and vehicle model.
     """
-    blueprint_library = world.get_blueprint_library()
-
     # Get vehicle by model
-    blueprint = random.choice(blueprint_library.filter(model))
+    blueprint = BlueprintCatalog.get(world).choice(model)
     if hero:
         blueprint.set_attribute('role_name', 'hero')
     else:
@@ -55,6 +53,7 @@ class BasicScenario(object):
     name = None             # Name of the scenario
     criteria_list = []      # List of evaluation criteria
     timeout = 60            # Timeout of scenario in seconds
+    terminate_on_failure = False  # End on first failure / once all criteria are decided
     scenario = None
 
     ego_vehicle = None
@@ -79,7 +78,7 @@ class BasicScenario(object):
         behavior = self._create_behavior()
         criteria = self._create_test_criteria()
         self.scenario = Scenario(
-            behavior, criteria, self.name, self.timeout)
+            behavior, criteria, self.name, self.timeout, self.terminate_on_failure)
 
     def _create_behavior(self):
         """
@@ -98,6 +97,25 @@ class BasicScenario(object):
             "This function is re-implemented by all scenarios"
             "If this error becomes visible the class hierarchy is somehow broken")
 
+    def get_parameters(self):
+        """
+        Returns all scalar parameters of the scenario (models, distances,
+        velocities, thresholds, ...) as dictionary, e.g. for result storage.
+        Leading underscores are removed from the parameter names.
+        """
+        attributes = dict()
+        for cls in reversed(type(self).__mro__):
+            attributes.update(vars(cls))
+        attributes.update(vars(self))
+
+        parameters = dict()
+        for key, value in attributes.items():
+            if key.startswith('__') or not isinstance(value, (bool, int, float, str)):
+                continue
+            parameters[key.lstrip('_')] = value
+
+        return parameters
+
     def _check_town(self, world):
         if world.map_name != self._town:
             print("The CARLA server uses the wrong map!")
@@ -17,14 +17,13 @@ a collision. The scenario ends either via a timeout, or if the ego
 vehicle stopped close enough to the leading vehicle
 """
 
-import random
-
 import py_trees
 import carla
 
 from ScenarioManager.atomic_scenario_behavior import *
 from ScenarioManager.atomic_scenario_criteria import *
 from Scenarios.basic_scenario import *
+from utility.random_source import RandomSource
 
 
 class FollowLeadingVehicle(BasicScenario):
@@ -57,14 +56,16 @@ class FollowLeadingVehicle(BasicScenario):
     _trigger_distance_from_ego = 15              # Starting point of other vehicle maneuver
     _other_vehicle_max_throttle = 1.0            # Maximum throttle of other vehicle
     _other_vehicle_max_brake = 1.0               # Maximum brake of other vehicle
-    _other_vehicle_distance = 50 + \
-        random.randint(0, 50)  # Distance the other vehicle should drive
+    _other_vehicle_distance = None               # Distance the other vehicle should drive, random in [50, 100]
 
     def __init__(self, world, debug_mode=False):
         """
         Setup all relevant parameters and create scenario
         and instantiate scenario manager
         """
+        self._other_vehicle_distance = 50 + \
+            RandomSource.get_generator().randint(0, 50)
+
         self.other_vehicles = [setup_vehicle(world,
                                              self._other_vehicle_model,
                                              self._other_vehicle_start)]
@@ -164,11 +165,8 @@ class FollowLeadingVehicle(BasicScenario):
         criteria.append(avg_velocity_criterion)
 
         # Add the collision and lane checks for all vehicles as well
-        for vehicle in self.other_vehicles:
-            collision_criterion = CollisionTest(vehicle)
-            keep_lane_criterion = KeepLaneTest(vehicle)
-            criteria.append(collision_criterion)
-            criteria.append(keep_lane_criterion)
+        criteria.append(CollisionBatchTest(self.other_vehicles))
+        criteria.append(KeepLaneBatchTest(self.other_vehicles))
 
         return criteria
 
@@ -203,16 +201,19 @@ class FollowLeadingVehicleWithObstacle(BasicScenario):
     _other_vehicle_distance = 40             # Distance the other vehicle should drive
 
     _other_vehicle_model_no2 = 'vehicle.gazelle.omafiets'
-    _other_vehicle_start_x_no2 = _other_vehicle_start_x + \
-        10 + random.randint(_other_vehicle_distance, 80)
-    _other_vehicle_start_no2 = carla.Transform(
-        carla.Location(x=_other_vehicle_start_x_no2, y=133.5, z=39), carla.Rotation(yaw=0))
+    _other_vehicle_start_x_no2 = None        # Random start of the obstacle, ahead of the other vehicle
+    _other_vehicle_start_no2 = None
 
     def __init__(self, world, debug_mode=False):
         """
         Setup all relevant parameters and create scenario
         and instantiate scenario manager
         """
+        self._other_vehicle_start_x_no2 = self._other_vehicle_start_x + \
+            10 + RandomSource.get_generator().randint(self._other_vehicle_distance, 80)
+        self._other_vehicle_start_no2 = carla.Transform(
+            carla.Location(x=self._other_vehicle_start_x_no2, y=133.5, z=39), carla.Rotation(yaw=0))
+
         self.other_vehicles = [setup_vehicle(world,
                                              self._other_vehicle_model,
                                              self._other_vehicle_start),
@@ -323,10 +324,7 @@ class FollowLeadingVehicleWithObstacle(BasicScenario):
         criteria.append(avg_velocity_criterion)
 
         # Add the collision and lane checks for all vehicles as well
-        for vehicle in self.other_vehicles:
-            collision_criterion = CollisionTest(vehicle)
-            keep_lane_criterion = KeepLaneTest(vehicle)
-            criteria.append(collision_criterion)
-            criteria.append(keep_lane_criterion)
+        criteria.append(CollisionBatchTest(self.other_vehicles))
+        criteria.append(KeepLaneBatchTest(self.other_vehicles))
 
         return criteria
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2018 Intel Labs.
+# authors: Fabian Oboril (fabian.oboril@intel.com)
+#
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module contains the registry of all supported scenarios.
+
+Scenarios are referenced by the path of the module that implements them.
+A scenario module (and with it CARLA and py_trees) is only imported once
+the scenario is selected, so that e.g. listing all scenarios stays fast.
+"""
+
+import importlib
+
+
+# List of all supported scenarios. IMPORTANT: Key has to be the class name
+SCENARIOS = {
+    "FollowLeadingVehicle": "Scenarios.follow_leading_vehicle",
+    "FollowLeadingVehicleWithObstacle": "Scenarios.follow_leading_vehicle",
+}
+
+
+def get_scenario_names():
+    """
+    Returns the names of all supported scenarios
+    """
+    return sorted(SCENARIOS)
+
+
+def get_scenario_class_or_fail(scenario):
+    """
+    Get scenario class by scenario name
+    If scenario is not supported or not found, raise an exception
+    """
+    if scenario not in SCENARIOS:
+        raise Exception("Scenario '{}' not supported".format(scenario))
+
+    module = importlib.import_module(SCENARIOS[scenario])
+    if not hasattr(module, scenario):
+        raise Exception("No class for scenario '{}'".format(scenario))
+
+    return getattr(module, scenario)
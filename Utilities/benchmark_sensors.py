@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+"""
+Benchmark of the sensor data conversion of environment.sensors.camera.
+
+Compares the current conversion of a camera frame and of a lidar sweep into
+a pygame surface with the previous implementation, on synthetic data (no
+CARLA server needed):
+
+    python Utilities/benchmark_sensors.py --width 1280 --height 720 --points 100000
+
+Timings are the median per frame in milliseconds and depend on the machine.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pygame
+except ImportError:
+    raise RuntimeError('cannot import pygame, make sure pygame package is installed')
+
+try:
+    import numpy as np
+except ImportError:
+    raise RuntimeError('cannot import numpy, make sure numpy package is installed')
+
+from environment.sensors.camera import BGRA_MASKS
+from environment.sensors.lidar import LidarRasterizer
+
+
+def camera_previous(raw_data, width, height):
+    """
+    Conversion before the surfaces were preallocated (a new surface per frame)
+    """
+    array = np.frombuffer(raw_data, dtype=np.dtype("uint8"))
+    array = np.reshape(array, (height, width, 4))
+    array = array[:, :, :3]
+    array = array[:, :, ::-1]
+    return pygame.surfarray.make_surface(array.swapaxes(0, 1))
+
+
+def camera_current(raw_data, surface):
+    """
+    Conversion of CameraManager._parse_image (single copy into a reused surface)
+    """
+    np.frombuffer(surface.get_buffer(), dtype=np.uint8)[:] = np.frombuffer(raw_data, dtype=np.uint8)
+    return surface
+
+
+def lidar_previous(raw_data, dim):
+    """
+    Conversion before the LidarRasterizer (a new float64 image and surface per sweep)
+    """
+    points = np.frombuffer(raw_data, dtype=np.dtype('f4'))
+    points = np.reshape(points, (int(points.shape[0] / 3), 3))
+    lidar_data = np.array(points[:, :2])
+    lidar_data *= min(dim) / 100.0
+    lidar_data += (0.5 * dim[0], 0.5 * dim[1])
+    lidar_data = np.fabs(lidar_data)
+    lidar_data = lidar_data.astype(np.int32)
+    lidar_data = np.reshape(lidar_data, (-1, 2))
+    lidar_img = np.zeros((dim[0], dim[1], 3))
+    # The previous code failed for points outside of the image, these are clipped here
+    lidar_data = np.minimum(lidar_data, (dim[0] - 1, dim[1] - 1))
+    lidar_img[tuple(lidar_data.T)] = (255, 255, 255)
+    return pygame.surfarray.make_surface(lidar_img)
+
+
+def lidar_current(raw_data, rasterizer, surface):
+    """
+    Conversion of CameraManager._parse_image (raster and surface are reused)
+    """
+    pygame.surfarray.blit_array(surface, rasterizer.rasterize(raw_data))
+    return surface
+
+
+def measure(function, repetitions):
+    """
+    Median time of one call in milliseconds
+    """
+    timings = timeit.repeat(function, number=1, repeat=repetitions)
+    return 1000.0 * sorted(timings)[len(timings) // 2]
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--width', default=1280, type=int, help='image width')
+    argparser.add_argument('--height', default=720, type=int, help='image height')
+    argparser.add_argument('--points', default=100000, type=int, help='lidar points per sweep')
+    argparser.add_argument('--repetitions', default=200, type=int, help='frames per measurement')
+    args = argparser.parse_args()
+
+    rng = np.random.RandomState(0)
+    raw_image = rng.randint(0, 256, args.width * args.height * 4).astype(np.uint8).tobytes()
+    surface = pygame.Surface((args.width, args.height), 0, 32, BGRA_MASKS)
+
+    print('camera %dx%d: previous %.2f ms, current %.2f ms' % (
+        args.width, args.height,
+        measure(lambda: camera_previous(raw_image, args.width, args.height), args.repetitions),
+        measure(lambda: camera_current(raw_image, surface), args.repetitions)))
+
+    # Points within the default lidar range of 50 m
+    raw_sweep = rng.uniform(-50.0, 50.0, (args.points, 3)).astype(np.float32).tobytes()
+    dim = (args.width, args.height)
+    rasterizer = LidarRasterizer(args.width, args.height)
+    lidar_surface = pygame.Surface(dim, 0, 32, BGRA_MASKS)
+
+    print('lidar %d points: previous %.2f ms, current %.2f ms' % (
+        args.points,
+        measure(lambda: lidar_previous(raw_sweep, dim), args.repetitions),
+        measure(lambda: lidar_current(raw_sweep, rasterizer, lidar_surface), args.repetitions)))
+
+
+if __name__ == '__main__':
+    main()
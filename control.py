@@ -42,6 +42,7 @@ except ImportError:
     raise RuntimeError('cannot import numpy, make sure numpy package is installed')
 
 from utility import util
+from utility.random_source import RandomSource
 from environment.worlds.world import World
 from environment.controllers.keyboard import KeyboardControl
 from environment.displays.hud import HUD
@@ -65,7 +66,7 @@ def main(args):
             pygame.HWSURFACE | pygame.DOUBLEBUF)
 
         hud = HUD(args.width, args.height)
-        world = World(client.get_world(), hud)
+        world = World(client.get_world(), hud, client.get_server_version())
         controller = KeyboardControl(world, args.autopilot)
 
         clock = pygame.time.Clock()
@@ -100,6 +101,7 @@ def parse_args():
     logging.basicConfig(format='%(levelname)s: %(message)s', level=log_level)
 
     logging.info('listening to server %s:%s', args.host, args.port)
+    logging.info('random seed %d', RandomSource.seed(args.seed))
 
     try:
         main(args)
@@ -7,6 +7,7 @@ except ImportError:
     raise RuntimeError('cannot import pygame, make sure pygame package is installed')
 
 from utility import util
+from utility.mailbox import Mailbox
 from environment.displays.text import HelpText
 from environment.displays.text import FadingText
 
@@ -28,14 +29,21 @@ class HUD(object):
         self._show_info = True
         self._info_text = []
         self._server_clock = pygame.time.Clock()
+        # World ticks and notifications arrive on CARLA threads and are applied in tick()
+        self._world_ticks = Mailbox(Mailbox.LATEST)
+        self._pending_notifications = Mailbox(Mailbox.QUEUED)
 
     def on_world_tick(self, timestamp):
         self._server_clock.tick()
-        self.server_fps = self._server_clock.get_fps()
-        self.frame_number = timestamp.frame_count
-        self.simulation_time = timestamp.elapsed_seconds
+        self._world_ticks.post(
+            (self._server_clock.get_fps(), timestamp.elapsed_seconds), timestamp.frame_count)
 
     def tick(self, world, clock):
+        world_tick = self._world_ticks.take()
+        if world_tick is not None:
+            self.frame_number, (self.server_fps, self.simulation_time) = world_tick
+        for _, (text, color, seconds) in self._pending_notifications.take_all():
+            self._notifications.set_text(text, color, seconds=seconds)
         if not self._show_info:
             return
         t = world.vehicle.get_transform()
@@ -53,6 +61,7 @@ class HUD(object):
         self._info_text = [
             'Server:  % 16d FPS' % self.server_fps,
             'Client:  % 16d FPS' % clock.get_fps(),
+            'Camera:  % 12d dropped' % world.camera_manager.frames.overwritten,
             '',
             'Vehicle: % 20s' % util.get_actor_display_name(world.vehicle, truncate=20),
             'Map:     % 20s' % world.world.map_name,
@@ -89,10 +98,10 @@ class HUD(object):
         self._show_info = not self._show_info
 
     def notification(self, text, seconds=2.0):
-        self._notifications.set_text(text, seconds=seconds)
+        self._pending_notifications.post((text, (255, 255, 255), seconds))
 
     def error(self, text):
-        self._notifications.set_text('Error: %s' % text, (255, 0, 0))
+        self._pending_notifications.post(('Error: %s' % text, (255, 0, 0), 2.0))
 
     def render(self, display):
         if self._show_info:
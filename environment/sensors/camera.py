@@ -1,3 +1,6 @@
+import collections
+import os
+import time
 import weakref
 
 try:
@@ -16,14 +19,31 @@ try:
 except ImportError:
     raise RuntimeError('cannot import numpy, make sure numpy package is installed')
 
+from environment.sensors.lidar import LidarRasterizer
+from utility.blueprint_catalog import BlueprintCatalog
+from utility.frame_archive import FrameArchiveWriter
+from utility.mailbox import Mailbox
+from utility.writer_pool import WriterPool
+
+# Camera images are BGRA byte arrays, i.e. little-endian 32 bit pixels 0xAARRGGBB.
+# Surfaces with these (R, G, B, A) masks use the raw data as is.
+BGRA_MASKS = (0x00FF0000, 0x0000FF00, 0x000000FF, 0)
+
 
 class CameraManager(object):
     def __init__(self, parent_actor, hud):
         self.sensor = None
         self._surface = None
+        # The sensor thread draws each frame into a free surface and posts it to the
+        # mailbox, render() takes the newest one and returns the previous one to the free
+        # surfaces. In steady state three surfaces per image size are used: the one shown,
+        # the one waiting in the mailbox and the one being drawn.
+        self.frames = Mailbox(Mailbox.LATEST)
+        self._free_surfaces = collections.defaultdict(collections.deque)
         self._parent = parent_actor
         self._hud = hud
         self._recording = False
+        self._recorder = None
         self._camera_transforms = [
             carla.Transform(carla.Location(x=1.6, z=1.7)),
             carla.Transform(carla.Location(x=-5.5, z=2.8), carla.Rotation(pitch=-15))]
@@ -37,15 +57,15 @@ class CameraManager(object):
             ['sensor.camera.semantic_segmentation', cc.CityScapesPalette,
              'Camera Semantic Segmentation (CityScapes Palette)'],
             ['sensor.lidar.ray_cast', None, 'Lidar (Ray-Cast)']]
-        world = self._parent.get_world()
-        bp_library = world.get_blueprint_library()
+        catalog = BlueprintCatalog.get(self._parent.get_world())
         for item in self._sensors:
-            bp = bp_library.find(item[0])
+            bp = catalog.find(item[0])
             if item[0].startswith('sensor.camera'):
                 bp.set_attribute('image_size_x', str(hud.dim[0]))
                 bp.set_attribute('image_size_y', str(hud.dim[1]))
             item.append(bp)
         self._index = None
+        self._lidar_rasterizer = LidarRasterizer(hud.dim[0], hud.dim[1])
 
     def toggle_camera(self):
         self._transform_index = (self._transform_index + 1) % len(self._camera_transforms)
@@ -53,12 +73,18 @@ class CameraManager(object):
 
     def set_sensor(self, index, notify=True):
         index = index % len(self._sensors)
+        if self._recording and index != self._index:
+            # Each archive holds the frames of a single sensor
+            self._stop_recorder()
         needs_respawn = True if self._index is None \
             else self._sensors[index][0] != self._sensors[self._index][0]
         if needs_respawn:
             if self.sensor is not None:
                 self.sensor.destroy()
+                self._release_surface(self._surface)
                 self._surface = None
+                for surface in self.frames.clear():
+                    self._release_surface(surface)
             self.sensor = self._parent.get_world().spawn_actor(
                 self._sensors[index][-1],
                 self._camera_transforms[self._transform_index],
@@ -70,42 +96,93 @@ class CameraManager(object):
         if notify:
             self._hud.notification(self._sensors[index][2])
         self._index = index
+        if self._recording and self._recorder is None:
+            self._start_recorder()
 
     def next_sensor(self):
         self.set_sensor(self._index + 1)
 
     def toggle_recording(self):
         self._recording = not self._recording
-        self._hud.notification('Recording %s' % ('On' if self._recording else 'Off'))
+        if self._recording:
+            directory = self._start_recorder()
+            self._hud.notification('Recording to %s' % directory)
+        else:
+            statistics = self._stop_recorder()
+            self._hud.notification('Recording Off (%d frames written, %d dropped)' % (
+                statistics['written'], statistics['dropped']))
+
+    def destroy(self):
+        if self.sensor is not None:
+            self.sensor.destroy()
+            self.sensor = None
+        self._recording = False
+        self._stop_recorder()
+
+    def _start_recorder(self):
+        """
+        Start a new frame archive for the current sensor, returns its directory
+        """
+        directory = os.path.join('_out', '%s_%d_%s' % (
+            time.strftime('%Y%m%d_%H%M%S'), self._index, self._sensors[self._index][0].split('.')[-1]))
+        archive = FrameArchiveWriter(directory, metadata={
+            'sensor': self._sensors[self._index][0],
+            'description': self._sensors[self._index][2]}, unique=True)
+        self._recorder = (WriterPool(), archive)
+        return archive.directory
+
+    def _stop_recorder(self):
+        """
+        Finish the pending writes and close the archive, returns the statistics of the writer
+        """
+        recorder, self._recorder = self._recorder, None
+        if recorder is None:
+            return {'written': 0, 'dropped': 0}
+        writer, archive = recorder
+        writer.close()
+        archive.close()
+        return writer.get_statistics()
 
     def render(self, display):
+        frame = self.frames.take()
+        if frame is not None:
+            self._release_surface(self._surface)
+            self._surface = frame[1]
         if self._surface is not None:
             display.blit(self._surface, (0, 0))
 
+    def _free_surface(self, width, height):
+        try:
+            return self._free_surfaces[(width, height)].popleft()
+        except IndexError:
+            return pygame.Surface((width, height), 0, 32, BGRA_MASKS)
+
+    def _release_surface(self, surface):
+        if surface is not None:
+            self._free_surfaces[surface.get_size()].append(surface)
+
+    def _show_surface(self, surface, frame_number):
+        self._release_surface(self.frames.post(surface, frame_number))
+
     @staticmethod
     def _parse_image(weak_self, image):
         self = weak_self()
         if not self:
             return
         if self._sensors[self._index][0].startswith('sensor.lidar'):
-            points = np.frombuffer(image.raw_data, dtype=np.dtype('f4'))
-            points = np.reshape(points, (int(points.shape[0]/3), 3))
-            lidar_data = np.array(points[:, :2])
-            lidar_data *= min(self._hud.dim) / 100.0
-            lidar_data += (0.5 * self._hud.dim[0], 0.5 * self._hud.dim[1])
-            lidar_data = np.fabs(lidar_data)
-            lidar_data = lidar_data.astype(np.int32)
-            lidar_data = np.reshape(lidar_data, (-1, 2))
-            lidar_img_size = (self._hud.dim[0], self._hud.dim[1], 3)
-            lidar_img = np.zeros(lidar_img_size)
-            lidar_img[tuple(lidar_data.T)] = (255, 255, 255)
-            self._surface = pygame.surfarray.make_surface(lidar_img)
+            lidar_img = self._lidar_rasterizer.rasterize(image.raw_data)
+            surface = self._free_surface(self._hud.dim[0], self._hud.dim[1])
+            pygame.surfarray.blit_array(surface, lidar_img)
+            self._show_surface(surface, image.frame_number)
         else:
             image.convert(self._sensors[self._index][1])
-            array = np.frombuffer(image.raw_data, dtype=np.dtype("uint8"))
-            array = np.reshape(array, (image.height, image.width, 4))
-            array = array[:, :, :3]
-            array = array[:, :, ::-1]
-            self._surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
-        if self._recording:
-            image.save_to_disk('_out/%08d' % image.frame_number)
+            # Single copy of the raw BGRA data into a free surface, no conversion
+            surface = self._free_surface(image.width, image.height)
+            np.frombuffer(surface.get_buffer(), dtype=np.uint8)[:] = np.frombuffer(
+                image.raw_data, dtype=np.uint8)
+            self._show_surface(surface, image.frame_number)
+        recorder = self._recorder
+        if self._recording and recorder is not None:
+            writer, archive = recorder
+            # Discarded if the recording was stopped meanwhile
+            writer.submit(archive.add_image, image)
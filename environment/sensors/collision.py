@@ -1,26 +1,31 @@
-import carla
 import weakref
 import collections
 import math
 
 from utility import util
+from utility.mailbox import Mailbox
+from utility.sensor_hub import SensorHub
 
 
 class CollisionSensor(object):
     def __init__(self, parent_actor, hud):
-        self.sensor = None
-        self._history = []
+        self._history = collections.deque(maxlen=4000)
+        # Collisions arrive on the sensor thread, the history is only updated on read
+        self._collisions = Mailbox(Mailbox.QUEUED, maxlen=4000)
         self._parent = parent_actor
         self._hud = hud
-        world = self._parent.get_world()
-        bp = world.get_blueprint_library().find('sensor.other.collision')
-        self.sensor = world.spawn_actor(bp, carla.Transform(), attach_to=self._parent)
         # We need to pass the lambda a weak reference to self to avoid circular
         # reference.
         weak_self = weakref.ref(self)
-        self.sensor.listen(lambda event: CollisionSensor._on_collision(weak_self, event))
+        self._subscription = SensorHub.subscribe(
+            self._parent, 'sensor.other.collision',
+            lambda event: CollisionSensor._on_collision(weak_self, event))
+
+    def destroy(self):
+        self._subscription.unsubscribe()
 
     def get_collision_history(self):
+        self._history.extend(record for _, record in self._collisions.take_all())
         history = collections.defaultdict(int)
         for frame, intensity in self._history:
             history[frame] += intensity
@@ -35,7 +40,5 @@ class CollisionSensor(object):
         self._hud.notification('Collision with %r' % actor_type)
         impulse = event.normal_impulse
         intensity = math.sqrt(impulse.x**2 + impulse.y**2 + impulse.z**2)
-        self._history.append((event.frame_number, intensity))
-        if len(self._history) > 4000:
-            self._history.pop(0)
+        self._collisions.post((event.frame_number, intensity), event.frame_number)
 
@@ -1,19 +1,21 @@
-import carla
 import weakref
 
+from utility.sensor_hub import SensorHub
+
 
 class LaneInvasionSensor(object):
     def __init__(self, parent_actor, hud):
-        self.sensor = None
         self._parent = parent_actor
         self._hud = hud
-        world = self._parent.get_world()
-        bp = world.get_blueprint_library().find('sensor.other.lane_detector')
-        self.sensor = world.spawn_actor(bp, carla.Transform(), attach_to=self._parent)
         # We need to pass the lambda a weak reference to self to avoid circular
         # reference.
         weak_self = weakref.ref(self)
-        self.sensor.listen(lambda event: LaneInvasionSensor._on_invasion(weak_self, event))
+        self._subscription = SensorHub.subscribe(
+            self._parent, 'sensor.other.lane_detector',
+            lambda event: LaneInvasionSensor._on_invasion(weak_self, event))
+
+    def destroy(self):
+        self._subscription.unsubscribe()
 
     @staticmethod
     def _on_invasion(weak_self, event):
@@ -0,0 +1,109 @@
+try:
+    import numpy as np
+except ImportError:
+    raise RuntimeError('cannot import numpy, make sure numpy package is installed')
+
+
+class LidarRasterizer(object):
+
+    """
+        Projects lidar sweeps into a top-down image and into a bird's-eye occupancy grid.
+
+        The lidar points (x, y, z float32 triples in the raw data) are scaled so that
+        lidar_range meters around the sensor fill the smaller image dimension. Points
+        outside of the image are dropped. The image is a preallocated (width, height, 3)
+        uint8 array (pygame.surfarray layout), which is reused for every sweep.
+
+        Modes:
+        - 'points': Hit cells are white
+        - 'height': Hit cells are colored by the highest point, from blue (z_range[0])
+          to yellow (z_range[1])
+        - 'density': Brightness grows with the number of points in the cell
+          (density_step per point)
+    """
+
+    MODES = ('points', 'height', 'density')
+
+    def __init__(self, width, height, lidar_range=50.0, mode='points', z_range=(-2.5, 2.5),
+                 density_step=64):
+        if mode not in LidarRasterizer.MODES:
+            raise ValueError("Unknown lidar rasterizer mode '{}'".format(mode))
+        self.width = width
+        self.height = height
+        self.lidar_range = lidar_range
+        self.mode = mode
+        self.z_range = z_range
+        self.density_step = density_step
+        self.image = np.zeros((width, height, 3), dtype=np.uint8)
+        self._grids = dict()
+
+    def rasterize(self, raw_data):
+        """
+        Draw a sweep (carla.LidarMeasurement.raw_data) into the image and return it
+        """
+        points = self._points(raw_data)
+        scale = min(self.width, self.height) / (2.0 * self.lidar_range)
+        cells, inside = self._cells(points, scale, (0.5 * self.width, 0.5 * self.height),
+                                    self.width, self.height)
+
+        pixels = self.image.reshape(-1, 3)
+        pixels.fill(0)
+        if self.mode == 'points':
+            pixels[cells] = 255
+        elif self.mode == 'height':
+            z_min, z_max = self.z_range
+            heights = points[inside, 2]
+            # Fancy-index assignment keeps the last value, i.e. the highest point
+            order = np.argsort(heights)
+            level = np.clip((heights[order] - z_min) * (255.0 / (z_max - z_min)), 0, 255)
+            level = level.astype(np.uint8)
+            cells = cells[order]
+            pixels[cells, 0] = level
+            pixels[cells, 1] = level
+            pixels[cells, 2] = 255 - level
+        else:
+            counts = np.bincount(cells, minlength=self.width * self.height)
+            brightness = np.minimum(counts * self.density_step, 255).astype(np.uint8)
+            pixels[:] = brightness[:, None]
+        return self.image
+
+    def occupancy_grid(self, raw_data, cell_size=0.5, z_range=None):
+        """
+        Returns a square (n, n) uint8 grid covering lidar_range meters around the sensor,
+        1 for cells with at least one point (within z_range, if given), else 0.
+        grid[i, j] is the cell centered at x = (i + 0.5 - n / 2) * cell_size,
+        y = (j + 0.5 - n / 2) * cell_size in sensor coordinates.
+        The returned array is reused for the next call with the same cell size.
+        """
+        size = int(np.ceil(2.0 * self.lidar_range / cell_size))
+        grid = self._grids.get(size)
+        if grid is None:
+            grid = np.zeros((size, size), dtype=np.uint8)
+            self._grids[size] = grid
+
+        points = self._points(raw_data)
+        if z_range is not None:
+            points = points[(points[:, 2] >= z_range[0]) & (points[:, 2] <= z_range[1])]
+        cells, _ = self._cells(points, 1.0 / cell_size, (0.5 * size, 0.5 * size), size, size)
+
+        grid.fill(0)
+        grid.reshape(-1)[cells] = 1
+        return grid
+
+    @staticmethod
+    def _points(raw_data):
+        """
+        (n, 3) float32 view of the raw data (no copy)
+        """
+        return np.frombuffer(raw_data, dtype=np.float32).reshape(-1, 3)
+
+    @staticmethod
+    def _cells(points, scale, center, width, height):
+        """
+        Returns the flat indices (into a (width, height) raster) of the cells hit by the
+        points inside the raster, and the mask of these points
+        """
+        columns = np.floor(points[:, 0] * scale + center[0]).astype(np.int64)
+        rows = np.floor(points[:, 1] * scale + center[1]).astype(np.int64)
+        inside = (columns >= 0) & (columns < width) & (rows >= 0) & (rows < height)
+        return columns[inside] * height + rows[inside], inside
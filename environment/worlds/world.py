@@ -1,5 +1,3 @@
-import random
-
 try:
     import carla
 except ImportError:
@@ -10,16 +8,23 @@ from environment.sensors.lane_invasion import LaneInvasionSensor
 from environment.sensors.camera import CameraManager
 
 from utility import util
+from utility.blueprint_catalog import BlueprintCatalog
+from utility.map_cache import MapCache
+from utility.random_source import RandomSource
 
 
 class World(object):
-    def __init__(self, carla_world, hud):
+    def __init__(self, carla_world, hud, server_version=None):
         self.world = carla_world
         self.hud = hud
         self.world.on_tick(hud.on_world_tick)
         blueprint = self._get_random_blueprint()
-        spawn_points = self.world.get_map().get_spawn_points()
-        spawn_point = random.choice(spawn_points) if spawn_points else carla.Transform()
+        if server_version:
+            spawn_points = MapCache.get(self.world, server_version).get_spawn_points()
+        else:
+            # The map cache is keyed by the server version, without it the cache could be stale
+            spawn_points = self.world.get_map().get_spawn_points()
+        spawn_point = RandomSource.get_generator().choice(spawn_points) if spawn_points else carla.Transform()
         self.vehicle = self.world.spawn_actor(blueprint, spawn_point)
         self.collision_sensor = CollisionSensor(self.vehicle, self.hud)
         self.lane_invasion_sensor = LaneInvasionSensor(self.vehicle, self.hud)
@@ -62,18 +67,15 @@ class World(object):
         self.hud.render(display)
 
     def destroy(self):
-        actors = [
-            self.camera_manager.sensor,
-            self.collision_sensor.sensor,
-            self.lane_invasion_sensor.sensor,
-            self.vehicle]
-        for actor in actors:
-            if actor is not None:
-                actor.destroy()
+        self.collision_sensor.destroy()
+        self.lane_invasion_sensor.destroy()
+        self.camera_manager.destroy()
+        if self.vehicle is not None:
+            self.vehicle.destroy()
 
     def _get_random_blueprint(self):
-        bp = random.choice(self.world.get_blueprint_library().filter('vehicle'))
+        bp = BlueprintCatalog.get(self.world).choice('vehicle')
         if bp.has_attribute('color'):
-            color = random.choice(bp.get_attribute('color').recommended_values)
+            color = RandomSource.get_generator().choice(bp.get_attribute('color').recommended_values)
             bp.set_attribute('color', color)
         return bp
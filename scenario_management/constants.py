@@ -1,7 +1,5 @@
 import py_trees
 
-from scenario_management.scenario_definition.scenarios import scenario as sc
-
 
 class STATUS:
     RUNNING = py_trees.common.Status.RUNNING
@@ -14,7 +12,3 @@ class POLICY:
     SUCCESS_ON_ONE = py_trees.common.ParallelPolicy.SUCCESS_ON_ONE
     SUCCESS_ON_ALL = py_trees.common.ParallelPolicy.SUCCESS_ON_ALL
 
-
-SCENARIOS = {
-    "LVD": sc.LVD
-}
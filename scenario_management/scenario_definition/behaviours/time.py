@@ -1,5 +1,6 @@
 import py_trees
 from scenario_management.scenario_manager.tracker import Tracker
+from utility.log_pipeline import lazy_debug
 
 TOLERANCE = 0.001
 
@@ -18,7 +19,7 @@ class InTimeToArrivalToLocation(py_trees.behaviour.Behaviour):
         Setup parameters
         """
         super(InTimeToArrivalToLocation, self).__init__(name)
-        self.logger.debug("%s.__init__()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.__init__()", self.__class__.__name__)
         self._vehicle = vehicle
         self._time = time
         self._target_location = location
@@ -45,8 +46,8 @@ class InTimeToArrivalToLocation(py_trees.behaviour.Behaviour):
         if time_to_arrival < self._time:
             new_status = py_trees.common.Status.SUCCESS
 
-        self.logger.debug("%s.update()[%s->%s]" %
-                          (self.__class__.__name__, self.status, new_status))
+        lazy_debug(self.logger, "%s.update()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
 
         return new_status
 
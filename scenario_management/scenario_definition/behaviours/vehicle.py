@@ -61,11 +61,12 @@ class DrivenDistance(py_trees.behaviour.Behaviour):
         super(DrivenDistance, self).__init__(name)
         self._target_distance = distance
         self._distance = 0
-        self._location = None
+        self._start_odometer = 0.0
         self._vehicle = vehicle
 
     def initialise(self):
-        self._location = Tracker.get_location(self._vehicle)
+        # The odometer starts at 0 once the state of the vehicle was read
+        self._start_odometer = Tracker.get_odometer(self._vehicle) or 0.0
         super(DrivenDistance, self).initialise()
 
     def update(self):
@@ -74,9 +75,10 @@ class DrivenDistance(py_trees.behaviour.Behaviour):
         """
         new_status = py_trees.common.Status.RUNNING
 
-        new_location = Tracker.get_location(self._vehicle)
-        self._distance += self._location.distance(new_location)
-        self._location = new_location
+        odometer = Tracker.get_odometer(self._vehicle)
+        if odometer is None:
+            return new_status
+        self._distance = odometer - self._start_odometer
 
         if self._distance > self._target_distance:
             new_status = py_trees.common.Status.SUCCESS
@@ -2,8 +2,40 @@
 
 class Scenario(object):
 
+    """
+    Base class for all scenarios executed by the Orchestrator
+
+    Important parameters:
+    - name: Name of the scenario
+    - timeout: Timeout of the scenario in seconds (game time)
+    - ego_vehicle: Ego vehicle actor, spawned by generate_actors()
+    - other_vehicles: List of all other vehicle actors, spawned by generate_actors()
+    - terminate_on_failure: End the scenario on the first failure of a criterion, or
+                            as soon as the results of all required criteria are final
+    """
+
+    name = None
+    timeout = 60
+    terminate_on_failure = False
+
+    def __init__(self):
+        # Per instance, a list shared by all scenarios would collect the actors of all of them
+        self.ego_vehicle = None
+        self.other_vehicles = []
+
+    def generate_actors(self, world):
+        raise NotImplementedError("Must implement method to spawn actors")
+
     def generate_scenario_behaviour(self):
         raise NotImplementedError("Must implement method to generate behaviour")
 
     def generate_test_conditions(self):
         raise NotImplementedError("Must implement method to generate test conditions")
+
+    def destroy_actors(self):
+        """
+        Remove all actors of the scenario from the world
+        """
+        for actor in [self.ego_vehicle] + list(self.other_vehicles):
+            if actor is not None and actor.is_alive:
+                actor.destroy()
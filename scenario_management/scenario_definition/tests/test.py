@@ -1,9 +1,11 @@
 import py_trees
 import weakref
-import carla
 
 from scenario_management.scenario_manager.tracker import Tracker
 from scenario_management.scenario_manager.time import GameTime
+from utility.event_queue import EventQueue, collision_record, lane_invasion_record
+from utility.sensor_hub import SensorHub
+from utility.log_pipeline import lazy_debug
 
 
 class Criterion(py_trees.behaviour.Behaviour):
@@ -20,6 +22,8 @@ class Criterion(py_trees.behaviour.Behaviour):
     - actual_value: Actual result after running the scenario
     - test_status: Used to access the result of the criterion
     - optional: Indicates if a criterion is optional (not used for overall analysis)
+    - final: The result cannot change anymore (e.g. after the first collision).
+             Final criteria are no longer updated, their result is frozen.
     """
 
     def __init__(self,
@@ -29,7 +33,7 @@ class Criterion(py_trees.behaviour.Behaviour):
                  expected_value_acceptable=None,
                  optional=False):
         super(Criterion, self).__init__(name)
-        self.logger.debug("%s.__init__()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.__init__()", self.__class__.__name__)
         self._terminate_on_failure = False
 
         self.name = name
@@ -39,17 +43,36 @@ class Criterion(py_trees.behaviour.Behaviour):
         self.expected_value_acceptable = expected_value_acceptable
         self.actual_value = 0
         self.optional = optional
+        self.final = False
+
+    @property
+    def terminate_on_failure(self):
+        return self._terminate_on_failure
+
+    @terminate_on_failure.setter
+    def terminate_on_failure(self, terminate_on_failure):
+        self._terminate_on_failure = terminate_on_failure
+
+    def tick(self):
+        """
+        Skip the update of final criteria
+        """
+        if self.final:
+            yield self
+            return
+        for node in super(Criterion, self).tick():
+            yield node
 
     def setup(self, unused_timeout=15):
-        self.logger.debug("%s.setup()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.setup()", self.__class__.__name__)
         return True
 
     def initialise(self):
-        self.logger.debug("%s.initialise()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.initialise()", self.__class__.__name__)
 
     def terminate(self, new_status):
-        self.logger.debug("%s.terminate()[%s->%s]" % (
-            self.__class__.__name__, self.status, new_status))
+        lazy_debug(self.logger, "%s.terminate()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
 
 
 class MaxVelocityTest(Criterion):
@@ -80,14 +103,15 @@ class MaxVelocityTest(Criterion):
 
         if velocity > self.expected_value_success:
             self.test_status = "FAILURE"
+            self.final = True
         else:
             self.test_status = "SUCCESS"
 
         if self._terminate_on_failure and (self.test_status == "FAILURE"):
             new_status = py_trees.common.Status.FAILURE
 
-        self.logger.debug("%s.update()[%s->%s]" %
-                          (self.__class__.__name__, self.status, new_status))
+        lazy_debug(self.logger, "%s.update()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
 
         return new_status
 
@@ -103,14 +127,25 @@ class CollisionTest(Criterion):
         Construction with sensor setup
         """
         super(CollisionTest, self).__init__(name, vehicle, 0, None, optional)
-        self.logger.debug("%s.__init__()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.__init__()", self.__class__.__name__)
+
+        self.events = []
+        self._event_queue = EventQueue()
 
-        world = self.vehicle.get_world()
-        blueprint = world.get_blueprint_library().find('sensor.other.collision')
-        self._collision_sensor = world.spawn_actor(
-            blueprint, carla.Transform(), attach_to=self.vehicle)
-        self._collision_sensor.listen(
-            lambda event: self._count_collisions(weakref.ref(self), event))
+        weak_self = weakref.ref(self)
+        self._collision_subscription = SensorHub.subscribe(
+            self.vehicle, 'sensor.other.collision',
+            lambda event: CollisionTest._count_collisions(weak_self, event))
+
+    def initialise(self):
+        """
+        Discard collisions that happened while the scenario was prepared
+        """
+        self._event_queue.drain()
+        self._event_queue.take_dropped()
+        self.events = []
+        self.actual_value = 0
+        super(CollisionTest, self).initialise()
 
     def update(self):
         """
@@ -118,16 +153,23 @@ class CollisionTest(Criterion):
         """
         new_status = py_trees.common.Status.RUNNING
 
+        events = self._event_queue.drain()
+        self.events.extend(events)
+        # Records dropped from a full queue were events as well
+        self.actual_value += len(events) + self._event_queue.take_dropped()
+
         if self.actual_value > 0:
             self.test_status = "FAILURE"
+            self.final = True
+            self._collision_subscription.unsubscribe()
         else:
             self.test_status = "SUCCESS"
 
         if self._terminate_on_failure and (self.test_status == "FAILURE"):
             new_status = py_trees.common.Status.FAILURE
 
-        self.logger.debug("%s.update()[%s->%s]" %
-                          (self.__class__.__name__, self.status, new_status))
+        lazy_debug(self.logger, "%s.update()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
 
         return new_status
 
@@ -135,20 +177,21 @@ class CollisionTest(Criterion):
         """
         Cleanup sensor
         """
-        if self._collision_sensor is not None:
-            self._collision_sensor.destroy()
-        self._collision_sensor = None
+        self._collision_subscription.unsubscribe()
+        # Count the events that arrived after the last tick
+        if not self.final:
+            self.update()
         super(CollisionTest, self).terminate(new_status)
 
     @staticmethod
     def _count_collisions(weak_self, event):
         """
-        Callback to update collision count
+        Callback to queue the collision, counted on the next tick
         """
         self = weak_self()
         if not self:
             return
-        self.actual_value += 1
+        self._event_queue.put(collision_record(event))
 
 
 class KeepLaneTest(Criterion):
@@ -162,15 +205,25 @@ class KeepLaneTest(Criterion):
         Construction with sensor setup
         """
         super(KeepLaneTest, self).__init__(name, vehicle, 0, None, optional)
-        self.logger.debug("%s.__init__()" % (self.__class__.__name__))
+        lazy_debug(self.logger, "%s.__init__()", self.__class__.__name__)
 
-        world = self.vehicle.get_world()
-        blueprint = world.get_blueprint_library().find(
-            'sensor.other.lane_detector')
-        self._lane_sensor = world.spawn_actor(
-            blueprint, carla.Transform(), attach_to=self.vehicle)
-        self._lane_sensor.listen(
-            lambda event: self._count_lane_invasion(weakref.ref(self), event))
+        self.events = []
+        self._event_queue = EventQueue()
+
+        weak_self = weakref.ref(self)
+        self._lane_subscription = SensorHub.subscribe(
+            self.vehicle, 'sensor.other.lane_detector',
+            lambda event: KeepLaneTest._count_lane_invasion(weak_self, event))
+
+    def initialise(self):
+        """
+        Discard lane invasions that happened while the scenario was prepared
+        """
+        self._event_queue.drain()
+        self._event_queue.take_dropped()
+        self.events = []
+        self.actual_value = 0
+        super(KeepLaneTest, self).initialise()
 
     def update(self):
         """
@@ -178,16 +231,23 @@ class KeepLaneTest(Criterion):
         """
         new_status = py_trees.common.Status.RUNNING
 
+        events = self._event_queue.drain()
+        self.events.extend(events)
+        # Records dropped from a full queue were events as well
+        self.actual_value += len(events) + self._event_queue.take_dropped()
+
         if self.actual_value > 0:
             self.test_status = "FAILURE"
+            self.final = True
+            self._lane_subscription.unsubscribe()
         else:
             self.test_status = "SUCCESS"
 
         if self._terminate_on_failure and (self.test_status == "FAILURE"):
             new_status = py_trees.common.Status.FAILURE
 
-        self.logger.debug("%s.update()[%s->%s]" %
-                          (self.__class__.__name__, self.status, new_status))
+        lazy_debug(self.logger, "%s.update()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
 
         return new_status
 
@@ -195,20 +255,21 @@ class KeepLaneTest(Criterion):
         """
         Cleanup sensor
         """
-        if self._lane_sensor is not None:
-            self._lane_sensor.destroy()
-        self._lane_sensor = None
+        self._lane_subscription.unsubscribe()
+        # Count the events that arrived after the last tick
+        if not self.final:
+            self.update()
         super(KeepLaneTest, self).terminate(new_status)
 
     @staticmethod
     def _count_lane_invasion(weak_self, event):
         """
-        Callback to update lane invasion count
+        Callback to queue the lane invasion, counted on the next tick
         """
         self = weak_self()
         if not self:
             return
-        self.actual_value += 1
+        self._event_queue.put(lane_invasion_record(event))
 
 
 class AverageVelocityTest(Criterion):
@@ -230,11 +291,10 @@ class AverageVelocityTest(Criterion):
                                                   avg_velocity_success,
                                                   avg_velocity_acceptable,
                                                   optional)
-        self._last_location = None
-        self._distance = 0.0
+        self._start_odometer = 0.0
 
     def initialise(self):
-        self._last_location = Tracker.get_location(self.vehicle)
+        self._start_odometer = Tracker.get_odometer(self.vehicle) or 0.0
         super(AverageVelocityTest, self).initialise()
 
     def update(self):
@@ -246,21 +306,14 @@ class AverageVelocityTest(Criterion):
         if self.vehicle is None:
             return new_status
 
-        location = Tracker.get_location(self.vehicle)
+        odometer = Tracker.get_odometer(self.vehicle)
 
-        if location is None:
+        if odometer is None:
             return new_status
 
-        if self._last_location is None:
-            self._last_location = location
-            return new_status
-
-        self._distance += location.distance(self._last_location)
-        self._last_location = location
-
         elapsed_time = GameTime.get_time()
         if elapsed_time > 0.0:
-            self.actual_value = self._distance / elapsed_time
+            self.actual_value = (odometer - self._start_odometer) / elapsed_time
 
         if self.actual_value > self.expected_value_success:
             self.test_status = "SUCCESS"
@@ -273,7 +326,169 @@ class AverageVelocityTest(Criterion):
         if self._terminate_on_failure and (self.test_status == "FAILURE"):
             new_status = py_trees.common.Status.FAILURE
 
-        self.logger.debug("%s.update()[%s->%s]" %
-                          (self.__class__.__name__, self.status, new_status))
+        lazy_debug(self.logger, "%s.update()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
+
+        return new_status
+
+
+class ProximityTest(Criterion):
+
+    """
+    Base class for criteria on the proximity of the vehicle to all other
+    tracked vehicles (see Tracker.get_relative_motion()).
+
+    The criteria keep the minimum of a measure (e.g. time to collision) as
+    actual_value. Values beyond the horizon are not relevant and capped to it.
+    A criterion succeeds as long as the minimum is at least the expected value.
+
+    Important parameters:
+    - lane_width: Vehicles with a lateral offset below lane_width / 2 are
+                  considered to be in the lane of the vehicle
+    """
+
+    horizon = 10.0
+    lane_width = 3.5
+
+    def __init__(self,
+                 name,
+                 vehicle,
+                 expected_value_success,
+                 expected_value_acceptable=None,
+                 optional=False):
+        super(ProximityTest, self).__init__(
+            name, vehicle, expected_value_success, expected_value_acceptable, optional)
+        self.actual_value = self.horizon
+
+    def initialise(self):
+        self.actual_value = self.horizon
+        super(ProximityTest, self).initialise()
+
+    def update(self):
+        """
+        Check the minimum of the measure
+        """
+        new_status = py_trees.common.Status.RUNNING
+
+        if self.vehicle is None:
+            return new_status
+
+        self.actual_value = min(self.actual_value, self._measure())
+
+        if self.actual_value >= self.expected_value_success:
+            self.test_status = "SUCCESS"
+        elif (self.expected_value_acceptable is not None and
+              self.actual_value >= self.expected_value_acceptable):
+            self.test_status = "ACCEPTABLE"
+        else:
+            # The minimum can only decrease further
+            self.test_status = "FAILURE"
+            self.final = True
+
+        if self._terminate_on_failure and (self.test_status == "FAILURE"):
+            new_status = py_trees.common.Status.FAILURE
+
+        lazy_debug(self.logger, "%s.update()[%s->%s]",
+                   self.__class__.__name__, self.status, new_status)
 
         return new_status
+
+    def _measure(self):
+        """
+        Pure virtual function returning the measure for the current tick
+        """
+        raise NotImplementedError(
+            "This function is re-implemented by all proximity tests"
+            "If this error becomes visible the class hierarchy is somehow broken")
+
+    def _in_lane(self, lateral):
+        """
+        Returns a mask of the vehicles within the lane of the vehicle
+        """
+        return abs(lateral) < 0.5 * self.lane_width
+
+    def _gap_ahead(self, longitudinal, lateral):
+        """
+        Returns the longitudinal gap to the closest vehicle ahead within the lane
+        """
+        ahead = (longitudinal > 0.0) & self._in_lane(lateral)
+        if not ahead.any():
+            return float('inf')
+        return float(longitudinal[ahead].min())
+
+
+class TimeToCollisionTest(ProximityTest):
+
+    """
+    This class contains an atomic test for the minimum time to collision
+    with any other vehicle in the same lane (distance / closing speed of
+    approaching vehicles)
+    """
+
+    horizon = 10.0  # in seconds
+
+    def __init__(self,
+                 vehicle,
+                 min_ttc_success,
+                 min_ttc_acceptable=None,
+                 optional=False,
+                 name="CheckTimeToCollision"):
+        super(TimeToCollisionTest, self).__init__(
+            name, vehicle, min_ttc_success, min_ttc_acceptable, optional)
+
+    def _measure(self):
+        _, lateral, distance, closing_speed = Tracker.get_relative_motion(self.vehicle)
+        approaching = (closing_speed > 0.0) & self._in_lane(lateral)
+        if not approaching.any():
+            return self.horizon
+        return min(float((distance[approaching] / closing_speed[approaching]).min()), self.horizon)
+
+
+class HeadwayTest(ProximityTest):
+
+    """
+    This class contains an atomic test for the minimum time headway, i.e.
+    the time until the vehicle reaches the position of the vehicle ahead
+    """
+
+    horizon = 10.0          # in seconds
+    min_velocity = 0.1      # Below this velocity there is no headway [m/s]
+
+    def __init__(self,
+                 vehicle,
+                 min_headway_success,
+                 min_headway_acceptable=None,
+                 optional=False,
+                 name="CheckHeadway"):
+        super(HeadwayTest, self).__init__(
+            name, vehicle, min_headway_success, min_headway_acceptable, optional)
+
+    def _measure(self):
+        velocity = Tracker.get_velocity(self.vehicle)
+        if velocity < self.min_velocity:
+            return self.horizon
+        longitudinal, lateral, _, _ = Tracker.get_relative_motion(self.vehicle)
+        return min(self._gap_ahead(longitudinal, lateral) / velocity, self.horizon)
+
+
+class FollowingGapTest(ProximityTest):
+
+    """
+    This class contains an atomic test for the minimum distance to the
+    vehicle ahead in the same lane
+    """
+
+    horizon = 100.0  # in meters
+
+    def __init__(self,
+                 vehicle,
+                 min_gap_success,
+                 min_gap_acceptable=None,
+                 optional=False,
+                 name="CheckFollowingGap"):
+        super(FollowingGapTest, self).__init__(
+            name, vehicle, min_gap_success, min_gap_acceptable, optional)
+
+    def _measure(self):
+        longitudinal, lateral, _, _ = Tracker.get_relative_motion(self.vehicle)
+        return min(self._gap_ahead(longitudinal, lateral), self.horizon)
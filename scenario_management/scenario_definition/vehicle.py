@@ -1,8 +1,8 @@
 import sys
-import random
 
 import carla
 from scenario_management.scenario_manager.tracker import Tracker
+from utility.blueprint_catalog import BlueprintCatalog
 
 
 class Vehicle(object):
@@ -18,10 +18,8 @@ class Vehicle(object):
         self._spawn_point = spawn_point
 
     def spawn(self):
-        blueprints = self._world.get_blueprint_library()
-
         # If you give it the exact name, then obviously not going to be a random selection
-        blueprint = random.choice(blueprints.filter(self._vehicle_model))
+        blueprint = BlueprintCatalog.get(self._world).choice(self._vehicle_model)
         blueprint.set_attribute('role_name', self._type)
 
         location = carla.Location(x=self._spawn_point.x, y=self._spawn_point.y, z=self._spawn_point.z)
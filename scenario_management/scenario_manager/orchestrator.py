@@ -1,31 +1,350 @@
+"""
+    The Orchestrator executes scenarios on a CARLA world.
+
+    Each scenario passes through the phases setup -> start -> update (every tick) -> end ->
+    metrics. When running in parallel the phases of consecutive scenarios are pipelined:
+    while scenario N is running, the tree and the actors of scenario N+1 are prepared, and
+    while N+1 is running, the metrics of N are generated in the background. That way the
+    server does not idle between two scenarios.
+"""
+
+import logging
+import os
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import py_trees
+
+import scenario_management.constants as ct
+from scenario_management.scenario_manager.time import GameTime, TimeOut
+from scenario_management.scenario_manager.tracker import Tracker
+from utility.random_source import RandomSource
+from utility.telemetry import TelemetryRecorder
+
+
+class ScenarioRun(object):
+
+    """
+        Bookkeeping of a single scenario passing through the Orchestrator
+    """
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.scenario_tree = None
+        self.criteria = []
+        self.timeout_node = None
+        self.seed = RandomSource.get_seed()
+        self.telemetry = None
+
+        self.start_system_time = None
+        self.end_system_time = None
+        self.start_game_time = 0.0
+        self.end_game_time = 0.0
 
 
 class Orchestrator(object):
+
+    """
+        Orchestrator consists of the phases required to set up, run and evaluate scenarios:
+
+            1. setup_scenario: Spawn the actors and build the py_trees tree
+            2. start_scenario: Make the scenario the one ticked by update_scenario
+            3. update_scenario: Callback for world.on_tick(), ticks the running scenario
+            4. end_scenario: Terminate the tree and stop tracking its vehicles
+            5. generate_metrics: Evaluate the test criteria of a finished scenario
+
+        run_scenarios() chains these phases for a list of scenarios. With run_in_parallel
+        the actors of the next scenario are spawned while the current one is running, so
+        consecutive scenarios must not use overlapping spawn points.
+
+        If a telemetry_directory is given, the state of all vehicles of a scenario is
+        recorded on every tick (see utility.telemetry).
+
+        An exception raised while ticking a scenario is re-raised by run_scenarios(), which
+        also raises a RuntimeError if the world does not tick for tick_timeout seconds.
+    """
+
     scenario_tree = None
     ego_vehicle = None
     other_vehicles = None
 
-    def __init__(self, world):
+    def __init__(self, world, run_in_parallel=False, telemetry_directory=None, tick_timeout=10.0):
         self._world = world
-        self._run_in_parallel = False
+        self._run_in_parallel = run_in_parallel
+        self._telemetry_directory = telemetry_directory
+        self._tick_timeout = tick_timeout
         self._thread_lock = threading.Lock()
+        self._current_run = None
+        self._timestamp_last_run = 0.0
+        self._last_tick_system_time = 0.0
+        self._tick_error = None
+        self._scenario_finished = threading.Event()
+        self._setup_executor = None
+        self._metrics_executor = None
         world.on_tick(self.update_scenario)
 
-    def setup_scenario(self):
-        pass
+    def run_scenarios(self, scenarios):
+        """
+        Run all given scenarios one after the other and return their metrics.
+        If a scenario fails with an exception, the actors of the running and of the
+        already prepared scenario are removed before the exception is raised.
+        """
+        if not self._run_in_parallel:
+            metrics = []
+            for scenario in scenarios:
+                scenario_run = self.setup_scenario(scenario)
+                self.start_scenario(scenario_run)
+                try:
+                    self._wait_for_scenario()
+                except Exception:
+                    self._abort_scenario(scenario, scenario_run)
+                    raise
+                self.end_scenario(scenario_run)
+                metrics.append(self.generate_metrics(scenario_run))
+            return metrics
+
+        self._setup_executor = ThreadPoolExecutor(max_workers=1)
+        self._metrics_executor = ThreadPoolExecutor(max_workers=1)
+        metrics_futures = []
+        running_run = None
+        next_setup = None   # (scenario, future of its setup)
+        try:
+            if scenarios:
+                next_setup = (scenarios[0], self._setup_executor.submit(self.setup_scenario, scenarios[0]))
+            for i in range(len(scenarios)):
+                scenario_run = next_setup[1].result()
+                next_setup = None
+                self.start_scenario(scenario_run)
+                running_run = scenario_run
+
+                # Prepare the next scenario while this one is running
+                if i + 1 < len(scenarios):
+                    next_setup = (scenarios[i + 1],
+                                  self._setup_executor.submit(self.setup_scenario, scenarios[i + 1]))
+
+                self._wait_for_scenario()
+                self.end_scenario(scenario_run)
+                running_run = None
+                metrics_futures.append(self._metrics_executor.submit(self.generate_metrics, scenario_run))
+
+            return [future.result() for future in metrics_futures]
+        finally:
+            if running_run is not None:
+                self._abort_scenario(running_run.scenario, running_run)
+            if next_setup is not None:
+                scenario, future = next_setup
+                try:
+                    pending_run = future.result()
+                except Exception:  # pylint: disable=broad-except
+                    # Raised by run_scenarios already, or superseded by the error of the running scenario
+                    pending_run = None
+                self._abort_scenario(scenario, pending_run)
+            self.shutdown()
+
+    def setup_scenario(self, scenario):
+        """
+        Spawn the actors of the scenario and build its tree
+        """
+        scenario.generate_actors(self._world)
+        Tracker.track_vehicles([scenario.ego_vehicle] + list(scenario.other_vehicles))
+
+        scenario_run = ScenarioRun(scenario)
+        self.__generate_scenario_tree(scenario_run)
+
+        return scenario_run
+
+    def start_scenario(self, scenario_run):
+        """
+        Hand the prepared scenario to the tick callback
+        """
+        with self._thread_lock:
+            GameTime.restart()
+            self._scenario_finished.clear()
+            self._tick_error = None
+            self._last_tick_system_time = time.time()
+
+            self.scenario_tree = scenario_run.scenario_tree
+            self.ego_vehicle = scenario_run.scenario.ego_vehicle
+            self.other_vehicles = scenario_run.scenario.other_vehicles
+
+            scenario_run.start_system_time = time.time()
+            scenario_run.start_game_time = GameTime.get_time()
+
+            if self._telemetry_directory is not None:
+                scenario = scenario_run.scenario
+                filename = "{}_{}_{}.tel".format(
+                    scenario.name, scenario_run.seed, time.strftime("%Y%m%d-%H%M%S"))
+                scenario_run.telemetry = TelemetryRecorder(
+                    os.path.join(self._telemetry_directory, filename),
+                    [scenario.ego_vehicle] + list(scenario.other_vehicles),
+                    metadata={"scenario": scenario.name, "seed": scenario_run.seed})
+
+            self._current_run = scenario_run
+
+    def update_scenario(self, timestamp):
+        """
+        Run next tick of the current scenario
+        This function is a callback for world.on_tick()
+        """
+        with self._thread_lock:
+            scenario_run = self._current_run
+            if scenario_run is None or self._timestamp_last_run >= timestamp.elapsed_seconds:
+                return
+            self._timestamp_last_run = timestamp.elapsed_seconds
+            self._last_tick_system_time = time.time()
+
+            try:
+                GameTime.on_carla_tick(timestamp)
+                Tracker.on_update()
+
+                if scenario_run.telemetry is not None:
+                    scenario_run.telemetry.record(timestamp.frame_count, GameTime.get_time())
+
+                scenario_run.scenario_tree.tick_once()
+                finished = (scenario_run.scenario_tree.status != ct.STATUS.RUNNING or
+                            self.__criteria_decided(scenario_run))
+            except Exception as error:  # pylint: disable=broad-except
+                # Raised again by the thread waiting for the scenario
+                self._tick_error = error
+                finished = True
+
+            if finished:
+                scenario_run.end_system_time = time.time()
+                scenario_run.end_game_time = GameTime.get_time()
+                self._current_run = None
+                self._scenario_finished.set()
+
+    def _wait_for_scenario(self):
+        """
+        Block until the running scenario finished.
+        Re-raises an exception of the tick callback, and raises a RuntimeError
+        if the world stopped ticking
+        """
+        while not self._scenario_finished.wait(self._tick_timeout):
+            with self._thread_lock:
+                if self._scenario_finished.is_set():
+                    break
+                if time.time() - self._last_tick_system_time > self._tick_timeout:
+                    self._current_run = None
+                    raise RuntimeError(
+                        "No world tick for {} seconds, scenario aborted".format(self._tick_timeout))
+
+        if self._tick_error is not None:
+            error, self._tick_error = self._tick_error, None
+            raise error
+
+    def end_scenario(self, scenario_run):
+        """
+        Terminate all nodes of the scenario tree and stop tracking its vehicles
+        """
+        for node in scenario_run.scenario_tree.iterate():
+            if not node.children:
+                node.terminate(ct.STATUS.INVALID)
+
+        if scenario_run.telemetry is not None:
+            scenario_run.telemetry.close()
+            scenario_run.telemetry = None
+
+        scenario = scenario_run.scenario
+        Tracker.untrack_vehicles([scenario.ego_vehicle] + list(scenario.other_vehicles))
+
+    def generate_metrics(self, scenario_run):
+        """
+        Evaluate the test criteria of a finished scenario and remove its actors
+        """
+        failure = False
+        result = "SUCCESS"
+        criteria = []
+        for criterion in scenario_run.criteria:
+            if (not criterion.optional and
+                    criterion.test_status != "SUCCESS" and
+                    criterion.test_status != "ACCEPTABLE"):
+                failure = True
+                result = "FAILURE"
+            elif criterion.test_status == "ACCEPTABLE":
+                result = "ACCEPTABLE"
+
+            criteria.append({
+                "name": criterion.name,
+                "vehicle_id": criterion.vehicle.id,
+                "optional": criterion.optional,
+                "status": criterion.test_status,
+                "actual_value": criterion.actual_value,
+                "expected_value_success": criterion.expected_value_success,
+                "expected_value_acceptable": criterion.expected_value_acceptable})
+
+        if scenario_run.timeout_node.timeout and not failure:
+            result = "TIMEOUT"
+
+        scenario_run.scenario.destroy_actors()
+
+        return {
+            "scenario": scenario_run.scenario_tree.name,
+            "result": result,
+            "seed": scenario_run.seed,
+            "duration_system": scenario_run.end_system_time - scenario_run.start_system_time,
+            "duration_game": scenario_run.end_game_time - scenario_run.start_game_time,
+            "criteria": criteria}
+
+    def shutdown(self):
+        """
+        Wait for all pending setups and metrics, then stop the worker threads
+        (called by run_scenarios(), can be called repeatedly)
+        """
+        for executor in (self._setup_executor, self._metrics_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._setup_executor = None
+        self._metrics_executor = None
+
+    def _abort_scenario(self, scenario, scenario_run=None):
+        """
+        Clean up a scenario that did not finish regularly: stop ticking it, terminate
+        its tree (if it was built) and remove its actors. Errors are only logged, so that
+        they do not hide the error that aborted the scenario.
+        """
+        try:
+            with self._thread_lock:
+                if scenario_run is not None and self._current_run is scenario_run:
+                    self._current_run = None
+            if scenario_run is not None:
+                self.end_scenario(scenario_run)
+            else:
+                Tracker.untrack_vehicles([scenario.ego_vehicle] + list(scenario.other_vehicles))
+            scenario.destroy_actors()
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("Orchestrator: cleanup of scenario %s failed", scenario.name)
 
-    def start_scenario(self):
-        pass
+    def __generate_scenario_tree(self, scenario_run):
+        """
+        Combine behaviour, timeout and test criteria of a scenario into one tree
+        """
+        scenario = scenario_run.scenario
+        scenario_run.criteria = scenario.generate_test_conditions()
+        for criterion in scenario_run.criteria:
+            criterion.terminate_on_failure = scenario.terminate_on_failure
+        scenario_run.timeout_node = TimeOut(scenario.timeout, name="TimeOut")
 
-    def end_scenario(self):
-        pass
+        criteria_tree = py_trees.composites.Parallel(name="Test Criteria")
+        criteria_tree.add_children(scenario_run.criteria)
 
-    def update_scenario(self):
-        pass
+        scenario_tree = py_trees.composites.Parallel(
+            scenario.name, policy=ct.POLICY.SUCCESS_ON_ONE)
+        scenario_tree.add_child(scenario.generate_scenario_behaviour())
+        scenario_tree.add_child(scenario_run.timeout_node)
+        scenario_tree.add_child(criteria_tree)
+        scenario_tree.setup(timeout=1)
 
-    def generate_metrics(self):
-        pass
+        scenario_run.scenario_tree = scenario_tree
 
-    def __generate_scenario_tree(self):
-        pass
+    @staticmethod
+    def __criteria_decided(scenario_run):
+        """
+        With terminate_on_failure a scenario ends as soon as the results of all
+        required criteria are final
+        """
+        if not scenario_run.scenario.terminate_on_failure:
+            return False
+        required = [criterion for criterion in scenario_run.criteria if not criterion.optional]
+        return bool(required) and all(criterion.final for criterion in required)
@@ -1,10 +1,16 @@
 import math
+import threading
+
+import numpy as np
 
 """
     The Tracker serves to provide ready and convenient access to data about vehicles in the scenario. 
     
     Most of the functions (for now) are akin to wrapper functions. 
     These should be "enhanced" to provide added functionality in the future.
+
+    Besides the per-vehicle getters, the state of all tracked vehicles is kept in NumPy arrays
+    (one row per vehicle), so that criteria over all vehicles cost one array operation per tick.
 """
 
 
@@ -16,11 +22,28 @@ class Tracker(object):
 
             1. Velocity of the vehicle
             2. Location of the vehicle
+            3. Odometer of the vehicle (distance driven since its state was first read)
+
+        Arrays (row i belongs to vehicles[i]):
 
+            positions: (n, 3) locations
+            velocities: (n, 3) velocity vectors
+            forward_vectors: (n, 2) unit heading in the x/y plane
+            updated: (n,) True once the state of the vehicle was read
+            odometers: (n,) distance driven since the state was first read
     """
 
     vehicle_map = dict()
 
+    vehicles = []
+    positions = np.zeros((0, 3))
+    velocities = np.zeros((0, 3))
+    forward_vectors = np.zeros((0, 2))
+    updated = np.zeros(0, dtype=bool)
+    odometers = np.zeros(0)
+    _indices = dict()
+    _lock = threading.Lock()
+
     @staticmethod
     def track_vehicle(vehicle):
         """
@@ -31,10 +54,12 @@ class Tracker(object):
         init_location = None
         init_velocity = 0.0
 
-        if vehicle in Tracker.vehicle_map:
-            pass
-        else:
-            Tracker.vehicle_map[vehicle] = (init_location, init_velocity)
+        with Tracker._lock:
+            if vehicle in Tracker.vehicle_map:
+                pass
+            else:
+                Tracker.vehicle_map[vehicle] = (init_location, init_velocity)
+                Tracker._resize(Tracker.vehicles + [vehicle])
 
     @staticmethod
     def track_vehicles(vehicles):
@@ -44,18 +69,48 @@ class Tracker(object):
         for vehicle in vehicles:
             Tracker.track_vehicle(vehicle)
 
+    @staticmethod
+    def untrack_vehicle(vehicle):
+        """
+        Remove a vehicle from the dictionaries, e.g. once its scenario ended
+        """
+        with Tracker._lock:
+            if Tracker.vehicle_map.pop(vehicle, None) is not None:
+                Tracker._resize([other for other in Tracker.vehicles if other != vehicle])
+
+    @staticmethod
+    def untrack_vehicles(vehicles):
+        """
+        Remove a set of vehicles from the dictionaries
+        """
+        for vehicle in vehicles:
+            Tracker.untrack_vehicle(vehicle)
+
     @staticmethod
     def on_update():
         """
             Keeps track of changed variables when the time 'ticks'
         """
 
-        for vehicle in Tracker.vehicle_map:
-            if vehicle is not None and vehicle.is_alive:
-                location = vehicle.get_location()
-                velocity = calculate_velocity(vehicle)
-
-                Tracker.vehicle_map[vehicle] = (location, velocity)
+        with Tracker._lock:
+            for i, vehicle in enumerate(Tracker.vehicles):
+                if vehicle is not None and vehicle.is_alive:
+                    transform = vehicle.get_transform()
+                    velocity = vehicle.get_velocity()
+                    location = transform.location
+                    yaw = math.radians(transform.rotation.yaw)
+
+                    if Tracker.updated[i]:
+                        last_x, last_y, last_z = Tracker.positions[i]
+                        Tracker.odometers[i] += math.sqrt((location.x - last_x)**2 +
+                                                          (location.y - last_y)**2 +
+                                                          (location.z - last_z)**2)
+                    Tracker.positions[i] = (location.x, location.y, location.z)
+                    Tracker.velocities[i] = (velocity.x, velocity.y, velocity.z)
+                    Tracker.forward_vectors[i] = (math.cos(yaw), math.sin(yaw))
+                    Tracker.updated[i] = True
+                    Tracker.vehicle_map[vehicle] = (
+                        location, math.sqrt(velocity.x**2 + velocity.y**2))
 
     @staticmethod
     def get_velocity(vehicle):
@@ -79,12 +134,99 @@ class Tracker(object):
             (loc, vel) = Tracker.vehicle_map[vehicle]
             return loc
 
+    @staticmethod
+    def get_odometer(vehicle):
+        """
+        returns the distance the given vehicle drove since its state was first read,
+        or None if it was not read yet.
+        Users capture the reading when they start and subtract it later on.
+        """
+        with Tracker._lock:
+            index = Tracker._indices.get(vehicle)
+            if index is None or not Tracker.updated[index]:
+                return None
+            return float(Tracker.odometers[index])
+
+    @staticmethod
+    def get_index(vehicle):
+        """
+        returns the row of the vehicle in the arrays, or None if it is not tracked
+        """
+        with Tracker._lock:
+            return Tracker._indices.get(vehicle)
+
+    @staticmethod
+    def get_relative_motion(ego_vehicle):
+        """
+        returns the motion of all other tracked vehicles relative to the ego vehicle as arrays:
+
+            longitudinal: distance along the heading of the ego vehicle (positive = ahead)
+            lateral: distance perpendicular to the heading of the ego vehicle
+            distance: euclidean distance
+            closing_speed: speed at which the distance decreases (positive = approaching)
+
+        Vehicles whose state was not read yet are left out.
+        All arrays are empty if the ego vehicle is not tracked or its state was not read yet
+        """
+        # Vehicles may be (un)tracked by other threads, which replaces the arrays
+        with Tracker._lock:
+            index = Tracker._indices.get(ego_vehicle)
+            if index is None or not Tracker.updated[index]:
+                empty = np.zeros(0)
+                return empty, empty, empty, empty
+
+            others = Tracker.updated & (np.arange(len(Tracker.vehicles)) != index)
+            offsets = Tracker.positions[others] - Tracker.positions[index]
+            relative_velocities = Tracker.velocities[others] - Tracker.velocities[index]
+            forward = Tracker.forward_vectors[index].copy()
+
+        longitudinal = offsets[:, :2].dot(forward)
+        lateral = offsets[:, 1] * forward[0] - offsets[:, 0] * forward[1]
+        distance = np.linalg.norm(offsets, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            closing_speed = np.where(
+                distance > 0.0,
+                -np.einsum('ij,ij->i', offsets, relative_velocities) / distance,
+                0.0)
+
+        return longitudinal, lateral, distance, closing_speed
+
     @staticmethod
     def reset():
         """
             Cleanup and remove all entries from all dictionaries
         """
-        Tracker.vehicle_map.clear()
+        with Tracker._lock:
+            Tracker.vehicle_map.clear()
+            Tracker._resize([])
+
+    @staticmethod
+    def _resize(vehicles):
+        """
+        Rebuild the arrays for the given vehicles, keeping the state of known vehicles
+        """
+        positions = np.zeros((len(vehicles), 3))
+        velocities = np.zeros((len(vehicles), 3))
+        forward_vectors = np.zeros((len(vehicles), 2))
+        forward_vectors[:, 0] = 1.0
+        updated = np.zeros(len(vehicles), dtype=bool)
+        odometers = np.zeros(len(vehicles))
+        for i, vehicle in enumerate(vehicles):
+            old_index = Tracker._indices.get(vehicle)
+            if old_index is not None:
+                positions[i] = Tracker.positions[old_index]
+                velocities[i] = Tracker.velocities[old_index]
+                forward_vectors[i] = Tracker.forward_vectors[old_index]
+                updated[i] = Tracker.updated[old_index]
+                odometers[i] = Tracker.odometers[old_index]
+
+        Tracker.vehicles = vehicles
+        Tracker.positions = positions
+        Tracker.velocities = velocities
+        Tracker.forward_vectors = forward_vectors
+        Tracker.updated = updated
+        Tracker.odometers = odometers
+        Tracker._indices = {vehicle: i for i, vehicle in enumerate(vehicles)}
 
 
 def calculate_velocity(vehicle):
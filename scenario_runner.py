@@ -16,54 +16,84 @@ and how to evaluate scenario results.
 from __future__ import print_function
 import argparse
 from argparse import RawTextHelpFormatter
+import sys
 
-import carla
-
-from Scenarios.follow_leading_vehicle import *
-from Scenarios.opposite_vehicle_taking_priority import *
-from Scenarios.object_crash_vehicle import *
-from Scenarios.no_signal_junction_crossing import NoSignalJunctionCrossing
-from Scenarios.object_crash_intersection import *
-from Scenarios.control_loss import *
-from ScenarioManager.scenario_manager import ScenarioManager
+from Scenarios.registry import get_scenario_class_or_fail, get_scenario_names
 
 
 # Version of scenario_runner
 VERSION = 0.1
 
 
-# List of all supported scenarios. IMPORTANT: String has to be class name
-SCENARIOS = {
-    "FollowLeadingVehicle",
-    "FollowLeadingVehicleWithObstacle",
-    "StationaryObjectCrossing",
-    "DynamicObjectCrossing",
-    "OppositeVehicleRunningRedLight",
-    "NoSignalJunctionCrossing",
-    "VehicleTurningRight",
-    "VehicleTurningLeft",
-    "ControlLoss"
-}
+def run_scenario_repetitions(world, manager, args):
+    """
+    Setup, run and evaluate the scenario given in args for the requested
+    number of repetitions on an already connected world.
+    Returns a list with one entry per repetition (True = success).
 
+    Repetition i is seeded with seed + i, so every single repetition can be
+    replayed with '--seed <seed + i> --repetitions 1'.
 
-def get_scenario_class_or_fail(scenario):
-    """
-    Get scenario class by scenario name
-    If scenario is not supported or not found, raise an exception
+    The results of all repetitions are streamed into one junit and/or
+    JSON-lines file, and stored in the results database if requested.
+    Aggregated statistics of all repetitions are printed at the end (and
+    exported after every repetition if requested).
     """
-    if scenario in SCENARIOS:
-        if scenario in globals():
-            return globals()[scenario]
-        else:
-            raise Exception("No class for scenario '{}'".format(scenario))
-    else:
-        raise Exception("Scenario '{}' not supported".format(scenario))
+    from ScenarioManager.result_store import ResultStore
+    from ScenarioManager.result_writer import ReportWriter
+    from ScenarioManager.statistics import CampaignStatistics
+    from utility.log_pipeline import LogPipeline
+    from utility.random_source import RandomSource
+
+    seed = getattr(args, 'seed', None)
+    if seed is None:
+        seed = RandomSource.seed()
+
+    results = []
+    scenario_class = get_scenario_class_or_fail(args.scenario)
+    manager.telemetry_directory = getattr(args, 'record', None)
+    statistics = CampaignStatistics(getattr(args, 'statistics', None))
+    reports = [ReportWriter(args.junit, getattr(args, 'json', None)), statistics]
+    if getattr(args, 'database', None) is not None:
+        reports.append(ResultStore(args.database))
+
+    try:
+        for i in range(int(args.repetitions)):
+            RandomSource.seed(int(seed) + i)
+            scenario = scenario_class(world, args.debug)
+            manager.load_scenario(scenario)
+            manager.run_scenario()
+
+            failure = manager.analyze_scenario(args.output, args.filename, reports)
+            LogPipeline.flush()
+
+            if not failure:
+                print("Success!")
+                results.append(True)
+            else:
+                print("Failure!")
+                results.append(False)
+
+            manager.stop_scenario()
+            del scenario
+    finally:
+        for report in reports:
+            report.close()
+
+    if len(results) > 1:
+        print(statistics.summary())
+
+    return results
 
 
 def main(args):
     """
     Main function starting a CARLA client and connecting to the world.
     """
+    # CARLA and the scenario manager (incl. py_trees) are imported here, so that
+    # listing the scenarios or printing the version does not need to load them
+    import carla
+    from ScenarioManager.scenario_manager import ScenarioManager
 
     # Tunable parameters
     client_timeout = 2.0   # in seconds
@@ -71,7 +101,6 @@ def main(args):
 
     # CARLA world and scenario handlers
     world = None
-    scenario = None
     manager = None
 
     try:
@@ -92,24 +121,7 @@ def main(args):
         manager = ScenarioManager(world, args.debug)
 
         # Setup and run the scenario for repetition times
-        scenario_class = get_scenario_class_or_fail(args.scenario)
-        for i in range(int(args.repetitions)):
-            scenario = scenario_class(world, args.debug)
-            manager.load_scenario(scenario)
-            manager.run_scenario()
-
-            junit_filename = None
-            if args.junit is not None:
-                junit_filename = args.junit.split(".")[0] + "_{}.xml".format(i)
-
-            if not manager.analyze_scenario(
-                    args.output, args.filename, junit_filename):
-                print("Success!")
-            else:
-                print("Failure!")
-
-            manager.stop_scenario()
-            del scenario
+        run_scenario_repetitions(world, manager, args)
 
     finally:
         if manager is not None:
@@ -136,11 +148,21 @@ if __name__ == '__main__':
         '--output', action="store_true", help='Provide results on stdout')
     PARSER.add_argument('--filename', help='Write results into given file')
     PARSER.add_argument(
-        '--junit', help='Write results into the given junit file')
+        '--junit', help='Write results of all repetitions into the given junit file')
+    PARSER.add_argument(
+        '--json', help='Append results of all repetitions to the given JSON-lines file')
+    PARSER.add_argument(
+        '--database', help='Store results of all repetitions in the given SQLite database')
+    PARSER.add_argument(
+        '--statistics', help='Export aggregated statistics of all repetitions to the given JSON file')
+    PARSER.add_argument(
+        '--record', metavar='DIR', help='Record per-tick telemetry of every repetition into DIR')
     PARSER.add_argument('--scenario',
                         help='Name of the scenario to be executed')
     PARSER.add_argument(
         '--repetitions', default=1, help='Number of scenario executions')
+    PARSER.add_argument(
+        '--seed', type=int, help='Seed of the random number generator (default: random)')
     PARSER.add_argument(
         '--list', action="store_true", help='List all supported scenarios and exit')
     PARSER.add_argument(
@@ -149,7 +171,7 @@ if __name__ == '__main__':
 
     if ARGUMENTS.list:
         print("Currently the following scenarios are supported:")
-        print(*SCENARIOS, sep='\n')
+        print(*get_scenario_names(), sep='\n')
         sys.exit(0)
 
     if ARGUMENTS.scenario is None:
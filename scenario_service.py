@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2018 Intel Labs.
+# authors: Fabian Oboril (fabian.oboril@intel.com)
+#
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Long-lived CARLA scenario service.
+
+scenario_runner.py connects to the server, discovers the world and creates
+a scenario manager on every invocation. The scenario service keeps one
+connected client, world handle and scenario manager per server and accepts
+scenario jobs through a local socket, so that consecutive jobs only pay for
+the scenario itself.
+
+Jobs and results are exchanged as JSON lines over a unix socket that only
+the user running the service can access (mode 0600).
+
+Start the service:
+    python scenario_service.py --serve
+
+Submit a job (same options as scenario_runner.py):
+    python scenario_service.py --scenario FollowLeadingVehicle --repetitions 3
+"""
+
+from __future__ import print_function
+import argparse
+from argparse import RawTextHelpFormatter
+import json
+import os
+import socket
+import sys
+import threading
+import traceback
+
+from scenario_runner import VERSION, run_scenario_repetitions
+
+
+# Default path of the service socket (in the home directory of the user)
+SERVICE_SOCKET = os.path.expanduser('~/.carla_scenario_service.sock')
+
+
+class ClientPool(object):
+
+    """
+    Pool of warm connections, one per CARLA server (host, port).
+
+    Each connection holds the client, the world handle and a scenario
+    manager. The world handle is only replaced if the server switched to
+    a new episode (e.g. after loading another map).
+    """
+
+    # Tunable parameters
+    client_timeout = 2.0   # in seconds
+    wait_for_world = 10.0  # in seconds
+
+    def __init__(self, debug=False):
+        self._debug = debug
+        self._connections = dict()
+        self._lock = threading.Lock()
+
+    def get(self, host, port):
+        """
+        Returns the connection to the given server, connecting on first use.
+        The returned connection must be used while holding connection.lock.
+        """
+        with self._lock:
+            key = (host, int(port))
+            if key not in self._connections:
+                self._connections[key] = _Connection(
+                    host, int(port), self.client_timeout, self._debug)
+            connection = self._connections[key]
+
+        connection.refresh_world(self.wait_for_world)
+        return connection
+
+
+class _Connection(object):
+
+    """
+    Client, world and scenario manager of a single CARLA server
+    """
+
+    def __init__(self, host, port, client_timeout, debug):
+        import carla
+
+        self.lock = threading.Lock()
+        self.client = carla.Client(host, port)
+        self.client.set_timeout(client_timeout)
+        self.world = None
+        self.manager = None
+        self._debug = debug
+
+    def refresh_world(self, wait_for_world):
+        """
+        Reuse the cached world unless the server started a new episode
+        """
+        from ScenarioManager.scenario_manager import ScenarioManager
+
+        with self.lock:
+            world = self.client.get_world()
+            if self.world is not None and world.id == self.world.id:
+                return
+
+            world.wait_for_tick(wait_for_world)
+            self.world = world
+            self.manager = ScenarioManager(world, self._debug)
+
+
+class ScenarioService(object):
+
+    """
+    Accepts scenario jobs on a local socket and executes them with the
+    connections of a ClientPool.
+
+    Jobs are executed one after the other, also for different servers:
+    all scenario managers share process-wide state (GameTime,
+    CarlaDataProvider, RandomSource), e.g. stopping a scenario cleans up
+    the CarlaDataProvider.
+    """
+
+    def __init__(self, pool, path=SERVICE_SOCKET):
+        self._pool = pool
+        self._path = path
+        self._job_lock = threading.Lock()
+        if os.path.exists(path):
+            if _is_listening(path):
+                raise RuntimeError("A scenario service is already listening on {}".format(path))
+            os.unlink(path)
+
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Create the socket with mode 0600, so only the current user can submit jobs
+        umask = os.umask(0o177)
+        try:
+            self._listener.bind(path)
+        finally:
+            os.umask(umask)
+        os.chmod(path, 0o600)
+        self._listener.listen(8)
+
+    def serve_forever(self):
+        """
+        Accept connections until interrupted
+        """
+        print("Scenario service listening on {}".format(self._path))
+        try:
+            while True:
+                channel, _ = self._listener.accept()
+                handler = threading.Thread(target=self._handle, args=(channel,))
+                handler.daemon = True
+                handler.start()
+        finally:
+            self._listener.close()
+            os.unlink(self._path)
+
+    def _handle(self, channel):
+        """
+        Execute one job and send back its results
+        """
+        stream = channel.makefile('rwb')
+        try:
+            try:
+                job = json.loads(stream.readline().decode('utf-8'))
+                if not isinstance(job, dict):
+                    raise ValueError("A job has to be a JSON object")
+                args = argparse.Namespace(**job)
+                with self._job_lock:
+                    connection = self._pool.get(args.host, args.port)
+                    with connection.lock:
+                        results = run_scenario_repetitions(
+                            connection.world, connection.manager, args)
+                reply = {'results': results}
+            except Exception:  # pylint: disable=broad-except
+                reply = {'error': traceback.format_exc()}
+            stream.write(json.dumps(reply).encode('utf-8') + b'\n')
+            stream.flush()
+        finally:
+            stream.close()
+            channel.close()
+
+
+def _is_listening(path):
+    """
+    Returns True if a service accepts connections on the socket
+    """
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except socket.error:
+        return False
+    finally:
+        probe.close()
+
+
+def submit(job, path=SERVICE_SOCKET):
+    """
+    Send a job to a running scenario service and wait for its results
+    """
+    if os.stat(path).st_uid != os.getuid():
+        raise RuntimeError("{} is not owned by the current user".format(path))
+
+    channel = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        channel.connect(path)
+        stream = channel.makefile('rwb')
+        try:
+            stream.write(json.dumps(job).encode('utf-8') + b'\n')
+            stream.flush()
+            return json.loads(stream.readline().decode('utf-8'))
+        finally:
+            stream.close()
+    finally:
+        channel.close()
+
+
+if __name__ == '__main__':
+
+    DESCRIPTION = (
+        "CARLA Scenario Service: Keep CARLA connections warm and run scenario jobs\n"
+        "Current version: " + str(VERSION))
+
+    PARSER = argparse.ArgumentParser(description=DESCRIPTION,
+                                     formatter_class=RawTextHelpFormatter)
+    PARSER.add_argument('--serve', action="store_true",
+                        help='Start the service instead of submitting a job')
+    PARSER.add_argument('--socket', default=SERVICE_SOCKET,
+                        help='Unix socket of the service (default: {})'.format(SERVICE_SOCKET))
+    PARSER.add_argument('--host', default='localhost',
+                        help='IP of the host server (default: localhost)')
+    PARSER.add_argument('--port', default='2000',
+                        help='TCP port to listen to (default: 2000)')
+    PARSER.add_argument(
+        '--debug', action="store_true", help='Run with debug output')
+    PARSER.add_argument(
+        '--output', action="store_true", help='Provide results on stdout')
+    PARSER.add_argument('--filename', help='Write results into given file')
+    PARSER.add_argument(
+        '--junit', help='Write results of all repetitions into the given junit file')
+    PARSER.add_argument(
+        '--json', help='Append results of all repetitions to the given JSON-lines file')
+    PARSER.add_argument(
+        '--database', help='Store results of all repetitions in the given SQLite database')
+    PARSER.add_argument(
+        '--statistics', help='Export aggregated statistics of all repetitions to the given JSON file')
+    PARSER.add_argument(
+        '--record', metavar='DIR', help='Record per-tick telemetry of every repetition into DIR')
+    PARSER.add_argument('--scenario',
+                        help='Name of the scenario to be executed')
+    PARSER.add_argument(
+        '--repetitions', default=1, help='Number of scenario executions')
+    PARSER.add_argument(
+        '--seed', type=int, help='Seed of the random number generator (default: random)')
+    ARGUMENTS = PARSER.parse_args()
+
+    if ARGUMENTS.serve:
+        try:
+            ScenarioService(ClientPool(ARGUMENTS.debug), ARGUMENTS.socket).serve_forever()
+        except KeyboardInterrupt:
+            print('\nCancelled by user. Bye!')
+        sys.exit(0)
+
+    if ARGUMENTS.scenario is None:
+        print("Please specify a scenario using '--scenario SCENARIONAME'\n\n")
+        PARSER.print_help(sys.stdout)
+        sys.exit(0)
+
+    JOB = dict(vars(ARGUMENTS))
+    del JOB['serve']
+    del JOB['socket']
+    REPLY = submit(JOB, ARGUMENTS.socket)
+    if 'error' in REPLY:
+        print(REPLY['error'])
+        sys.exit(-1)
+    print("Results: {}".format(REPLY['results']))
@@ -11,9 +11,12 @@
 import carla
 
 import argparse
-import random
 import time
 
+from utility.blueprint_catalog import BlueprintCatalog
+from utility.map_cache import MapCache
+from utility.random_source import RandomSource
+
 
 def main():
     argparser = argparse.ArgumentParser(
@@ -45,8 +48,17 @@ def main():
         '--safe',
         action='store_true',
         help='avoid spawning vehicles prone to accidents')
+    argparser.add_argument(
+        '--seed',
+        metavar='S',
+        default=None,
+        type=int,
+        help='seed of the random number generator (default: random)')
     args = argparser.parse_args()
 
+    print('random seed %d' % RandomSource.seed(args.seed))
+    rng = RandomSource.get_generator()
+
     actor_list = []
 
     try:
@@ -54,16 +66,16 @@ def main():
         client = carla.Client(args.host, args.port)
         client.set_timeout(2.0)
         world = client.get_world()
-        blueprints = world.get_blueprint_library().filter('vehicle.*')
+        blueprints = BlueprintCatalog.get(world).filter('vehicle.*')
 
         if args.safe:
             blueprints = [x for x in blueprints if int(x.get_attribute('number_of_wheels')) == 4]
             blueprints = [x for x in blueprints if not x.id.endswith('isetta')]
 
         def try_spawn_random_vehicle_at(transform):
-            blueprint = random.choice(blueprints)
+            blueprint = rng.choice(blueprints)
             if blueprint.has_attribute('color'):
-                color = random.choice(blueprint.get_attribute('color').recommended_values)
+                color = rng.choice(blueprint.get_attribute('color').recommended_values)
                 blueprint.set_attribute('color', color)
             vehicle = world.try_spawn_actor(blueprint, transform)
             if vehicle is not None:
@@ -73,9 +85,8 @@ def main():
                 return True
             return False
 
-        # @todo Needs to be converted to list to be shuffled.
-        spawn_points = list(world.get_map().get_spawn_points())
-        random.shuffle(spawn_points)
+        spawn_points = MapCache.get(world, client.get_server_version()).get_spawn_points()
+        rng.shuffle(spawn_points)
 
         print('found %d spawn points.' % len(spawn_points))
 
@@ -89,7 +100,7 @@ def main():
 
         while count > 0:
             time.sleep(args.delay)
-            if try_spawn_random_vehicle_at(random.choice(spawn_points)):
+            if try_spawn_random_vehicle_at(rng.choice(spawn_points)):
                 count -= 1
 
         print('spawned %d vehicles, press Ctrl+C to exit.' % args.number_of_vehicles)
@@ -1,5 +1,4 @@
-from scenario_management.constants import SCENARIOS as SC
+from Scenarios.registry import get_scenario_class_or_fail, get_scenario_names
 
-sc = SC["LVD"]()
-
-print (sc.x)
\ No newline at end of file
+for name in get_scenario_names():
+    print(name, get_scenario_class_or_fail(name))
@@ -0,0 +1,174 @@
+"""
+    Minimal stand-ins for the CARLA world, actors and timestamps used by the tests.
+    Only the attributes the code under test reads are provided.
+"""
+
+import collections
+import itertools
+import threading
+import time
+
+import py_trees
+
+
+Vector = collections.namedtuple('Vector', ['x', 'y', 'z'])
+Rotation = collections.namedtuple('Rotation', ['pitch', 'yaw', 'roll'])
+Transform = collections.namedtuple('Transform', ['location', 'rotation'])
+Timestamp = collections.namedtuple(
+    'Timestamp', ['frame_count', 'elapsed_seconds', 'delta_seconds', 'platform_timestamp'])
+VehicleControl = collections.namedtuple('VehicleControl', ['throttle', 'steer', 'brake'])
+Blueprint = collections.namedtuple('Blueprint', ['id'])
+CollisionEvent = collections.namedtuple(
+    'CollisionEvent', ['frame_number', 'other_actor', 'normal_impulse'])
+LaneInvasionEvent = collections.namedtuple(
+    'LaneInvasionEvent', ['frame_number', 'crossed_lane_markings'])
+
+_actor_ids = itertools.count(1)
+_world_ids = itertools.count(1)
+
+
+class FakeVehicle(object):
+
+    """
+        Vehicle driving with a constant velocity, its position is moved by drive()
+    """
+
+    def __init__(self, location=(0.0, 0.0, 0.0), velocity=(0.0, 0.0, 0.0), yaw=0.0,
+                 type_id='vehicle.fake.car', world=None):
+        self.id = next(_actor_ids)
+        self.type_id = type_id
+        self.world = world
+        self.is_alive = True
+        self.location = Vector(*location)
+        self.velocity = Vector(*velocity)
+        self.yaw = yaw
+        self.control = VehicleControl(0.0, 0.0, 0.0)
+
+    def drive(self, delta_seconds):
+        self.location = Vector(*[position + delta_seconds * speed
+                                 for position, speed in zip(self.location, self.velocity)])
+
+    def get_location(self):
+        return self.location
+
+    def get_transform(self):
+        return Transform(self.location, Rotation(0.0, self.yaw, 0.0))
+
+    def get_velocity(self):
+        return self.velocity
+
+    def get_vehicle_control(self):
+        return self.control
+
+    def get_world(self):
+        return self.world
+
+    def destroy(self):
+        self.is_alive = False
+        return True
+
+
+class FakeSensor(object):
+
+    """
+        Sensor actor attached to a vehicle, fire() passes an event to its listener
+    """
+
+    def __init__(self, type_id, parent):
+        self.id = next(_actor_ids)
+        self.type_id = type_id
+        self.parent = parent
+        self.is_alive = True
+        self.callback = None
+
+    def listen(self, callback):
+        self.callback = callback
+
+    def fire(self, event):
+        self.callback(event)
+
+    def destroy(self):
+        self.is_alive = False
+        return True
+
+
+class FakeBlueprintLibrary(object):
+
+    def find(self, blueprint_id):
+        return Blueprint(blueprint_id)
+
+
+class FakeWorld(object):
+
+    """
+        World calling its on_tick() callbacks, either by tick() or by a background thread.
+        Spawned actors are always FakeSensors
+    """
+
+    def __init__(self, delta_seconds=0.05):
+        self.id = next(_world_ids)
+        self.delta_seconds = delta_seconds
+        self.vehicles = []
+        self.sensors = []
+        self.frame = 0
+        self._callbacks = []
+        self._thread = None
+        self._stop = threading.Event()
+
+    def on_tick(self, callback):
+        self._callbacks.append(callback)
+
+    def get_blueprint_library(self):
+        return FakeBlueprintLibrary()
+
+    def spawn_actor(self, blueprint, transform, attach_to=None):
+        sensor = FakeSensor(blueprint.id, attach_to)
+        self.sensors.append(sensor)
+        return sensor
+
+    def alive_sensors(self, type_id=None):
+        return [sensor for sensor in self.sensors
+                if sensor.is_alive and type_id in (None, sensor.type_id)]
+
+    def tick(self):
+        self.frame += 1
+        for vehicle in self.vehicles:
+            vehicle.drive(self.delta_seconds)
+        timestamp = Timestamp(self.frame, self.frame * self.delta_seconds, self.delta_seconds,
+                              time.time())
+        for callback in self._callbacks:
+            callback(timestamp)
+
+    def start(self, interval=0.001):
+        def run():
+            while not self._stop.is_set():
+                self.tick()
+                time.sleep(interval)
+        self._stop.clear()
+        self._thread = threading.Thread(target=run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class TickCount(py_trees.behaviour.Behaviour):
+
+    """
+        Scenario behaviour that succeeds after the given number of ticks
+    """
+
+    def __init__(self, ticks, name="TickCount"):
+        super(TickCount, self).__init__(name)
+        self._ticks = ticks
+        self.count = 0
+
+    def update(self):
+        self.count += 1
+        if self.count >= self._ticks:
+            return py_trees.common.Status.SUCCESS
+        return py_trees.common.Status.RUNNING
@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+
+import py_trees
+
+try:
+    from ScenarioManager.async_scenario_manager import AsyncScenarioManager
+    from ScenarioManager.scenario_manager import Scenario
+    from ScenarioManager.timer import GameTime
+except RuntimeError as error:
+    # The ScenarioManager requires the carla package
+    raise unittest.SkipTest(str(error))
+
+from tests.fakes import FakeVehicle, FakeWorld, TickCount
+
+
+class GameTimeProbe(py_trees.behaviour.Behaviour):
+
+    """
+    Criterion recording the game time it sees on every tick
+    """
+
+    def __init__(self, name="GameTimeProbe"):
+        super(GameTimeProbe, self).__init__(name)
+        self.optional = True
+        self.final = False
+        self.terminate_on_failure = False
+        self.times = []
+        self.terminated = False
+
+    def update(self):
+        self.times.append(GameTime.get_time())
+        return py_trees.common.Status.RUNNING
+
+    def terminate(self, new_status):
+        if new_status == py_trees.common.Status.INVALID:
+            self.terminated = True
+
+
+class FakeScenario(object):
+
+    """
+    What ScenarioManager.load_scenario() reads from a scenario
+    """
+
+    def __init__(self, name, ticks):
+        self.ego_vehicle = FakeVehicle(velocity=(5.0, 0.0, 0.0))
+        self.other_vehicles = []
+        self.probe = GameTimeProbe()
+        self.scenario = Scenario(TickCount(ticks), [self.probe], name, timeout=1000)
+
+    def get_parameters(self):
+        return {}
+
+
+class AsyncScenarioManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.worlds = []
+
+    def tearDown(self):
+        for world in self.worlds:
+            world.stop()
+
+    def make_world(self, delta_seconds):
+        world = FakeWorld(delta_seconds)
+        self.worlds.append(world)
+        return world
+
+    def test_separate_game_times(self):
+        # Two worlds with different time steps, ticked by their own threads
+        worlds = [self.make_world(0.05), self.make_world(0.1)]
+        managers = [AsyncScenarioManager(world) for world in worlds]
+        scenarios = [FakeScenario('fine', 40), FakeScenario('coarse', 20)]
+
+        async def run_all():
+            return await asyncio.gather(*[
+                manager.run(scenario) for manager, scenario in zip(managers, scenarios)])
+
+        for world in worlds:
+            world.start()
+        statuses = asyncio.run(run_all())
+
+        self.assertEqual(statuses, [py_trees.common.Status.SUCCESS] * 2)
+        for world, manager, scenario, ticks in zip(worlds, managers, scenarios, (40, 20)):
+            # Each manager only advanced by the ticks of its own world
+            expected = [world.delta_seconds * (tick + 1) for tick in range(ticks)]
+            self.assertEqual(len(scenario.probe.times), ticks)
+            for measured, tick_time in zip(scenario.probe.times, expected):
+                self.assertAlmostEqual(measured, tick_time)
+            self.assertAlmostEqual(manager.scenario_duration_game, ticks * world.delta_seconds)
+            manager.stop_scenario()
+
+    def test_progress(self):
+        world = self.make_world(0.05)
+        manager = AsyncScenarioManager(world)
+        scenario = FakeScenario('progress', 5)
+
+        async def run():
+            progress = asyncio.Queue()
+            status = await manager.run(scenario, progress)
+            updates = []
+            while not progress.empty():
+                updates.append(progress.get_nowait())
+            return status, updates
+
+        world.start()
+        status, updates = asyncio.run(run())
+        self.assertEqual(status, py_trees.common.Status.SUCCESS)
+        self.assertEqual([update[2] for update in updates][-1], py_trees.common.Status.SUCCESS)
+        manager.stop_scenario()
+
+    def test_tick_timeout(self):
+        # The world never ticks
+        world = self.make_world(0.05)
+        manager = AsyncScenarioManager(world, tick_timeout=0.2)
+        scenario = FakeScenario('stalled', 5)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(manager.run(scenario))
+        self.assertTrue(scenario.probe.terminated)
+        self.assertFalse(manager._running)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+
+import numpy as np
+import py_trees
+
+try:
+    from ScenarioManager.atomic_scenario_criteria import (
+        BatchCriterion, CollisionBatchTest, DrivenDistanceBatchTest, KeepLaneBatchTest,
+        MaxVelocityBatchTest, MaxVelocityTest)
+    from ScenarioManager.carla_data_provider import CarlaDataProvider
+    from ScenarioManager.scenario_manager import Scenario
+    from ScenarioManager.timer import GameTime
+    from utility.sensor_hub import SensorHub
+except RuntimeError as error:
+    # The criteria require the carla package
+    raise unittest.SkipTest(str(error))
+
+from tests.fakes import (CollisionEvent, FakeVehicle, FakeWorld, LaneInvasionEvent, TickCount,
+                         Vector)
+
+
+class BatchCriteriaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.world = FakeWorld(delta_seconds=0.1)
+        self.vehicles = [FakeVehicle(velocity=(speed, 0.0, 0.0), world=self.world)
+                         for speed in (5.0, 10.0, 15.0)]
+        self.world.vehicles.extend(self.vehicles)
+        CarlaDataProvider.register_vehicles(self.vehicles)
+        GameTime.restart()
+        self.world.on_tick(self.on_tick)
+
+    def tearDown(self):
+        CarlaDataProvider.cleanup()
+        GameTime.restart()
+
+    def on_tick(self, timestamp):
+        GameTime.on_carla_tick(timestamp)
+        CarlaDataProvider.on_carla_tick(self.vehicles)
+
+    def run_ticks(self, node, ticks):
+        for _ in range(ticks):
+            self.world.tick()
+            node.tick_once()
+
+    def collide(self, index, frame=1):
+        sensor = self.world.alive_sensors('sensor.other.collision')[index]
+        sensor.fire(CollisionEvent(frame, self.vehicles[-1], Vector(1.0, 0.0, 0.0)))
+
+    def test_expansion(self):
+        batch = DrivenDistanceBatchTest(self.vehicles, [10.0, 20.0, 30.0], 5.0, optional=True)
+        single = MaxVelocityTest(self.vehicles[0], 12.0)
+        scenario = Scenario(TickCount(10), [batch, single], 'expansion')
+
+        self.assertEqual(len(scenario.test_criteria), 4)
+        self.assertEqual(scenario.test_criteria[:3], batch.criteria)
+        self.assertIs(scenario.test_criteria[3], single)
+        self.assertEqual(scenario.criteria_nodes, [batch, single])
+        for view, vehicle, expected in zip(batch.criteria, self.vehicles, (10.0, 20.0, 30.0)):
+            self.assertEqual(view.name, 'CheckDrivenDistance')
+            self.assertIs(view.vehicle, vehicle)
+            self.assertTrue(view.optional)
+            self.assertEqual(view.expected_value_success, expected)
+            self.assertEqual(view.expected_value_acceptable, 5.0)
+            self.assertEqual(view.test_status, 'INIT')
+        self.assertIsNone(MaxVelocityBatchTest(self.vehicles, 12.0).criteria[0].expected_value_acceptable)
+
+    def test_per_vehicle_status(self):
+        batch = DrivenDistanceBatchTest(self.vehicles, 10.0, 5.0)
+        self.run_ticks(batch, 5)
+        # Distances are measured from the first reading, 4 ticks before
+        self.assertEqual([view.test_status for view in batch.criteria],
+                         ['RUNNING', 'RUNNING', 'ACCEPTABLE'])
+        np.testing.assert_allclose([view.actual_value for view in batch.criteria], (2.0, 4.0, 6.0))
+        self.assertFalse(batch.final_mask.any())
+
+        self.run_ticks(batch, 3)
+        self.assertEqual([view.test_status for view in batch.criteria],
+                         ['RUNNING', 'ACCEPTABLE', 'SUCCESS'])
+        # Reaching the distance is final, the value is frozen
+        np.testing.assert_array_equal(batch.final_mask, (False, False, True))
+        self.run_ticks(batch, 10)
+        self.assertEqual(batch.criteria[2].actual_value, 10.5)
+        np.testing.assert_array_equal(batch.final_mask, (False, True, True))
+        self.assertFalse(batch.final)
+
+    def test_final_vehicles_are_frozen(self):
+        batch = MaxVelocityBatchTest(self.vehicles, 12.0)
+        self.run_ticks(batch, 2)
+        self.assertEqual([view.test_status for view in batch.criteria],
+                         ['SUCCESS', 'SUCCESS', 'FAILURE'])
+        np.testing.assert_array_equal(batch.final_mask, (False, False, True))
+
+        self.vehicles[2].velocity = Vector(20.0, 0.0, 0.0)
+        self.vehicles[1].velocity = Vector(11.0, 0.0, 0.0)
+        self.run_ticks(batch, 2)
+        self.assertEqual([view.actual_value for view in batch.criteria], [5.0, 11.0, 15.0])
+        self.assertFalse(batch.final)
+
+    def test_terminate_on_failure(self):
+        batch = MaxVelocityBatchTest(self.vehicles, 12.0)
+        batch.terminate_on_failure = True
+        self.run_ticks(batch, 1)
+        self.assertEqual(batch.status, py_trees.common.Status.FAILURE)
+
+    def test_collisions(self):
+        batch = CollisionBatchTest(self.vehicles)
+        self.assertEqual(len(self.world.alive_sensors('sensor.other.collision')), 3)
+
+        # Collisions while the scenario is prepared are discarded by initialise()
+        self.collide(0)
+        self.run_ticks(batch, 1)
+        self.assertEqual([view.test_status for view in batch.criteria], ['SUCCESS'] * 3)
+
+        self.collide(1, frame=2)
+        self.collide(1, frame=3)
+        self.run_ticks(batch, 1)
+        self.assertEqual([view.test_status for view in batch.criteria],
+                         ['SUCCESS', 'FAILURE', 'SUCCESS'])
+        self.assertEqual(batch.criteria[1].actual_value, 2)
+        self.assertEqual([(index, event.frame) for index, event in batch.events], [(1, 2), (1, 3)])
+        # The sensor of the failed vehicle is no longer needed
+        self.assertEqual(len(self.world.alive_sensors('sensor.other.collision')), 2)
+
+        # Events after the last tick are counted on terminate
+        self.collide(0, frame=4)
+        batch.terminate(py_trees.common.Status.SUCCESS)
+        self.assertEqual([view.test_status for view in batch.criteria],
+                         ['FAILURE', 'FAILURE', 'SUCCESS'])
+        self.assertEqual(self.world.alive_sensors(), [])
+        self.assertEqual(SensorHub.get_sensor_count(), 0)
+
+    def test_lane_invasions(self):
+        batch = KeepLaneBatchTest(self.vehicles)
+        sensors = self.world.alive_sensors('sensor.other.lane_detector')
+        sensors[2].fire(LaneInvasionEvent(1, ['Solid']))
+        self.run_ticks(batch, 1)
+        self.assertEqual(batch.events, [])
+
+        sensors[2].fire(LaneInvasionEvent(2, ['Broken']))
+        self.run_ticks(batch, 1)
+        self.assertEqual([view.actual_value for view in batch.criteria], [0.0, 0.0, 1.0])
+        self.assertEqual(batch.events[0][1].crossed_lane_markings, ('Broken',))
+        batch.terminate(py_trees.common.Status.SUCCESS)
+        self.assertEqual(SensorHub.get_sensor_count(), 0)
+
+    def test_is_single_node(self):
+        batch = MaxVelocityBatchTest(self.vehicles, 12.0)
+        self.assertIsInstance(batch, BatchCriterion)
+        self.assertEqual(len(list(batch.iterate())), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from ScenarioManager.carla_data_provider import CarlaDataProvider, VehicleHistory
+from ScenarioManager.timer import GameTime
+from tests.fakes import FakeVehicle, Timestamp, Vector
+
+
+class VehicleHistoryTest(unittest.TestCase):
+
+    def test_get_last(self):
+        history = VehicleHistory(8)
+        times, velocities = history.get_last(4)
+        self.assertEqual(times.shape, (0,))
+        self.assertEqual(velocities.shape, (0, 3))
+
+        for frame in range(3):
+            history.append(0.1 * frame, Vector(frame, 0.0, 0.0))
+        times, velocities = history.get_last(5)
+        np.testing.assert_allclose(times, (0.0, 0.1, 0.2))
+        np.testing.assert_allclose(velocities[:, 0], (0.0, 1.0, 2.0))
+
+    def test_wrap_around(self):
+        history = VehicleHistory(8)
+        for frame in range(20):
+            history.append(0.1 * frame, Vector(frame, -frame, 0.0))
+        self.assertEqual(history.count, 20)
+
+        # Oldest first, across the end of the ring buffer
+        times, velocities = history.get_last(5)
+        np.testing.assert_allclose(times, 0.1 * np.arange(15, 20))
+        np.testing.assert_allclose(velocities[:, 0], np.arange(15, 20))
+        np.testing.assert_allclose(velocities[:, 1], -np.arange(15, 20))
+        # At most the length of the buffer
+        times, _ = history.get_last(100)
+        np.testing.assert_allclose(times, 0.1 * np.arange(12, 20))
+
+    def test_same_frame(self):
+        history = VehicleHistory(8)
+        history.append(0.1, Vector(1.0, 0.0, 0.0))
+        history.append(0.1, Vector(2.0, 0.0, 0.0))
+        history.append(0.05, Vector(3.0, 0.0, 0.0))
+        times, velocities = history.get_last(8)
+        np.testing.assert_allclose(times, (0.1,))
+        np.testing.assert_allclose(velocities[:, 0], (1.0,))
+
+
+class CarlaDataProviderTest(unittest.TestCase):
+
+    def setUp(self):
+        GameTime.set_state((0.0, 0))
+
+    def tearDown(self):
+        CarlaDataProvider.cleanup()
+        GameTime.set_state((0.0, 0))
+
+    def test_history_game_time(self):
+        vehicle = FakeVehicle(velocity=(3.0, 4.0, 0.0))
+        CarlaDataProvider.register_vehicle(vehicle)
+        for frame in range(1, 5):
+            GameTime.on_carla_tick(Timestamp(frame, 0.0, 0.05, 0.0))
+            # Repeated updates within a frame (e.g. by several managers) are ignored
+            CarlaDataProvider.on_carla_tick()
+            CarlaDataProvider.on_carla_tick([vehicle])
+
+        times, velocities = CarlaDataProvider.get_history(vehicle, 10)
+        np.testing.assert_allclose(times, (0.05, 0.1, 0.15, 0.2))
+        np.testing.assert_allclose(velocities, [(3.0, 4.0, 0.0)] * 4)
+        self.assertEqual(CarlaDataProvider.get_velocity(vehicle), 5.0)
+
+        times, velocities = CarlaDataProvider.get_history(FakeVehicle(), 10)
+        self.assertEqual(times.shape, (0,))
+        self.assertEqual(velocities.shape, (0, 3))
+
+    def test_odometers(self):
+        vehicles = [FakeVehicle(velocity=(speed, 0.0, 0.0)) for speed in (1.0, 2.0)]
+        CarlaDataProvider.register_vehicles(vehicles)
+        self.assertTrue(np.isnan(CarlaDataProvider.get_odometers(vehicles)).all())
+        for _ in range(3):
+            CarlaDataProvider.on_carla_tick()
+            for vehicle in vehicles:
+                vehicle.drive(0.5)
+        np.testing.assert_allclose(CarlaDataProvider.get_odometers(vehicles), (1.0, 2.0))
+        np.testing.assert_allclose(CarlaDataProvider.get_locations(vehicles)[:, 0], (1.0, 2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
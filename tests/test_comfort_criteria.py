@@ -0,0 +1,111 @@
+import math
+import unittest
+
+try:
+    from ScenarioManager.atomic_scenario_criteria import (
+        AccelerationTest, ComfortTest, JerkTest, LateralAccelerationTest)
+    from ScenarioManager.carla_data_provider import CarlaDataProvider
+    from ScenarioManager.timer import GameTime
+except RuntimeError as error:
+    # The criteria require the carla package
+    raise unittest.SkipTest(str(error))
+
+from tests.fakes import FakeVehicle, Timestamp, Vector
+
+
+class ComfortCriteriaTest(unittest.TestCase):
+
+    delta_seconds = 0.05
+
+    def setUp(self):
+        GameTime.set_state((0.0, 0))
+        self.vehicle = FakeVehicle()
+        CarlaDataProvider.register_vehicle(self.vehicle)
+
+    def tearDown(self):
+        CarlaDataProvider.cleanup()
+        GameTime.set_state((0.0, 0))
+
+    def drive(self, criteria, velocity, frames):
+        """
+        Tick the criteria for the given frames, velocity(t) is the velocity vector at game time t
+        """
+        for _ in range(frames):
+            frame = GameTime.get_state()[1] + 1
+            GameTime.on_carla_tick(Timestamp(frame, 0.0, self.delta_seconds, 0.0))
+            self.vehicle.velocity = Vector(*velocity(GameTime.get_time()))
+            CarlaDataProvider.on_carla_tick()
+            for criterion in criteria:
+                criterion.tick_once()
+
+    def test_acceleration(self):
+        criteria = [AccelerationTest(self.vehicle, 1.5, 2.5),
+                    AccelerationTest(self.vehicle, 1.5, 2.5, metric="peak", window=5)]
+        # Constant speed
+        self.drive(criteria, lambda t: (10.0, 0.0, 0.0), 10)
+        for criterion in criteria:
+            self.assertAlmostEqual(criterion.actual_value, 0.0)
+            self.assertEqual(criterion.test_status, "SUCCESS")
+
+        # Braking with 2 m/s^2 along a diagonal, for more frames than the history holds
+        start = GameTime.get_time()
+        self.drive(criteria, lambda t: (0.6 * (10.0 - 2.0 * (t - start)),
+                                        0.8 * (10.0 - 2.0 * (t - start)), 0.0), 80)
+        # The peak is reached as soon as the window lies within the braking
+        self.assertAlmostEqual(criteria[1].actual_value, 2.0)
+        self.assertAlmostEqual(criteria[0].actual_value, 2.0)
+        for criterion in criteria:
+            self.assertEqual(criterion.test_status, "ACCEPTABLE")
+            self.assertFalse(criterion.final)
+
+    def test_rms_and_peak(self):
+        criteria = [AccelerationTest(self.vehicle, 15.0, window=4),
+                    AccelerationTest(self.vehicle, 15.0, metric="peak", window=4)]
+        # A single step of 1 m/s within a frame of 0.05 s, i.e. 20 m/s^2
+        self.drive(criteria, lambda t: (0.0, 0.0, 0.0), 5)
+        self.drive(criteria, lambda t: (1.0, 0.0, 0.0), 10)
+        # RMS over the window of 4 accelerations: sqrt(20^2 / 4)
+        self.assertAlmostEqual(criteria[0].actual_value, 10.0)
+        self.assertEqual(criteria[0].test_status, "SUCCESS")
+        self.assertAlmostEqual(criteria[1].actual_value, 20.0)
+        self.assertEqual(criteria[1].test_status, "FAILURE")
+
+    def test_jerk(self):
+        criterion = JerkTest(self.vehicle, 2.0, metric="peak")
+        # Speed 0.5 * t^3 has a jerk of 3 t, the criterion fails once it exceeds 2 m/s^3
+        self.drive([criterion], lambda t: (0.5 * t**3, 0.0, 0.0), 10)
+        self.assertAlmostEqual(criterion.actual_value, 3.0 * 0.45, places=6)
+        self.assertEqual(criterion.test_status, "SUCCESS")
+        self.drive([criterion], lambda t: (0.5 * t**3, 0.0, 0.0), 40)
+        self.assertEqual(criterion.test_status, "FAILURE")
+        self.assertTrue(criterion.final)
+        self.assertLess(criterion.actual_value, 2.2)
+
+    def test_lateral_acceleration(self):
+        criteria = [LateralAccelerationTest(self.vehicle, 1.5, 2.5),
+                    LateralAccelerationTest(self.vehicle, 1.5, 2.5, metric="peak")]
+        # Circle with a radius of 50 m at 10 m/s, turning left: v^2 / r = 2 m/s^2
+        self.drive(criteria, lambda t: (10.0 * math.cos(t / 5.0), 10.0 * math.sin(t / 5.0), 0.0),
+                   100)
+        for criterion in criteria:
+            self.assertAlmostEqual(criterion.actual_value, 2.0, places=3)
+            self.assertEqual(criterion.test_status, "ACCEPTABLE")
+
+    def test_lateral_acceleration_standing(self):
+        criterion = LateralAccelerationTest(self.vehicle, 0.1)
+        # Standing still, with some noise in the velocity of the simulation
+        self.drive([criterion], lambda t: (0.01 * math.sin(t * 10.0), 0.01 * math.cos(t * 7.0), 0.0),
+                   30)
+        self.assertEqual(criterion.actual_value, 0.0)
+
+    def test_parameters(self):
+        with self.assertRaises(ValueError):
+            AccelerationTest(self.vehicle, 1.0, metric="mean")
+        with self.assertRaises(ValueError):
+            JerkTest(self.vehicle, 1.0, window=CarlaDataProvider.HISTORY_LENGTH - 1)
+        with self.assertRaises(NotImplementedError):
+            ComfortTest("Comfort", self.vehicle, 1.0)._values(None, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
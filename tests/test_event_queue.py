@@ -0,0 +1,66 @@
+import threading
+import unittest
+
+from utility.event_queue import EventQueue
+
+
+class EventQueueTest(unittest.TestCase):
+
+    def test_drain_in_order(self):
+        queue = EventQueue()
+        for record in range(5):
+            queue.put(record)
+        self.assertEqual(len(queue), 5)
+        self.assertEqual(queue.drain(), [0, 1, 2, 3, 4])
+        self.assertEqual(queue.drain(), [])
+        self.assertEqual(queue.take_dropped(), 0)
+
+    def test_drop_oldest(self):
+        queue = EventQueue(maxlen=3)
+        for record in range(5):
+            queue.put(record)
+        self.assertEqual(queue.drain(), [2, 3, 4])
+        self.assertEqual(queue.dropped, 2)
+        self.assertEqual(queue.take_dropped(), 2)
+        # Only the drops since the last call
+        self.assertEqual(queue.take_dropped(), 0)
+        for record in range(5, 9):
+            queue.put(record)
+        self.assertEqual(queue.take_dropped(), 1)
+        self.assertEqual(queue.dropped, 3)
+
+    def test_producer_threads(self):
+        # One queue per producer (like the batch criteria, one per vehicle sensor),
+        # drained by a single consumer while the producers are running
+        producers = 4
+        records = 20000
+        queues = [EventQueue(maxlen=64) for _ in range(producers)]
+        received = [[] for _ in range(producers)]
+        dropped = [0] * producers
+
+        def produce(queue):
+            for record in range(records):
+                queue.put(record)
+
+        threads = [threading.Thread(target=produce, args=(queue,)) for queue in queues]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for index, queue in enumerate(queues):
+                received[index].extend(queue.drain())
+                dropped[index] += queue.take_dropped()
+        for thread in threads:
+            thread.join()
+        for index, queue in enumerate(queues):
+            received[index].extend(queue.drain())
+            dropped[index] += queue.take_dropped()
+
+        for index in range(producers):
+            # Every record is either received (in order) or counted as dropped
+            self.assertEqual(len(received[index]) + dropped[index], records)
+            self.assertEqual(received[index], sorted(received[index]))
+            self.assertEqual(len(set(received[index])), len(received[index]))
+
+
+if __name__ == '__main__':
+    unittest.main()
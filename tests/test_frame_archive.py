@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from utility.frame_archive import FrameArchive, FrameArchiveWriter, HEADER_SIZE, INDEX_FILE, SEGMENT_FILE
+
+
+class FrameArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_directory = tempfile.mkdtemp()
+        self.directory = os.path.join(self.temp_directory, 'archive')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_directory)
+
+    def write_frames(self, count, segment_size=1 << 30):
+        frames = [np.random.RandomState(frame).randint(0, 256, (3, 4, 4)).astype(np.uint8)
+                  for frame in range(count)]
+        with FrameArchiveWriter(self.directory, segment_size=segment_size,
+                                metadata={'sensor': 'test'}) as writer:
+            for frame, pixels in enumerate(frames):
+                writer.add(frame, pixels.tobytes(), width=4, height=3, timestamp=0.5 * frame)
+        return frames
+
+    def test_round_trip(self):
+        frames = self.write_frames(10, segment_size=100)
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, SEGMENT_FILE % 1)))
+        with FrameArchive(self.directory) as archive:
+            self.assertEqual(archive.header['metadata'], {'sensor': 'test'})
+            self.assertEqual(len(archive), 10)
+            self.assertEqual(list(archive.frames), list(range(10)))
+            entry, pixels = archive.read(7)
+            self.assertEqual(entry['timestamp'], 3.5)
+            np.testing.assert_array_equal(pixels, frames[7])
+            for frame, (_, pixels) in zip([9, 0, 4], archive.read_many([9, 0, 4])):
+                np.testing.assert_array_equal(pixels, frames[frame])
+            self.assertNotIn(10, archive)
+            with self.assertRaises(KeyError):
+                archive.read(10)
+
+    def test_raw_data(self):
+        with FrameArchiveWriter(self.directory) as writer:
+            writer.add(1, b'point cloud')
+        with FrameArchive(self.directory) as archive:
+            self.assertEqual(archive.read(1)[1].tobytes(), b'point cloud')
+
+    def test_empty_archive(self):
+        FrameArchiveWriter(self.directory).close()
+        with FrameArchive(self.directory) as archive:
+            self.assertEqual(len(archive), 0)
+
+    def test_truncated_index(self):
+        self.write_frames(5)
+        index_file = os.path.join(self.directory, INDEX_FILE)
+        entry_size = (os.path.getsize(index_file) - HEADER_SIZE) // 5
+        # Incomplete last entry
+        with open(index_file, 'r+b') as file_handle:
+            file_handle.truncate(HEADER_SIZE + 3 * entry_size + entry_size // 2)
+        with FrameArchive(self.directory) as archive:
+            self.assertEqual(list(archive.frames), [0, 1, 2])
+
+    def test_truncated_segment(self):
+        frames = self.write_frames(5)
+        segment_file = os.path.join(self.directory, SEGMENT_FILE % 0)
+        with open(segment_file, 'r+b') as file_handle:
+            file_handle.truncate(os.path.getsize(segment_file) - 1)
+        with FrameArchive(self.directory) as archive:
+            self.assertEqual(list(archive.frames), [0, 1, 2, 3])
+            np.testing.assert_array_equal(archive.read(3)[1], frames[3])
+
+        # Entries of an empty segment are ignored as well
+        open(segment_file, 'wb').close()
+        with FrameArchive(self.directory) as archive:
+            self.assertEqual(len(archive), 0)
+
+    def test_readable_while_writing(self):
+        writer = FrameArchiveWriter(self.directory)
+        writer.add(1, b'first')
+        with FrameArchive(self.directory) as archive:
+            self.assertEqual(archive.read(1)[1].tobytes(), b'first')
+        writer.close()
+
+    def test_existing_directory(self):
+        self.write_frames(1)
+        with self.assertRaises(OSError):
+            FrameArchiveWriter(self.directory)
+        with FrameArchiveWriter(self.directory, unique=True) as writer:
+            self.assertEqual(writer.directory, self.directory + '_1')
+        # The first archive is untouched
+        with FrameArchive(self.directory) as archive:
+            self.assertEqual(len(archive), 1)
+
+    def test_not_an_archive(self):
+        os.makedirs(self.directory)
+        with open(os.path.join(self.directory, INDEX_FILE), 'wb') as file_handle:
+            file_handle.write(b'\0' * HEADER_SIZE)
+        with self.assertRaises(ValueError):
+            FrameArchive(self.directory)
+
+    def test_add_after_close(self):
+        writer = FrameArchiveWriter(self.directory)
+        writer.close()
+        with self.assertRaises(RuntimeError):
+            writer.add(1, b'data')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import unittest
+
+from utility.mailbox import Mailbox
+
+
+class MailboxTest(unittest.TestCase):
+
+    def test_latest_overwrites(self):
+        mailbox = Mailbox(Mailbox.LATEST)
+        self.assertIsNone(mailbox.post('a', 1))
+        self.assertEqual(mailbox.post('b', 2), 'a')
+        self.assertEqual(len(mailbox), 1)
+        self.assertEqual(mailbox.take(), (2, 'b'))
+        self.assertIsNone(mailbox.take())
+        self.assertEqual(mailbox.get_statistics(), {
+            "posted": 2, "delivered": 1, "overwritten": 1, "stale": 1, "pending": 0})
+
+    def test_recycling(self):
+        # Like the camera: the producer reuses overwritten buffers and the buffers the
+        # consumer released, so only a few buffers are ever allocated
+        mailbox = Mailbox(Mailbox.LATEST)
+        free = []
+        allocations = [0]
+
+        def produce(frame):
+            if free:
+                buffer = free.pop()
+            else:
+                buffer = bytearray(4)
+                allocations[0] += 1
+            overwritten = mailbox.post(buffer, frame)
+            if overwritten is not None:
+                free.append(overwritten)
+
+        shown = None
+        for frame in range(100):
+            produce(2 * frame)
+            produce(2 * frame + 1)
+            taken_frame, taken = mailbox.take()
+            self.assertEqual(taken_frame, 2 * frame + 1)
+            if shown is not None:
+                free.append(shown)
+            shown = taken
+        self.assertEqual(allocations[0], 3)
+        self.assertEqual(mailbox.overwritten, 100)
+
+    def test_queued(self):
+        mailbox = Mailbox(Mailbox.QUEUED, maxlen=3)
+        for frame in range(5):
+            mailbox.post('item %d' % frame, frame)
+        self.assertEqual(mailbox.take(), (2, 'item 2'))
+        self.assertEqual(mailbox.take_all(), [(3, 'item 3'), (4, 'item 4')])
+        self.assertEqual(mailbox.take_all(), [])
+        statistics = mailbox.get_statistics()
+        self.assertEqual(statistics['overwritten'], 2)
+        self.assertEqual(statistics['delivered'], 3)
+        self.assertEqual(statistics['stale'], 1)
+
+    def test_clear(self):
+        mailbox = Mailbox(Mailbox.QUEUED)
+        mailbox.post('a')
+        mailbox.post('b')
+        self.assertEqual(mailbox.clear(), ['a', 'b'])
+        self.assertEqual(len(mailbox), 0)
+        self.assertEqual(mailbox.get_statistics()['delivered'], 0)
+
+    def test_concurrent_producer(self):
+        mailbox = Mailbox(Mailbox.QUEUED, maxlen=100000)
+
+        def produce():
+            for frame in range(10000):
+                mailbox.post(frame, frame)
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        taken = []
+        while thread.is_alive() or len(mailbox):
+            taken.extend(frame for frame, _ in mailbox.take_all())
+        thread.join()
+        self.assertEqual(taken, list(range(10000)))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            Mailbox('unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ScenarioManager.carla_data_provider import CarlaDataProvider
+from ScenarioManager.offline_evaluation import replay_criteria, rescore
+from ScenarioManager.timer import GameTime
+from tests.fakes import FakeVehicle, Vector
+from utility.telemetry import TelemetryRecorder
+
+try:
+    from ScenarioManager.atomic_scenario_criteria import (
+        AverageVelocityTest, DrivenDistanceTest, MaxVelocityTest)
+except RuntimeError:
+    # The criteria require the carla package
+    MaxVelocityTest = None
+
+
+class OfflineEvaluationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_recording(self, name, frames, acceleration=1.0, seed=1):
+        """
+        Record an ego vehicle accelerating from 2 m/s (with a small lateral drift) and
+        a vehicle standing next to it
+        """
+        filename = os.path.join(self.directory, name + '.tel')
+        ego = FakeVehicle(velocity=(2.0, 0.5, 0.0))
+        other = FakeVehicle(location=(0.0, 3.5, 0.0))
+        metadata = {"scenario": "FollowLeadingVehicle", "seed": seed}
+        with TelemetryRecorder(filename, [ego, other], capacity=16, metadata=metadata) as recorder:
+            for frame in range(1, frames + 1):
+                ego.velocity = Vector(2.0 + acceleration * 0.05 * frame, 0.5, 0.0)
+                ego.drive(0.05)
+                recorder.record(frame, 0.05 * frame)
+        return filename, ego.id
+
+    def test_rescore(self):
+        filename, ego_id = self.make_recording('run', 100)
+        result = rescore([filename], [("CheckMaximumVelocity", 7.5, None),
+                                      ("CheckDrivenDistance", 50.0, 10.0)])[0]
+        self.assertEqual(result["file"], filename)
+        self.assertEqual(result["scenario"], "FollowLeadingVehicle")
+        self.assertEqual(result["seed"], 1)
+        max_velocity, distance = result["criteria"]
+        self.assertEqual(max_velocity["vehicle_id"], ego_id)
+        self.assertEqual(max_velocity["status"], "SUCCESS")
+        self.assertAlmostEqual(max_velocity["actual_value"], (7.0**2 + 0.5**2) ** 0.5, places=5)
+        self.assertEqual(distance["status"], "ACCEPTABLE")
+
+        # Other actors of the recording
+        result = rescore([filename], [("CheckMaximumVelocity", 6.5, None)], actor=1)[0]
+        self.assertEqual(result["criteria"][0]["actual_value"], 0.0)
+
+    def test_rescore_processes(self):
+        filenames = [self.make_recording('run_%d' % i, 20 + i, seed=i)[0] for i in range(4)]
+        criteria = [("CheckAverageVelocity", 2.5, 2.0), ("CheckDrivenDistance", 2.0, None)]
+        self.assertEqual(rescore(filenames, criteria, processes=2), rescore(filenames, criteria))
+
+    def test_empty_recording(self):
+        filename, _ = self.make_recording('empty', 0)
+        result = rescore([filename], [("CheckMaximumVelocity", 6.5, None)])[0]
+        self.assertEqual(result["criteria"][0]["status"], "INIT")
+
+    @unittest.skipIf(MaxVelocityTest is None, "requires the carla package")
+    def test_replay_matches_rescore(self):
+        filename, _ = self.make_recording('run', 200)
+        game_time_state = (12.5, 250)
+        GameTime.set_state(game_time_state)
+
+        for (max_velocity, distance, average), statuses in (
+                ((10.0, (100.0, 20.0), (6.0, 3.0)), ["FAILURE", "ACCEPTABLE", "SUCCESS"]),
+                ((13.0, (30.0, None), (9.0, None)), ["SUCCESS", "SUCCESS", "RUNNING"])):
+            criteria = replay_criteria(filename, lambda vehicles: [
+                MaxVelocityTest(vehicles[0], max_velocity),
+                DrivenDistanceTest(vehicles[0], *distance),
+                AverageVelocityTest(vehicles[0], *average)])
+            expected = rescore([filename], [("CheckMaximumVelocity", max_velocity, None),
+                                            ("CheckDrivenDistance",) + distance,
+                                            ("CheckAverageVelocity",) + average])[0]["criteria"]
+
+            self.assertEqual([criterion.test_status for criterion in criteria], statuses)
+            for criterion, result in zip(criteria, expected):
+                self.assertEqual(criterion.name, result["name"])
+                self.assertEqual(criterion.test_status, result["status"])
+                # The replay computes in float64 from the recorded float32 state
+                self.assertAlmostEqual(criterion.actual_value, result["actual_value"], places=4,
+                                       msg=criterion.name)
+
+        # The replay does not leave state behind
+        self.assertEqual(GameTime.get_state(), game_time_state)
+        self.assertEqual(CarlaDataProvider._vehicle_velocity_map, {})
+        GameTime.set_state((0.0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+
+import py_trees
+
+from scenario_management.scenario_definition.scenarios.scenario import Scenario
+from scenario_management.scenario_manager.orchestrator import Orchestrator
+from scenario_management.scenario_manager.tracker import Tracker
+from tests.fakes import FakeVehicle, FakeWorld, TickCount
+
+
+class FakeCriterion(py_trees.behaviour.Behaviour):
+
+    """
+    Criterion that succeeds on every tick, or raises on the given tick
+    """
+
+    def __init__(self, vehicle, fail_on_tick=None, name="FakeCriterion"):
+        super(FakeCriterion, self).__init__(name)
+        self.vehicle = vehicle
+        self.optional = False
+        self.final = False
+        self.test_status = "INIT"
+        self.actual_value = 0
+        self.expected_value_success = 0
+        self.expected_value_acceptable = None
+        self.terminate_on_failure = False
+        self._fail_on_tick = fail_on_tick
+        self.terminated = False
+
+    def update(self):
+        self.actual_value += 1
+        if self.actual_value == self._fail_on_tick:
+            raise ValueError("criterion failed")
+        self.test_status = "SUCCESS"
+        return py_trees.common.Status.RUNNING
+
+    def terminate(self, new_status):
+        self.terminated = True
+
+
+class FakeScenario(Scenario):
+
+    def __init__(self, name, ticks=5, fail_on_tick=None):
+        super(FakeScenario, self).__init__()
+        self.name = name
+        self._ticks = ticks
+        self._fail_on_tick = fail_on_tick
+        self.criteria = []
+
+    def generate_actors(self, world):
+        self.ego_vehicle = FakeVehicle(velocity=(10.0, 0.0, 0.0))
+        self.other_vehicles = [FakeVehicle(location=(20.0, 0.0, 0.0))]
+        world.vehicles.append(self.ego_vehicle)
+
+    def generate_scenario_behaviour(self):
+        return TickCount(self._ticks)
+
+    def generate_test_conditions(self):
+        self.criteria = [FakeCriterion(self.ego_vehicle, self._fail_on_tick)]
+        return self.criteria
+
+    def actors(self):
+        return [self.ego_vehicle] + self.other_vehicles
+
+
+class OrchestratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.world = FakeWorld()
+        self.world.start()
+
+    def tearDown(self):
+        self.world.stop()
+
+    def assert_cleaned_up(self, scenarios):
+        for scenario in scenarios:
+            for actor in scenario.actors():
+                self.assertFalse(actor.is_alive, scenario.name)
+        self.assertEqual(Tracker.vehicles, [])
+
+    def run_and_check(self, run_in_parallel):
+        scenarios = [FakeScenario('scenario_%d' % i, ticks=3 + i) for i in range(3)]
+        orchestrator = Orchestrator(self.world, run_in_parallel)
+        metrics = orchestrator.run_scenarios(scenarios)
+
+        self.assertEqual([result['scenario'] for result in metrics],
+                         ['scenario_0', 'scenario_1', 'scenario_2'])
+        self.assertEqual([result['result'] for result in metrics], ['SUCCESS'] * 3)
+        for scenario, result in zip(scenarios, metrics):
+            # The behaviour ends the scenario on its last tick
+            self.assertEqual(result['criteria'][0]['actual_value'], scenario._ticks)
+            self.assertEqual(result['criteria'][0]['vehicle_id'], scenario.ego_vehicle.id)
+            self.assertTrue(scenario.criteria[0].terminated)
+        self.assert_cleaned_up(scenarios)
+
+    def test_sequential(self):
+        self.run_and_check(False)
+
+    def test_pipelined(self):
+        self.run_and_check(True)
+
+    def test_tick_error_sequential(self):
+        scenarios = [FakeScenario('ok'), FakeScenario('broken', fail_on_tick=2), FakeScenario('next')]
+        orchestrator = Orchestrator(self.world, False)
+        with self.assertRaises(ValueError):
+            orchestrator.run_scenarios(scenarios)
+        self.assert_cleaned_up(scenarios[:2])
+        self.assertIsNone(scenarios[2].ego_vehicle)
+
+    def test_tick_error_pipelined(self):
+        scenarios = [FakeScenario('broken', ticks=50, fail_on_tick=3), FakeScenario('prepared')]
+        orchestrator = Orchestrator(self.world, True)
+        with self.assertRaises(ValueError):
+            orchestrator.run_scenarios(scenarios)
+        # The scenario prepared in the background is removed as well
+        self.assert_cleaned_up(scenarios)
+        self.assertTrue(scenarios[1].criteria[0].terminated)
+        self.assertIsNone(orchestrator._setup_executor)
+        self.assertIsNone(orchestrator._metrics_executor)
+
+        # The orchestrator can be used again
+        self.assertEqual(orchestrator.run_scenarios([FakeScenario('again')])[0]['result'], 'SUCCESS')
+
+    def test_tick_timeout(self):
+        self.world.stop()
+        scenarios = [FakeScenario('stalled'), FakeScenario('prepared')]
+        orchestrator = Orchestrator(self.world, True, tick_timeout=0.2)
+        with self.assertRaises(RuntimeError):
+            orchestrator.run_scenarios(scenarios)
+        self.assert_cleaned_up(scenarios)
+
+
+if __name__ == '__main__':
+    unittest.main()
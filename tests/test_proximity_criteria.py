@@ -0,0 +1,104 @@
+import unittest
+
+import py_trees
+
+try:
+    from scenario_management.scenario_definition.tests.test import (
+        FollowingGapTest, HeadwayTest, TimeToCollisionTest)
+except RuntimeError as error:
+    # The criteria require the carla package
+    raise unittest.SkipTest(str(error))
+
+from scenario_management.scenario_manager.tracker import Tracker
+from tests.fakes import FakeVehicle
+
+
+class ProximityCriteriaTest(unittest.TestCase):
+
+    def setUp(self):
+        Tracker.reset()
+        self.ego = FakeVehicle(velocity=(10.0, 0.0, 0.0))
+        # Vehicle ahead in the lane of the ego vehicle
+        self.ahead = FakeVehicle(location=(40.0, 0.5, 0.0), velocity=(5.0, 0.0, 0.0))
+        # Faster vehicle in the neighbouring lane, it does not approach
+        self.neighbour = FakeVehicle(location=(10.0, 3.5, 0.0), velocity=(12.0, 0.0, 0.0))
+        # Vehicle approaching on the neighbouring lane
+        self.oncoming = FakeVehicle(location=(30.0, -3.5, 0.0), velocity=(-10.0, 0.0, 0.0), yaw=180.0)
+        self.vehicles = [self.ego, self.ahead, self.neighbour, self.oncoming]
+        Tracker.track_vehicles(self.vehicles)
+
+    def tearDown(self):
+        Tracker.reset()
+
+    def drive(self, criterion, ticks, delta_seconds=0.1):
+        for _ in range(ticks):
+            for vehicle in self.vehicles:
+                vehicle.drive(delta_seconds)
+            Tracker.on_update()
+            criterion.tick_once()
+
+    def test_time_to_collision(self):
+        criterion = TimeToCollisionTest(self.ego, 4.0, 2.0)
+        criterion.tick_once()
+        # Not updated yet
+        self.assertEqual(criterion.actual_value, TimeToCollisionTest.horizon)
+
+        self.drive(criterion, 1)
+        # The oncoming vehicle is closer but on the other lane: 39.5 m at 5 m/s
+        self.assertAlmostEqual(criterion.actual_value, 39.5 / 5.0, places=2)
+        self.assertEqual(criterion.test_status, "SUCCESS")
+
+        self.drive(criterion, 50)
+        self.assertAlmostEqual(criterion.actual_value, 14.5 / 5.0, places=2)
+        self.assertEqual(criterion.test_status, "ACCEPTABLE")
+
+        self.drive(criterion, 30)
+        self.assertEqual(criterion.test_status, "FAILURE")
+        self.assertTrue(criterion.final)
+
+    def test_time_to_collision_out_of_horizon(self):
+        self.ahead.velocity = self.ego.velocity
+        criterion = TimeToCollisionTest(self.ego, 4.0)
+        self.drive(criterion, 10)
+        self.assertEqual(criterion.actual_value, TimeToCollisionTest.horizon)
+        self.assertEqual(criterion.test_status, "SUCCESS")
+
+    def test_headway(self):
+        criterion = HeadwayTest(self.ego, 2.0, 1.0)
+        self.drive(criterion, 1)
+        # Gap of 39.5 m at 10 m/s
+        self.assertAlmostEqual(criterion.actual_value, 3.95)
+        self.assertEqual(criterion.test_status, "SUCCESS")
+
+        self.drive(criterion, 50)
+        self.assertAlmostEqual(criterion.actual_value, 1.45)
+        self.assertEqual(criterion.test_status, "ACCEPTABLE")
+
+    def test_headway_standing(self):
+        self.ego.velocity = self.ego.velocity._replace(x=0.0)
+        criterion = HeadwayTest(self.ego, 2.0)
+        self.drive(criterion, 5)
+        self.assertEqual(criterion.actual_value, HeadwayTest.horizon)
+
+    def test_following_gap(self):
+        criterion = FollowingGapTest(self.ego, 30.0, 10.0)
+        criterion.terminate_on_failure = True
+        self.drive(criterion, 1)
+        self.assertAlmostEqual(criterion.actual_value, 39.5)
+        self.assertEqual(criterion.status, py_trees.common.Status.RUNNING)
+
+        self.drive(criterion, 70)
+        self.assertEqual(criterion.test_status, "FAILURE")
+        self.assertEqual(criterion.status, py_trees.common.Status.FAILURE)
+        # Final, the minimum is kept
+        self.assertAlmostEqual(criterion.actual_value, 9.5)
+
+    def test_no_vehicle_ahead(self):
+        Tracker.untrack_vehicle(self.ahead)
+        criterion = FollowingGapTest(self.ego, 30.0)
+        self.drive(criterion, 10)
+        self.assertEqual(criterion.actual_value, FollowingGapTest.horizon)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from ScenarioManager.result_store import ResultStore
+
+
+def make_record(scenario="FollowLeadingVehicle", result="SUCCESS", seed=42, start_time=0.0,
+                criteria=(("CheckCollisions", "SUCCESS", 0.0),)):
+    return {
+        "scenario": scenario,
+        "result": result,
+        "seed": seed,
+        "parameters": {"speed": 10, "distance": 25.0},
+        "start_time": start_time,
+        "end_time": start_time + 1.0,
+        "scenario_duration_system": 1.0,
+        "scenario_duration_game": 10.0,
+        "timeout": 60,
+        "tick_count": 200,
+        "tick_duration_mean": 0.005,
+        "tick_duration_max": 0.02,
+        "criteria": [{
+            "name": name,
+            "vehicle_type": "vehicle.audi.tt",
+            "vehicle_id": 7,
+            "optional": False,
+            "status": status,
+            "actual_value": value,
+            "expected_value_success": 0,
+            "expected_value_acceptable": None} for name, status, value in criteria]}
+
+
+class ResultStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'results.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_schema(self):
+        with ResultStore(self.filename) as store:
+            tables = store.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+            self.assertEqual(tables, [('criteria',), ('runs',)])
+            indexes = store.execute(
+                "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' ORDER BY name")
+            self.assertEqual(indexes, [('criteria_name', 'criteria'), ('criteria_run', 'criteria'),
+                                       ('runs_scenario', 'runs'), ('runs_seed', 'runs')])
+            self.assertEqual(store.execute("PRAGMA journal_mode"), [('wal',)])
+
+            # Queries by seed use the index
+            plan = store.execute("EXPLAIN QUERY PLAN SELECT id FROM runs WHERE seed = 1")
+            self.assertIn('runs_seed', plan[0][-1])
+
+    def test_in_memory(self):
+        with ResultStore(':memory:') as store:
+            self.assertEqual(store.add(make_record()), 1)
+            self.assertEqual(store.pass_rates(), [('FollowLeadingVehicle', 1, 1)])
+
+    def test_add(self):
+        with ResultStore(self.filename) as store:
+            run_id = store.add(make_record(
+                criteria=(("CheckCollisions", "SUCCESS", 0.0), ("CheckMaximumVelocity", "FAILURE", 12.5))))
+            runs = store.execute(
+                "SELECT id, scenario, result, seed, parameters, duration_game, tick_count FROM runs")
+            self.assertEqual(runs, [(run_id, 'FollowLeadingVehicle', 'SUCCESS', 42,
+                                     '{"distance": 25.0, "speed": 10}', 10.0, 200)])
+            criteria = store.execute(
+                "SELECT run_id, name, vehicle_id, optional, status, actual_value, "
+                "expected_value_acceptable FROM criteria ORDER BY name")
+            self.assertEqual(criteria, [(run_id, 'CheckCollisions', 7, 0, 'SUCCESS', 0.0, None),
+                                        (run_id, 'CheckMaximumVelocity', 7, 0, 'FAILURE', 12.5, None)])
+
+    def test_queries(self):
+        with ResultStore(self.filename) as store:
+            first = store.add(make_record(seed=1, start_time=1.0))
+            second = store.add(make_record(result="FAILURE", seed=2, start_time=2.0,
+                                           criteria=(("CheckCollisions", "FAILURE", 2.0),)))
+            store.add(make_record("OtherLeadingVehicle", result="ACCEPTABLE", seed=3, start_time=3.0))
+
+            self.assertEqual(store.pass_rates(),
+                             [('FollowLeadingVehicle', 2, 1), ('OtherLeadingVehicle', 1, 1)])
+            self.assertEqual(store.pass_rates(since=2.0),
+                             [('FollowLeadingVehicle', 1, 0), ('OtherLeadingVehicle', 1, 1)])
+            self.assertEqual(store.criterion_values('FollowLeadingVehicle', 'CheckCollisions'),
+                             [(first, 1, 'SUCCESS', 0.0), (second, 2, 'FAILURE', 2.0)])
+            self.assertEqual(store.failures('CheckCollisions'),
+                             [(second, 'FollowLeadingVehicle', 2, 2.0, 0.0)])
+            self.assertEqual(store.failures('CheckCollisions', since=3.0), [])
+
+    def test_reopen(self):
+        with ResultStore(self.filename) as store:
+            store.add(make_record(seed=1))
+        # Opening an existing database keeps its runs, new runs are appended
+        with ResultStore(self.filename) as store:
+            self.assertEqual(store.add(make_record(seed=2)), 2)
+            self.assertEqual(store.execute("SELECT seed FROM runs ORDER BY id"), [(1,), (2,)])
+            self.assertEqual(store.execute("SELECT COUNT(*) FROM criteria"), [(2,)])
+
+        # Every run is committed when it is added
+        connection = sqlite3.connect(self.filename)
+        try:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM runs").fetchone(), (2,))
+        finally:
+            connection.close()
+
+    def test_failed_insert_is_rolled_back(self):
+        record = make_record()
+        del record["criteria"][0]["status"]
+        with ResultStore(self.filename) as store:
+            with self.assertRaises(KeyError):
+                store.add(record)
+            self.assertEqual(store.execute("SELECT COUNT(*) FROM runs"), [(0,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
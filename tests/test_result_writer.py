@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from ScenarioManager.result_writer import ReportWriter
+
+
+def make_record(scenario="FollowLeadingVehicle", result="SUCCESS", status="SUCCESS",
+                name="CheckCollisions", duration_game=10.0):
+    return {
+        "scenario": scenario,
+        "result": result,
+        "seed": 42,
+        "parameters": {},
+        "start_time": 0.0,
+        "end_time": 1.0,
+        "scenario_duration_system": 1.0,
+        "scenario_duration_game": duration_game,
+        "timeout": 60,
+        "tick_count": 10,
+        "tick_duration_mean": 0.01,
+        "tick_duration_max": 0.02,
+        "criteria": [{
+            "name": name,
+            "vehicle_type": "vehicle.audi.tt",
+            "vehicle_id": 7,
+            "optional": False,
+            "status": status,
+            "actual_value": 1.0,
+            "expected_value_success": 0,
+            "expected_value_acceptable": None}]}
+
+
+class ReportWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.junit = os.path.join(self.directory, 'results.xml')
+        self.json_lines = os.path.join(self.directory, 'results.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_all_records_in_one_report(self):
+        with ReportWriter(junit=self.junit, json_lines=self.json_lines) as report:
+            report.add(make_record())
+            report.add(make_record(result="FAILURE", status="FAILURE"))
+            report.add(make_record(duration_game=60.0))
+
+        testsuites = ElementTree.parse(self.junit).getroot()
+        self.assertEqual(testsuites.tag, 'testsuites')
+        suites = testsuites.findall('testsuite')
+        self.assertEqual(len(suites), 3)
+        self.assertEqual([suite.get('failures') for suite in suites], ['0', '1', '1'])
+        self.assertEqual([len(suite.findall('testcase')) for suite in suites], [2, 2, 2])
+        self.assertIsNotNone(suites[2].find("testcase[@name='Duration']/failure"))
+
+        with open(self.json_lines) as file_handle:
+            records = [json.loads(line) for line in file_handle]
+        self.assertEqual([record["result"] for record in records],
+                         ["SUCCESS", "FAILURE", "SUCCESS"])
+
+    def test_json_lines_are_appended(self):
+        with ReportWriter(json_lines=self.json_lines) as report:
+            report.add(make_record())
+        with ReportWriter(json_lines=self.json_lines) as report:
+            report.add(make_record())
+        with open(self.json_lines) as file_handle:
+            self.assertEqual(len(file_handle.readlines()), 2)
+
+    def test_records_are_flushed(self):
+        report = ReportWriter(json_lines=self.json_lines)
+        report.add(make_record())
+        with open(self.json_lines) as file_handle:
+            self.assertEqual(len(file_handle.readlines()), 1)
+        report.close()
+        # Can be called repeatedly
+        report.close()
+
+    def test_attribute_escaping(self):
+        scenario = 'Scenario "quoted" <&> \'single\''
+        with ReportWriter(junit=self.junit) as report:
+            report.add(make_record(scenario=scenario, name='Check<"&">'))
+        suite = ElementTree.parse(self.junit).getroot().find('testsuite')
+        self.assertEqual(suite.get('name'), scenario)
+        self.assertEqual(suite.find('testcase').get('name'), 'Check<"&">_audi.tt_7')
+        self.assertEqual(suite.find('testcase').get('classname'), 'Scenarios.' + scenario)
+
+    def test_cdata_end_in_failure_message(self):
+        name = 'Check]]>Split'
+        with ReportWriter(junit=self.junit) as report:
+            report.add(make_record(status="FAILURE", name=name))
+        failure = ElementTree.parse(self.junit).getroot().find('testsuite/testcase/failure')
+        self.assertEqual(failure.get('message'), name)
+        self.assertIn("Exact Value: {} = 1.0".format(name), failure.text)
+
+
+if __name__ == '__main__':
+    unittest.main()
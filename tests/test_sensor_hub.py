@@ -0,0 +1,142 @@
+import threading
+import unittest
+
+try:
+    from utility.sensor_hub import SensorHub
+except RuntimeError as error:
+    # The SensorHub requires the carla package
+    raise unittest.SkipTest(str(error))
+
+from tests.fakes import FakeVehicle, FakeWorld
+
+COLLISION = 'sensor.other.collision'
+LANE_DETECTOR = 'sensor.other.lane_detector'
+
+
+class SensorHubTest(unittest.TestCase):
+
+    def setUp(self):
+        self.world = FakeWorld()
+        self.vehicle = FakeVehicle(world=self.world)
+        self.subscriptions = []
+        self.received = []
+
+    def tearDown(self):
+        for subscription in self.subscriptions:
+            subscription.unsubscribe()
+        self.assertEqual(SensorHub.get_sensor_count(), 0)
+
+    def subscribe(self, name, sensor_type=COLLISION, vehicle=None):
+        subscription = SensorHub.subscribe(
+            vehicle or self.vehicle, sensor_type, lambda event: self.received.append((name, event)))
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def test_shared_sensor(self):
+        first = self.subscribe('first')
+        self.subscribe('second')
+        self.subscribe('lane', LANE_DETECTOR)
+        self.subscribe('other vehicle', vehicle=FakeVehicle(world=self.world))
+
+        # One sensor actor per (vehicle, sensor type), attached to the vehicle
+        self.assertEqual(SensorHub.get_sensor_count(), 3)
+        self.assertEqual(len(self.world.sensors), 3)
+        sensor = self.world.sensors[0]
+        self.assertEqual(sensor.type_id, COLLISION)
+        self.assertIs(sensor.parent, self.vehicle)
+
+        # Events are passed to all subscribers in the order of subscription
+        sensor.fire(1)
+        self.assertEqual(self.received, [('first', 1), ('second', 1)])
+
+        first.unsubscribe()
+        first.unsubscribe()
+        sensor.fire(2)
+        self.assertEqual(self.received[2:], [('second', 2)])
+        self.assertTrue(sensor.is_alive)
+
+    def test_destroy_with_last_subscription(self):
+        first = self.subscribe('first')
+        second = self.subscribe('second')
+        sensor = self.world.sensors[0]
+
+        first.unsubscribe()
+        self.assertTrue(sensor.is_alive)
+        second.unsubscribe()
+        self.assertFalse(sensor.is_alive)
+        self.assertEqual(SensorHub.get_sensor_count(), 0)
+
+        # Events still in flight of the destroyed sensor are dropped
+        sensor.fire(1)
+        self.assertEqual(self.received, [])
+
+        # A new subscription spawns a new sensor
+        self.subscribe('again')
+        self.assertEqual(len(self.world.alive_sensors()), 1)
+        self.assertIsNot(self.world.alive_sensors()[0], sensor)
+
+    def test_unsubscribe_during_dispatch(self):
+        subscriptions = []
+
+        def first(event):
+            self.received.append(('first', event))
+            # Ends its own and the following subscription
+            for subscription in subscriptions:
+                subscription.unsubscribe()
+
+        subscriptions.append(SensorHub.subscribe(self.vehicle, COLLISION, first))
+        subscriptions.append(self.subscribe('second'))
+        sensor = self.world.sensors[0]
+
+        # The event being dispatched still reaches all subscribers of the time it arrived
+        sensor.fire(1)
+        self.assertEqual(self.received, [('first', 1), ('second', 1)])
+        self.assertFalse(sensor.is_alive)
+        self.assertEqual(SensorHub.get_sensor_count(), 0)
+
+    def test_subscribe_during_dispatch(self):
+        def first(event):
+            self.received.append(('first', event))
+            if event == 1:
+                self.subscribe('late')
+
+        self.subscriptions.append(SensorHub.subscribe(self.vehicle, COLLISION, first))
+        sensor = self.world.sensors[0]
+        sensor.fire(1)
+        sensor.fire(2)
+        self.assertEqual(self.received, [('first', 1), ('first', 2), ('late', 2)])
+        self.assertEqual(len(self.world.sensors), 1)
+
+    def test_concurrent_subscriptions(self):
+        self.subscribe('permanent')
+        sensor = self.world.sensors[0]
+        stop = threading.Event()
+        errors = []
+
+        def dispatch():
+            event = 0
+            while not stop.is_set():
+                event += 1
+                try:
+                    sensor.fire(event)
+                except Exception as error:  # pylint: disable=broad-except
+                    errors.append(error)
+
+        thread = threading.Thread(target=dispatch)
+        thread.start()
+        try:
+            for _ in range(500):
+                SensorHub.subscribe(self.vehicle, COLLISION, lambda event: None).unsubscribe()
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.world.sensors), 1)
+        # Events of the permanent subscription arrive in order
+        events = [event for _, event in self.received]
+        self.assertEqual(events, sorted(events))
+
+
+if __name__ == '__main__':
+    unittest.main()
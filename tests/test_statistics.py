@@ -0,0 +1,105 @@
+import math
+import random
+import unittest
+
+from ScenarioManager.statistics import QuantileSketch
+
+
+class QuantileSketchTest(unittest.TestCase):
+
+    def test_empty(self):
+        sketch = QuantileSketch()
+        self.assertTrue(math.isnan(sketch.quantile(0.5)))
+        self.assertTrue(math.isnan(sketch.mean()))
+        self.assertIsNone(sketch.to_dict()["min"])
+
+    def test_relative_accuracy(self):
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in range(1, 1001):
+            sketch.add(value)
+        for q in (0.0, 0.25, 0.5, 0.95, 0.99, 1.0):
+            expected = 1 + q * 999
+            self.assertLessEqual(abs(sketch.quantile(q) - expected), 0.01 * expected + 1)
+        self.assertEqual(sketch.quantile(0.0), 1)
+        self.assertEqual(sketch.quantile(1.0), 1000)
+
+    def test_zero_and_negative_values(self):
+        sketch = QuantileSketch()
+        for value in (-4.0, -2.0, 0.0, 0.0, 3.0):
+            sketch.add(value)
+        self.assertAlmostEqual(sketch.quantile(0.0), -4.0, delta=0.04)
+        self.assertEqual(sketch.quantile(0.5), 0.0)
+        self.assertAlmostEqual(sketch.quantile(1.0), 3.0, delta=0.03)
+
+    def test_extreme_finite_values(self):
+        sketch = QuantileSketch()
+        for value in (5e-324, 1e308, -1e308):
+            sketch.add(value)
+        self.assertEqual(sketch.count, 3)
+        self.assertEqual(sketch.quantile(1.0), 1e308)
+        self.assertEqual(sketch.quantile(0.0), -1e308)
+
+    def test_non_finite_values(self):
+        sketch = QuantileSketch()
+        for value in (float('inf'), float('-inf'), float('nan'), 1.0):
+            sketch.add(value)
+        self.assertEqual(sketch.non_finite, 3)
+        self.assertEqual(sketch.count, 1)
+        self.assertEqual(sketch.sum, 1.0)
+        self.assertEqual(sketch.quantile(0.5), 1.0)
+
+    def test_merge_and_export(self):
+        first = QuantileSketch()
+        second = QuantileSketch()
+        for value in range(100):
+            first.add(value)
+            second.add(-value)
+        second.add(float('nan'))
+        first.merge(QuantileSketch.from_dict(second.to_dict()))
+        self.assertEqual(first.count, 200)
+        self.assertEqual(first.non_finite, 1)
+        self.assertEqual(first.min, -99)
+        self.assertEqual(first.max, 99)
+
+    def test_merge_different_accuracy(self):
+        with self.assertRaises(ValueError):
+            QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+    def test_collapse_lowest_buckets(self):
+        sketch = QuantileSketch(max_buckets=10)
+        for exponent in range(-50, 50):
+            sketch.add(10.0 ** exponent)
+        self.assertLessEqual(len(sketch.to_dict()["positive"]), 10)
+        self.assertAlmostEqual(sketch.quantile(1.0), 1e49, delta=1e47)
+
+    def test_collapse_matches_sorted_collapse(self):
+        # Reference: add each bucket and collapse the two lowest ones by sorting
+        def reference(indices, max_buckets):
+            buckets = dict()
+            for index in indices:
+                buckets[index] = buckets.get(index, 0) + 1
+                if len(buckets) > max_buckets:
+                    lowest = sorted(buckets)[:2]
+                    buckets[lowest[1]] += buckets.pop(lowest[0])
+            return buckets
+
+        rng = random.Random(0)
+        values = [rng.lognormvariate(0.0, 3.0) for _ in range(5000)]
+        values += [rng.uniform(1e-9, 1e-6) for _ in range(100)]
+        sketch = QuantileSketch(max_buckets=64)
+        for value in values:
+            sketch.add(value)
+        expected = reference([sketch._index(value) for value in values], 64)
+        self.assertEqual(dict(sketch._positive), expected)
+        self.assertEqual(sketch._positive.lowest, min(expected))
+
+        # The lowest bucket is restored on import, collapsing continues the same way
+        restored = QuantileSketch.from_dict(sketch.to_dict())
+        self.assertEqual(restored._positive.lowest, min(expected))
+        restored.add(1e-12)
+        self.assertEqual(dict(restored._positive)[min(expected)], expected[min(expected)] + 1)
+        self.assertEqual(len(restored._positive), 64)
+
+
+if __name__ == '__main__':
+    unittest.main()
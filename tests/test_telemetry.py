@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from tests.fakes import FakeVehicle, VehicleControl
+from utility.telemetry import HEADER_SIZE, TelemetryRecorder, load_telemetry, record_dtype
+
+
+class TelemetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'records', 'run.tel')
+        self.vehicles = [FakeVehicle(velocity=(10.0, 0.0, 0.0), yaw=90.0),
+                         FakeVehicle(location=(20.0, 3.5, 0.0), velocity=(-5.0, 1.0, 0.0))]
+        self.vehicles[0].control = VehicleControl(0.75, -0.25, 0.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, recorder, frames, first_frame=1):
+        for frame in range(first_frame, first_frame + frames):
+            for vehicle in self.vehicles:
+                vehicle.drive(0.05)
+            recorder.record(frame, 0.05 * frame)
+
+    def test_capacity_doubles(self):
+        itemsize = record_dtype(2).itemsize
+        with TelemetryRecorder(self.filename, self.vehicles, capacity=4) as recorder:
+            self.assertEqual(os.path.getsize(self.filename), HEADER_SIZE + 4 * itemsize)
+            self.record(recorder, 4)
+            self.assertEqual(os.path.getsize(self.filename), HEADER_SIZE + 4 * itemsize)
+            self.record(recorder, 1, first_frame=5)
+            self.assertEqual(os.path.getsize(self.filename), HEADER_SIZE + 8 * itemsize)
+            self.record(recorder, 4, first_frame=6)
+            self.assertEqual(os.path.getsize(self.filename), HEADER_SIZE + 16 * itemsize)
+            self.assertEqual(recorder.count, 9)
+
+            # Written records are visible while recording
+            _, records = load_telemetry(self.filename)
+            self.assertEqual(len(records), 9)
+
+        # The file is shrunk to the written records
+        self.assertEqual(os.path.getsize(self.filename), HEADER_SIZE + 9 * itemsize)
+
+    def test_round_trip(self):
+        metadata = {"scenario": "FollowLeadingVehicle", "seed": 42}
+        with TelemetryRecorder(self.filename, self.vehicles + [None], capacity=2,
+                               metadata=metadata) as recorder:
+            self.record(recorder, 20)
+
+        header, records = load_telemetry(self.filename)
+        self.assertEqual(header["actor_ids"], [vehicle.id for vehicle in self.vehicles])
+        self.assertEqual(header["actor_types"], ['vehicle.fake.car'] * 2)
+        self.assertEqual(header["metadata"], metadata)
+        self.assertEqual(records.shape, (20,))
+        np.testing.assert_array_equal(records['frame'], np.arange(1, 21))
+        np.testing.assert_allclose(records['game_time'], 0.05 * np.arange(1, 21))
+
+        ego = records['actors'][:, 0]
+        np.testing.assert_array_equal(ego['id'], self.vehicles[0].id)
+        np.testing.assert_allclose(ego['x'], 0.5 * np.arange(1, 21), rtol=1e-6)
+        np.testing.assert_allclose(ego['yaw'], 90.0)
+        np.testing.assert_allclose(ego['vx'], 10.0)
+        np.testing.assert_allclose(ego['throttle'], 0.75)
+        np.testing.assert_allclose(ego['steer'], -0.25)
+        other = records['actors'][-1, 1]
+        self.assertAlmostEqual(float(other['x']), 15.0, places=4)
+        self.assertAlmostEqual(float(other['y']), 4.5, places=4)
+
+    def test_dead_actor(self):
+        with TelemetryRecorder(self.filename, self.vehicles) as recorder:
+            self.record(recorder, 1)
+            self.vehicles[1].destroy()
+            self.record(recorder, 1, first_frame=2)
+        _, records = load_telemetry(self.filename)
+        self.assertEqual(int(records['actors'][0, 1]['id']), self.vehicles[1].id)
+        # The row of a destroyed actor is left empty
+        self.assertEqual(int(records['actors'][1, 1]['id']), 0)
+
+    def test_empty_recording(self):
+        TelemetryRecorder(self.filename, self.vehicles).close()
+        header, records = load_telemetry(self.filename)
+        self.assertEqual(len(header["actor_ids"]), 2)
+        self.assertEqual(records.shape, (0,))
+        self.assertEqual(os.path.getsize(self.filename), HEADER_SIZE)
+
+    def test_invalid_files(self):
+        with self.assertRaises(ValueError):
+            TelemetryRecorder(self.filename, self.vehicles, metadata={"notes": "x" * HEADER_SIZE})
+
+        other = os.path.join(self.directory, 'other.tel')
+        with open(other, 'wb') as file_handle:
+            file_handle.write(b'\0' * HEADER_SIZE)
+        with self.assertRaises(ValueError):
+            load_telemetry(other)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+
+from scenario_management.scenario_manager.tracker import Tracker
+from tests.fakes import FakeVehicle
+
+
+class TrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        Tracker.reset()
+
+    def tearDown(self):
+        Tracker.reset()
+
+    def test_track_and_untrack(self):
+        vehicles = [FakeVehicle() for _ in range(3)]
+        Tracker.track_vehicles(vehicles)
+        Tracker.track_vehicle(vehicles[0])
+        self.assertEqual(Tracker.vehicles, vehicles)
+        self.assertEqual([Tracker.get_index(vehicle) for vehicle in vehicles], [0, 1, 2])
+        self.assertEqual(Tracker.positions.shape, (3, 3))
+        self.assertEqual(Tracker.forward_vectors.shape, (3, 2))
+
+        Tracker.on_update()
+        Tracker.untrack_vehicle(vehicles[1])
+        self.assertEqual(Tracker.vehicles, [vehicles[0], vehicles[2]])
+        self.assertIsNone(Tracker.get_index(vehicles[1]))
+        self.assertEqual(Tracker.get_index(vehicles[2]), 1)
+        # Rows of the remaining vehicles keep their state
+        self.assertTrue(Tracker.updated.all())
+        self.assertEqual(Tracker.positions.shape, (2, 3))
+
+    def test_update(self):
+        vehicle = FakeVehicle(location=(1.0, 2.0, 0.0), velocity=(3.0, 4.0, 0.0), yaw=90.0)
+        Tracker.track_vehicle(vehicle)
+        self.assertIsNone(Tracker.get_odometer(vehicle))
+        self.assertEqual(Tracker.get_velocity(vehicle), 0.0)
+
+        Tracker.on_update()
+        np.testing.assert_allclose(Tracker.positions[0], (1.0, 2.0, 0.0))
+        np.testing.assert_allclose(Tracker.velocities[0], (3.0, 4.0, 0.0))
+        np.testing.assert_allclose(Tracker.forward_vectors[0], (0.0, 1.0), atol=1e-12)
+        self.assertAlmostEqual(Tracker.get_velocity(vehicle), 5.0)
+        self.assertEqual(Tracker.get_location(vehicle), vehicle.location)
+        self.assertEqual(Tracker.get_odometer(vehicle), 0.0)
+
+        for _ in range(4):
+            vehicle.drive(0.5)
+            Tracker.on_update()
+        self.assertAlmostEqual(Tracker.get_odometer(vehicle), 10.0)
+
+    def test_dead_vehicle_is_not_updated(self):
+        vehicle = FakeVehicle(location=(1.0, 0.0, 0.0))
+        Tracker.track_vehicle(vehicle)
+        Tracker.on_update()
+        vehicle.destroy()
+        vehicle.location = vehicle.location._replace(x=5.0)
+        Tracker.on_update()
+        np.testing.assert_allclose(Tracker.positions[0], (1.0, 0.0, 0.0))
+
+    def test_relative_motion(self):
+        ego = FakeVehicle(location=(10.0, 10.0, 0.0), velocity=(0.0, 10.0, 0.0), yaw=90.0)
+        ahead = FakeVehicle(location=(10.0, 30.0, 0.0), velocity=(0.0, 5.0, 0.0))
+        left = FakeVehicle(location=(7.0, 10.0, 0.0), velocity=(0.0, 10.0, 0.0))
+        behind = FakeVehicle(location=(10.0, 0.0, 0.0), velocity=(0.0, 12.0, 0.0))
+        Tracker.track_vehicles([ego, ahead, left, behind])
+        Tracker.on_update()
+
+        longitudinal, lateral, distance, closing_speed = Tracker.get_relative_motion(ego)
+        # Rows of the other vehicles in the order they were tracked
+        np.testing.assert_allclose(longitudinal, (20.0, 0.0, -10.0), atol=1e-12)
+        np.testing.assert_allclose(lateral, (0.0, 3.0, 0.0), atol=1e-12)
+        np.testing.assert_allclose(distance, (20.0, 3.0, 10.0))
+        np.testing.assert_allclose(closing_speed, (5.0, 0.0, 2.0), atol=1e-12)
+
+    def test_relative_motion_before_update(self):
+        ego = FakeVehicle()
+        other = FakeVehicle(location=(10.0, 0.0, 0.0))
+        Tracker.track_vehicles([ego, other])
+        for values in Tracker.get_relative_motion(ego):
+            self.assertEqual(values.shape, (0,))
+
+        # Vehicles tracked after the last update are left out
+        Tracker.on_update()
+        late = FakeVehicle(location=(20.0, 0.0, 0.0))
+        Tracker.track_vehicle(late)
+        longitudinal, _, _, _ = Tracker.get_relative_motion(ego)
+        np.testing.assert_allclose(longitudinal, (10.0,))
+
+        # The ego vehicle was not read yet
+        for values in Tracker.get_relative_motion(late):
+            self.assertEqual(values.shape, (0,))
+
+    def test_relative_motion_untracked(self):
+        for values in Tracker.get_relative_motion(FakeVehicle()):
+            self.assertEqual(values.shape, (0,))
+
+
+if __name__ == '__main__':
+    unittest.main()
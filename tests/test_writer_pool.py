@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+
+from utility.writer_pool import WriterPool
+
+
+class WriterPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        # Keeps the single worker busy until released
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def block_worker(self):
+        self.started.set()
+        self.release.wait(5.0)
+
+    def test_drop_oldest(self):
+        written = []
+        pool = WriterPool(workers=1, capacity=2, policy=WriterPool.DROP_OLDEST)
+        pool.submit(self.block_worker)
+        self.assertTrue(self.started.wait(5.0))
+        for value in range(5):
+            self.assertTrue(pool.submit(written.append, value))
+        self.release.set()
+        pool.close()
+        self.assertEqual(written, [3, 4])
+        statistics = pool.get_statistics()
+        self.assertEqual(statistics['dropped'], 3)
+        self.assertEqual(statistics['written'], 3)
+        self.assertEqual(statistics['pending'], 0)
+
+    def test_block(self):
+        written = []
+        pool = WriterPool(workers=1, capacity=1, policy=WriterPool.BLOCK)
+        pool.submit(self.block_worker)
+        self.assertTrue(self.started.wait(5.0))
+        pool.submit(written.append, 0)
+
+        submitted = threading.Event()
+
+        def submit():
+            pool.submit(written.append, 1)
+            submitted.set()
+
+        thread = threading.Thread(target=submit)
+        thread.start()
+        time.sleep(0.1)
+        # The queue is full, the submit waits for the worker
+        self.assertFalse(submitted.is_set())
+        self.release.set()
+        thread.join(5.0)
+        self.assertTrue(submitted.is_set())
+        pool.close()
+        self.assertEqual(written, [0, 1])
+        self.assertEqual(pool.get_statistics()['dropped'], 0)
+
+    def test_close_drains_pending_writes(self):
+        written = []
+        pool = WriterPool(workers=2, capacity=100)
+        for value in range(50):
+            pool.submit(written.append, value)
+        pool.close()
+        self.assertEqual(sorted(written), list(range(50)))
+        self.assertEqual(pool.get_statistics()['written'], 50)
+        # Can be called repeatedly
+        pool.close()
+
+    def test_submit_after_close(self):
+        written = []
+        pool = WriterPool(workers=1)
+        pool.close()
+        self.assertFalse(pool.submit(written.append, 0))
+        self.assertEqual(written, [])
+        self.assertEqual(pool.get_statistics()['submitted'], 0)
+
+    def test_flush(self):
+        written = []
+        pool = WriterPool(workers=2)
+        for value in range(10):
+            pool.submit(written.append, value)
+        pool.flush()
+        self.assertEqual(len(written), 10)
+        pool.close()
+
+    def test_failed_write(self):
+        def fail():
+            raise IOError("disk full")
+
+        pool = WriterPool(workers=1)
+        pool.submit(fail)
+        pool.close()
+        self.assertEqual(pool.get_statistics()['failed'], 1)
+        self.assertEqual(pool.get_statistics()['written'], 0)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            WriterPool(policy='unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
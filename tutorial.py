@@ -23,10 +23,24 @@ import carla
 import random
 import time
 
+from utility.frame_archive import FrameArchiveWriter
+from utility.map_cache import MapCache
+from utility.writer_pool import WriterPool
+
 
 def main():
     actor_list = []
 
+    # Encoding and saving the images takes longer than the sensor needs for
+    # the next one, so the images are written by a pool of background threads.
+    # If the pool falls behind, the oldest pending images are dropped.
+    # Instead of one file per image, the images are compressed and appended to
+    # a frame archive (read it with utility.frame_archive.FrameArchive).
+    writer = WriterPool(policy=WriterPool.DROP_OLDEST)
+    # A previous recording is kept, the archive then goes to _out/depth_1, ...
+    archive = FrameArchiveWriter('_out/depth', metadata={'sensor': 'sensor.camera.depth'},
+                                 unique=True)
+
     # In this tutorial script, we are going to add a vehicle to the simulation
     # and let it drive in autopilot. We will also create a camera attached to
     # that vehicle, and save all the images generated by the camera to disk.
@@ -58,7 +72,9 @@ def main():
 
         # Now we need to give an initial transform to the vehicle. We choose a
         # random transform from the list of recommended spawn points of the map.
-        transform = random.choice(world.get_map().get_spawn_points())
+        # The spawn points are cached on disk, so only the very first run has to
+        # query them from the server.
+        transform = random.choice(MapCache.get(world, client.get_server_version()).get_spawn_points())
 
         # So let's tell the worlds to spawn the vehicle.
         vehicle = world.spawn_actor(bp, transform)
@@ -84,9 +100,10 @@ def main():
 
         # Now we register the function that will be called each time the sensor
         # receives an image. In this example we are saving the image to disk
-        # converting the pixels to gray-scale.
+        # converting the pixels to gray-scale. The callback only hands the image
+        # to the writer pool, so it returns immediately.
         cc = carla.ColorConverter.LogarithmicDepth
-        camera.listen(lambda image: image.save_to_disk('_out/%06d.png' % image.frame_number, cc))
+        camera.listen(lambda image: writer.submit(archive.add_image, image, cc))
 
         # Oh wait, I don't like the location we gave to the vehicle, I'm going
         # to move it a bit forward.
@@ -119,6 +136,11 @@ def main():
         print('destroying actors')
         for actor in actor_list:
             actor.destroy()
+        writer.close()
+        archive.close()
+        print('images: %(written)d written, %(dropped)d dropped, %(failed)d failed' %
+              writer.get_statistics())
+        print('archive: %s' % archive.directory)
         print('done.')
 
 
@@ -0,0 +1,85 @@
+"""
+    The BlueprintCatalog provides a process-wide cache of the CARLA blueprint library.
+
+    Fetching the blueprint library and filtering it with wildcard patterns used to be
+    repeated for every vehicle and sensor that is spawned. The catalog fetches the
+    library once per world and remembers the blueprint ids matching each pattern.
+"""
+
+import threading
+
+from utility.random_source import RandomSource
+
+
+class BlueprintCatalog(object):
+
+    """
+        Cached blueprint library of a single CARLA world.
+
+        Blueprints handed out by the catalog are always copies, so setting attributes
+        (e.g. role_name or color) on them never leaks into the cache or into other
+        actors spawned from the same pattern.
+
+        Use BlueprintCatalog.get(world) to access the catalog of a world.
+    """
+
+    _catalogs = dict()
+    _lock = threading.Lock()
+
+    def __init__(self, world):
+        self._library = world.get_blueprint_library()
+        self._index = dict()
+
+    @staticmethod
+    def get(world):
+        """
+        Returns the catalog of the given world, creating it on first access
+        """
+        catalog = BlueprintCatalog._catalogs.get(world.id)
+        if catalog is None:
+            with BlueprintCatalog._lock:
+                catalog = BlueprintCatalog._catalogs.get(world.id)
+                if catalog is None:
+                    catalog = BlueprintCatalog(world)
+                    BlueprintCatalog._catalogs[world.id] = catalog
+        return catalog
+
+    @staticmethod
+    def reset():
+        """
+        Drop all cached catalogs, e.g. after the server loaded a new map
+        """
+        with BlueprintCatalog._lock:
+            BlueprintCatalog._catalogs.clear()
+
+    def find(self, blueprint_id):
+        """
+        Returns a copy of the blueprint with the given id
+        """
+        return self._library.find(blueprint_id)
+
+    def filter_ids(self, pattern):
+        """
+        Returns the ids of all blueprints matching the wildcard pattern.
+        The library is only filtered the first time a pattern is requested.
+        """
+        ids = self._index.get(pattern)
+        if ids is None:
+            ids = tuple(blueprint.id for blueprint in self._library.filter(pattern))
+            self._index[pattern] = ids
+        return ids
+
+    def filter(self, pattern):
+        """
+        Returns copies of all blueprints matching the wildcard pattern
+        """
+        return [self._library.find(blueprint_id) for blueprint_id in self.filter_ids(pattern)]
+
+    def choice(self, pattern, rng=None):
+        """
+        Returns a copy of a randomly chosen blueprint matching the wildcard pattern
+        By default the shared generator of the RandomSource is used
+        """
+        if rng is None:
+            rng = RandomSource.get_generator()
+        return self._library.find(rng.choice(self.filter_ids(pattern)))
@@ -0,0 +1,87 @@
+"""
+    Bounded event queue between the CARLA sensor thread and the scenario tick.
+
+    Sensor callbacks only convert the event into a compact record and append it to the
+    queue. The tick drains all pending records at once. Appending and popping a
+    collections.deque are atomic, so neither side takes a lock. If the consumer falls
+    behind, the oldest records are dropped. Dropped records still have to be counted by
+    the consumer (see take_dropped()), e.g. a dropped collision is still a collision.
+"""
+
+import collections
+
+
+CollisionEvent = collections.namedtuple(
+    'CollisionEvent', ['frame', 'other_actor_id', 'other_actor_type', 'impulse'])
+
+LaneInvasionEvent = collections.namedtuple(
+    'LaneInvasionEvent', ['frame', 'crossed_lane_markings'])
+
+
+def collision_record(event):
+    """
+    Converts a carla.CollisionEvent into a CollisionEvent record
+    """
+    impulse = event.normal_impulse
+    return CollisionEvent(event.frame_number, event.other_actor.id, event.other_actor.type_id,
+                          (impulse.x, impulse.y, impulse.z))
+
+
+def lane_invasion_record(event):
+    """
+    Converts a carla.LaneInvasionEvent into a LaneInvasionEvent record
+    """
+    return LaneInvasionEvent(event.frame_number,
+                             tuple(str(marking) for marking in event.crossed_lane_markings))
+
+
+class EventQueue(object):
+
+    """
+        Bounded queue for one producer (sensor callback) and one consumer (tick).
+        Sensors of different actors may call back from different threads, so use one
+        queue per sensor.
+    """
+
+    def __init__(self, maxlen=1024):
+        self._events = collections.deque(maxlen=maxlen)
+        self.dropped = 0
+        # Written by the producer only, the consumer keeps its own copy of the count it took
+        self._taken_dropped = 0
+
+    def put(self, record):
+        """
+        Append a record, dropping the oldest one if the queue is full
+        """
+        if len(self._events) == self._events.maxlen:
+            try:
+                self._events.popleft()
+                self.dropped += 1
+            except IndexError:
+                # Drained by the consumer in the meantime
+                pass
+        self._events.append(record)
+
+    def drain(self):
+        """
+        Remove and return all pending records (oldest first)
+        """
+        records = []
+        try:
+            while True:
+                records.append(self._events.popleft())
+        except IndexError:
+            pass
+        return records
+
+    def take_dropped(self):
+        """
+        Returns the number of records dropped since the last call
+        """
+        dropped = self.dropped
+        new_dropped = dropped - self._taken_dropped
+        self._taken_dropped = dropped
+        return new_dropped
+
+    def __len__(self):
+        return len(self._events)
@@ -0,0 +1,279 @@
+"""
+    The frame archive stores recorded sensor frames in a few large files instead of one
+    image file per frame.
+
+    An archive is a directory with:
+
+        index.bin: fixed size header (magic, JSON description) followed by one fixed-width
+                   entry per frame (frame, timestamp, segment, offset, length, width, height,
+                   raw_size)
+        segment_00000.bin, ...: zlib compressed frames, appended one after the other.
+                   A new segment is started once a segment exceeds segment_size.
+
+    Every frame is compressed on its own, so a frame can be read without touching the
+    others, and many frames can be decoded in parallel (zlib releases the GIL):
+
+        archive = FrameArchive('_out/recording')
+        entry, pixels = archive.read(1234)
+        frames = archive.read_many(archive.frames[::10])
+
+    The data of a frame is flushed to its segment before its index entry is written (and
+    flushed), so an archive of an interrupted recording contains all frames up to the last
+    complete index entry. The reader ignores entries whose data is missing in the segment
+    files (e.g. if the operating system did not write the files to disk).
+"""
+
+import concurrent.futures
+import errno
+import json
+import mmap
+import os
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    raise RuntimeError('cannot import numpy, make sure numpy package is installed')
+
+
+MAGIC = b'CARMAFRM'
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096
+INDEX_FILE = 'index.bin'
+SEGMENT_FILE = 'segment_%05d.bin'
+
+INDEX_DTYPE = np.dtype([
+    ('frame', np.int64),
+    ('timestamp', np.float64),
+    ('segment', np.uint32),
+    ('offset', np.uint64),
+    ('length', np.uint32),
+    ('width', np.uint32),
+    ('height', np.uint32),
+    ('raw_size', np.uint64)])
+
+
+class FrameArchiveWriter(object):
+
+    """
+        Appends frames to an archive (see module description).
+
+        add() can be called from several threads (e.g. the workers of a WriterPool):
+        frames are compressed in parallel, only appending them to the files is serialized.
+        Use as context manager, or call close().
+
+        The directory must not exist yet, an existing archive is never overwritten.
+
+        Important parameters:
+        - segment_size: Size in bytes after which a new segment file is started
+        - level: zlib compression level (1 is fastest)
+        - metadata: JSON-serializable description stored in the header (e.g. the sensor)
+        - unique: If the directory exists, use the first free directory_1, directory_2, ...
+          instead of raising (the directory actually used is stored in self.directory)
+    """
+
+    def __init__(self, directory, segment_size=1 << 30, level=1, metadata=None, unique=False):
+        self._segment_size = segment_size
+        self._level = level
+        self._lock = threading.Lock()
+
+        header = {
+            "version": FORMAT_VERSION,
+            "metadata": metadata or {}}
+        header = json.dumps(header).encode('utf-8')
+        if len(MAGIC) + 4 + len(header) > HEADER_SIZE:
+            raise ValueError("Frame archive header exceeds {} bytes".format(HEADER_SIZE))
+
+        self.directory = self._make_directory(directory, unique)
+
+        self._index = open(os.path.join(self.directory, INDEX_FILE), 'xb')
+        self._index.write(MAGIC + np.uint32(len(header)).tobytes() + header)
+        self._index.write(b'\0' * (HEADER_SIZE - self._index.tell()))
+
+        self._segment = None
+        self._segment_index = -1
+        self._segment_offset = 0
+        self.count = 0
+        self._start_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, frame, data, width=0, height=0, timestamp=0.0):
+        """
+        Append one frame, data is any bytes-like object (e.g. carla.Image.raw_data)
+        """
+        raw_size = memoryview(data).nbytes
+        block = zlib.compress(data, self._level)
+
+        with self._lock:
+            if self._segment is None:
+                raise RuntimeError("Frame archive is closed")
+            if self._segment_offset and self._segment_offset + len(block) > self._segment_size:
+                self._start_segment()
+
+            self._segment.write(block)
+            self._segment.flush()
+            entry = np.array([(frame, timestamp, self._segment_index, self._segment_offset,
+                               len(block), width, height, raw_size)], dtype=INDEX_DTYPE)
+            self._segment_offset += len(block)
+            self._index.write(entry.tobytes())
+            self._index.flush()
+            self.count += 1
+
+    def add_image(self, image, color_converter=None):
+        """
+        Append a CARLA sensor measurement, optionally converting it first
+        """
+        if color_converter is not None:
+            image.convert(color_converter)
+        self.add(image.frame_number, image.raw_data, getattr(image, 'width', 0),
+                 getattr(image, 'height', 0), getattr(image, 'timestamp', 0.0))
+
+    def close(self):
+        """
+        Close the current segment and the index (can be called repeatedly)
+        """
+        with self._lock:
+            if self._segment is None:
+                return
+            self._segment.close()
+            self._segment = None
+            self._index.close()
+
+    def _start_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_index += 1
+        self._segment_offset = 0
+        self._segment = open(
+            os.path.join(self.directory, SEGMENT_FILE % self._segment_index), 'xb')
+
+    @staticmethod
+    def _make_directory(directory, unique):
+        """
+        Create the (new) archive directory, returns its name
+        """
+        candidate = directory
+        suffix = 0
+        while True:
+            try:
+                os.makedirs(candidate)
+                return candidate
+            except OSError as error:
+                if error.errno != errno.EEXIST or not unique:
+                    raise
+            suffix += 1
+            candidate = '%s_%d' % (directory, suffix)
+
+
+class FrameArchive(object):
+
+    """
+        Read access to an archive written by FrameArchiveWriter.
+
+        frames: Frame numbers of all stored frames (in the order they were written)
+        index: All index entries (INDEX_DTYPE)
+
+        Frames with width and height are returned as (height, width, channels) uint8
+        arrays, all other frames (e.g. lidar point clouds) as flat uint8 arrays.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        index_file = os.path.join(directory, INDEX_FILE)
+        with open(index_file, 'rb') as file_handle:
+            prefix = file_handle.read(len(MAGIC) + 4)
+            if prefix[:len(MAGIC)] != MAGIC:
+                raise ValueError("{} is not a frame archive".format(directory))
+            header_length = int(np.frombuffer(prefix, dtype=np.uint32, count=1, offset=len(MAGIC))[0])
+            self.header = json.loads(file_handle.read(header_length).decode('utf-8'))
+
+        # An interrupted recording may end with an incomplete entry
+        count = (os.path.getsize(index_file) - HEADER_SIZE) // INDEX_DTYPE.itemsize
+        index = np.fromfile(index_file, dtype=INDEX_DTYPE, count=count, offset=HEADER_SIZE) \
+            if count > 0 else np.zeros(0, dtype=INDEX_DTYPE)
+        self.index = index[:self._complete_entries(index)]
+        self.frames = self.index['frame']
+        self._rows = {int(frame): row for row, frame in enumerate(self.frames)}
+
+        self._segments = dict()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, frame):
+        return frame in self._rows
+
+    def read(self, frame):
+        """
+        Returns the index entry and the decoded data of the given frame number
+        """
+        row = self._rows.get(frame)
+        if row is None:
+            raise KeyError("Frame {} is not in the archive".format(frame))
+        return self.read_row(row)
+
+    def read_row(self, row):
+        """
+        Returns the index entry and the decoded data of the frame stored at the given row
+        """
+        entry = self.index[row]
+        segment = self._get_segment(int(entry['segment']))
+        offset = int(entry['offset'])
+        data = zlib.decompress(segment[offset:offset + int(entry['length'])])
+        pixels = np.frombuffer(data, dtype=np.uint8)
+        if entry['width'] and entry['height']:
+            pixels = pixels.reshape((int(entry['height']), int(entry['width']), -1))
+        return entry, pixels
+
+    def read_many(self, frames, workers=None):
+        """
+        Decode the given frame numbers in parallel.
+        Returns a list of (index entry, data) in the order of frames
+        """
+        rows = [self._rows[int(frame)] for frame in frames]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.read_row, rows))
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+
+    def _complete_entries(self, index):
+        """
+        Returns the number of leading index entries whose data lies within the segment files
+        """
+        segments = np.unique(index['segment'])
+        sizes = np.zeros(int(segments.max()) + 1 if len(segments) else 0, dtype=np.uint64)
+        for segment_index in segments:
+            segment_file = os.path.join(self.directory, SEGMENT_FILE % segment_index)
+            if os.path.isfile(segment_file):
+                sizes[segment_index] = os.path.getsize(segment_file)
+        incomplete = index['offset'] + index['length'] > sizes[index['segment']]
+        return int(np.argmax(incomplete)) if incomplete.any() else len(index)
+
+    def _get_segment(self, segment_index):
+        """
+        Returns the (lazily) memory-mapped segment file
+        """
+        with self._lock:
+            segment = self._segments.get(segment_index)
+            if segment is None:
+                with open(os.path.join(self.directory, SEGMENT_FILE % segment_index), 'rb') as file_handle:
+                    segment = mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+                self._segments[segment_index] = segment
+            return segment
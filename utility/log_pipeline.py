@@ -0,0 +1,124 @@
+"""
+    The LogPipeline moves log I/O and message formatting off the tick callback thread.
+
+    Log calls only put the (unformatted) record into a queue (logging.handlers.QueueHandler).
+    A single background writer thread (logging.handlers.QueueListener) hands the records to
+    the actual handlers (stdout, files, ...), which format and write them in the order they
+    were logged. The queue is drained when the process exits.
+
+        handler = LogPipeline.handler(logging.FileHandler("results.log"))
+        logger.addHandler(handler)
+
+    py_trees behaviours log via their own logger, which formats eagerly. lazy_debug() only
+    builds the debug message if py_trees debug logging is enabled.
+"""
+
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+import threading
+
+import py_trees
+
+
+class LogPipeline(object):
+
+    """
+        Process-wide background writer for log output.
+
+        The writer thread is started on first use. Records are formatted on the writer
+        thread, so arguments of log calls should not be modified after logging them.
+    """
+
+    _queue = queue.Queue()
+    _listener = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def handler(target):
+        """
+        Returns a logging handler which forwards all records to the target handler
+        on the writer thread
+        """
+        return QueuedHandler(target)
+
+    @staticmethod
+    def flush():
+        """
+        Block until all queued records are written
+        """
+        if LogPipeline._listener is not None:
+            LogPipeline._queue.join()
+
+    @staticmethod
+    def stop():
+        """
+        Write all pending records and stop the writer thread
+        """
+        with LogPipeline._lock:
+            if LogPipeline._listener is None:
+                return
+            LogPipeline._listener.stop()
+            LogPipeline._listener = None
+
+    @staticmethod
+    def _start():
+        with LogPipeline._lock:
+            if LogPipeline._listener is not None:
+                return
+            LogPipeline._listener = logging.handlers.QueueListener(
+                LogPipeline._queue, _TargetDispatcher())
+            LogPipeline._listener.start()
+            atexit.register(LogPipeline.stop)
+
+
+class QueuedHandler(logging.handlers.QueueHandler):
+
+    """
+        Logging handler which passes records to another handler on the writer thread
+        of the LogPipeline, without formatting them
+    """
+
+    def __init__(self, target):
+        super(QueuedHandler, self).__init__(LogPipeline._queue)
+        self.target = target
+
+    def prepare(self, record):
+        """
+        Unlike QueueHandler.prepare(), the record is not formatted here but by the target
+        """
+        record = copy.copy(record)
+        record.log_pipeline_target = self.target
+        return record
+
+    def emit(self, record):
+        if LogPipeline._listener is None:
+            LogPipeline._start()
+        super(QueuedHandler, self).emit(record)
+
+    def flush(self):
+        LogPipeline.flush()
+
+
+class _TargetDispatcher(logging.Handler):
+
+    """
+        Handler of the QueueListener, passes each record to the target of its QueuedHandler
+    """
+
+    def handle(self, record):
+        return record.log_pipeline_target.handle(record)
+
+    def emit(self, record):
+        record.log_pipeline_target.emit(record)
+
+
+def lazy_debug(logger, msg, *args):
+    """
+    Debug output for py_trees loggers: msg % args is only formatted if
+    py_trees debug logging is enabled
+    """
+    if py_trees.logging.level < py_trees.logging.Level.INFO:
+        logger.debug(msg % args)
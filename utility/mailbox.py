@@ -0,0 +1,109 @@
+"""
+    A Mailbox hands data from a producer thread (e.g. a CARLA sensor callback) to a
+    consumer thread (e.g. the pygame render loop).
+
+    The producer posts complete items, the consumer takes them, so the consumer never sees
+    an item that is still being written:
+
+        frames = Mailbox(Mailbox.LATEST)
+        frames.post(surface, image.frame_number)     # sensor thread
+        frame = frames.take()                        # render loop: (frame, surface) or None
+
+    Modes:
+    - Mailbox.LATEST: Only the newest item is kept, a newer item overwrites an item that
+      was not taken yet (e.g. camera frames).
+    - Mailbox.QUEUED: All items are kept in order, up to maxlen (e.g. events). If full, the
+      oldest item is overwritten.
+
+    Counters (see get_statistics()): posted and delivered items, overwritten items (posted,
+    but never delivered) and stale takes (the consumer found nothing new).
+"""
+
+import collections
+import threading
+
+
+class Mailbox(object):
+
+    """
+        Thread-safe mailbox for one producer and one consumer
+    """
+
+    LATEST = 'latest'
+    QUEUED = 'queued'
+
+    def __init__(self, mode=LATEST, maxlen=1024):
+        if mode not in (Mailbox.LATEST, Mailbox.QUEUED):
+            raise ValueError("Unknown mailbox mode '{}'".format(mode))
+        self.mode = mode
+        self._maxlen = 1 if mode == Mailbox.LATEST else maxlen
+        self._items = collections.deque()
+        self._lock = threading.Lock()
+
+        self.posted = 0
+        self.delivered = 0
+        self.overwritten = 0
+        self.stale = 0
+
+    def post(self, item, frame=None):
+        """
+        Add an item (of the given frame number).
+        Returns the item it overwrote, so the producer can reuse it, or None.
+        """
+        overwritten = None
+        with self._lock:
+            if len(self._items) >= self._maxlen:
+                overwritten = self._items.popleft()[1]
+                self.overwritten += 1
+            self._items.append((frame, item))
+            self.posted += 1
+        return overwritten
+
+    def take(self):
+        """
+        Returns the oldest pending (frame, item), i.e. the newest in LATEST mode,
+        or None if nothing was posted since the last take
+        """
+        with self._lock:
+            if not self._items:
+                self.stale += 1
+                return None
+            self.delivered += 1
+            return self._items.popleft()
+
+    def take_all(self):
+        """
+        Returns all pending (frame, item) tuples, oldest first
+        """
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            if items:
+                self.delivered += len(items)
+            else:
+                self.stale += 1
+        return items
+
+    def clear(self):
+        """
+        Discard all pending items (without counting them), returns the discarded items
+        """
+        with self._lock:
+            items = [item for _, item in self._items]
+            self._items.clear()
+        return items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get_statistics(self):
+        """
+        Returns the counters and the number of pending items
+        """
+        with self._lock:
+            return {
+                "posted": self.posted,
+                "delivered": self.delivered,
+                "overwritten": self.overwritten,
+                "stale": self.stale,
+                "pending": len(self._items)}
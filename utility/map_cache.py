@@ -0,0 +1,140 @@
+"""
+    The MapCache keeps the static geometry of a CARLA map on disk.
+
+    Spawn points and sampled waypoints (incl. lane information) are queried from the
+    server only once per map and server version. Afterwards they are stored as plain
+    NumPy arrays, which are loaded memory-mapped on the next start, so that neither the
+    client warm-up nor waypoint based behaviors have to query the server for the map.
+"""
+
+import os
+import re
+import threading
+
+try:
+    import carla
+except ImportError:
+    raise RuntimeError('cannot import carla, make sure carla 0.9.1 is installed')
+
+try:
+    import numpy as np
+except ImportError:
+    raise RuntimeError('cannot import numpy, make sure numpy package is installed')
+
+
+FORMAT_VERSION = 1
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'carmageddon', 'maps')
+
+TRANSFORM_DTYPE = np.dtype([
+    ('x', np.float32), ('y', np.float32), ('z', np.float32),
+    ('pitch', np.float32), ('yaw', np.float32), ('roll', np.float32)])
+
+WAYPOINT_DTYPE = np.dtype(TRANSFORM_DTYPE.descr + [
+    ('lane_width', np.float32),
+    ('road_id', np.int32),
+    ('lane_id', np.int32)])
+
+
+class MapCache(object):
+
+    """
+        On-disk cache of the spawn points and waypoints of a single map.
+
+        The cache is keyed by map name, server version and waypoint sampling distance.
+        The server version (client.get_server_version()) is required, without it a cache
+        written for another server would be used for a changed map.
+        Use MapCache.get(world, server_version) to access the cache of the map currently
+        loaded.
+
+        Important parameters:
+        - spawn_points: Structured array (TRANSFORM_DTYPE) of all recommended spawn points
+        - waypoints: Structured array (WAYPOINT_DTYPE) of waypoints sampled on all lanes
+    """
+
+    _caches = dict()
+    _lock = threading.Lock()
+
+    def __init__(self, world, server_version, directory=DEFAULT_DIRECTORY,
+                 waypoint_distance=2.0):
+        if not server_version:
+            raise ValueError("MapCache requires the server version")
+        key = '{}_{}_{}_v{}'.format(world.map_name, server_version, waypoint_distance,
+                                    FORMAT_VERSION)
+        self._path = os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]', '_', key))
+
+        if not self._is_cached():
+            self._store(world.get_map(), waypoint_distance)
+
+        self.spawn_points = np.load(self._file('spawn_points'), mmap_mode='r')
+        self.waypoints = np.load(self._file('waypoints'), mmap_mode='r')
+
+    @staticmethod
+    def get(world, server_version, directory=DEFAULT_DIRECTORY,
+            waypoint_distance=2.0):
+        """
+        Returns the cache for the map of the given world, loading or creating it on first access
+        """
+        key = (world.map_name, server_version, directory, waypoint_distance)
+        with MapCache._lock:
+            if key not in MapCache._caches:
+                MapCache._caches[key] = MapCache(
+                    world, server_version, directory, waypoint_distance)
+            return MapCache._caches[key]
+
+    def get_spawn_points(self):
+        """
+        Returns the spawn points of the map as new carla.Transform objects
+        """
+        return [array_to_transform(point) for point in self.spawn_points]
+
+    def _file(self, name):
+        return os.path.join(self._path, name + '.npy')
+
+    def _is_cached(self):
+        return os.path.exists(self._file('spawn_points')) and os.path.exists(self._file('waypoints'))
+
+    def _store(self, carla_map, waypoint_distance):
+        """
+        Query the map geometry from the server and write it to disk.
+        Files are written under a temporary name and renamed afterwards, so that
+        concurrent clients never load a partially written cache.
+        """
+        spawn_points = carla_map.get_spawn_points()
+        spawn_array = np.zeros(len(spawn_points), dtype=TRANSFORM_DTYPE)
+        for i, transform in enumerate(spawn_points):
+            spawn_array[i] = transform_to_tuple(transform)
+
+        waypoints = carla_map.generate_waypoints(waypoint_distance)
+        waypoint_array = np.zeros(len(waypoints), dtype=WAYPOINT_DTYPE)
+        for i, waypoint in enumerate(waypoints):
+            waypoint_array[i] = transform_to_tuple(waypoint.transform) + (
+                getattr(waypoint, 'lane_width', 0.0),
+                getattr(waypoint, 'road_id', -1),
+                getattr(waypoint, 'lane_id', 0))
+
+        if not os.path.isdir(self._path):
+            os.makedirs(self._path)
+        for name, array in (('spawn_points', spawn_array), ('waypoints', waypoint_array)):
+            temp_file = self._file(name) + '.{}.tmp'.format(os.getpid())
+            with open(temp_file, 'wb') as file_handle:
+                np.save(file_handle, array)
+            os.replace(temp_file, self._file(name))
+
+
+def transform_to_tuple(transform):
+    """
+    Converts a carla.Transform into a tuple matching TRANSFORM_DTYPE
+    """
+    return (transform.location.x, transform.location.y, transform.location.z,
+            transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll)
+
+
+def array_to_transform(entry):
+    """
+    Converts an entry of a TRANSFORM_DTYPE (or WAYPOINT_DTYPE) array into a carla.Transform
+    """
+    return carla.Transform(
+        carla.Location(x=float(entry['x']), y=float(entry['y']), z=float(entry['z'])),
+        carla.Rotation(pitch=float(entry['pitch']), yaw=float(entry['yaw']),
+                       roll=float(entry['roll'])))
@@ -0,0 +1,53 @@
+"""
+    The RandomSource provides the random number generator used by all scenario code.
+
+    Random choices (vehicle blueprints and colours, spawn points, scenario parameters) are
+    all drawn from one dedicated generator instead of the global random module. Seeding it
+    makes a run reproducible, and the seed is recorded with the results, so that a slow or
+    failing run can be replayed exactly.
+"""
+
+import random
+
+
+class RandomSource(object):
+
+    """
+        Static holder of the shared random number generator and its seed.
+
+        If the generator is used before RandomSource.seed() was called, a random seed is
+        drawn, so that the seed of every run is known and can be reported.
+    """
+
+    _seed = None
+    _generator = random.Random()
+
+    @staticmethod
+    def seed(seed=None):
+        """
+        (Re-)seed the generator and return the seed
+        If no seed is given, a random seed is drawn from the operating system
+        """
+        if seed is None:
+            seed = random.SystemRandom().randint(0, 2**32 - 1)
+        RandomSource._seed = int(seed)
+        RandomSource._generator.seed(RandomSource._seed)
+        return RandomSource._seed
+
+    @staticmethod
+    def get_seed():
+        """
+        Returns the seed of the generator
+        """
+        if RandomSource._seed is None:
+            RandomSource.seed()
+        return RandomSource._seed
+
+    @staticmethod
+    def get_generator():
+        """
+        Returns the shared random.Random instance
+        """
+        if RandomSource._seed is None:
+            RandomSource.seed()
+        return RandomSource._generator
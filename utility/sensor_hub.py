@@ -0,0 +1,126 @@
+"""
+    The SensorHub shares event sensors (collision, lane invasion, ...) between all their users.
+
+    Test criteria and the sensors of the interactive environment used to spawn their own
+    sensor actor for the same vehicle, so the server simulated identical sensors several
+    times. The hub keeps exactly one sensor actor per (vehicle, sensor type) and passes its
+    events to all subscribers:
+
+        subscription = SensorHub.subscribe(vehicle, 'sensor.other.collision', callback)
+        ...
+        subscription.unsubscribe()
+
+    The sensor actor is spawned with the first subscription and destroyed with the last one.
+"""
+
+import threading
+import weakref
+
+try:
+    import carla
+except ImportError:
+    raise RuntimeError('cannot import carla, make sure carla 0.9.1 is installed')
+
+from utility.blueprint_catalog import BlueprintCatalog
+
+
+class SensorHub(object):
+
+    """
+        Process-wide registry of the shared sensors.
+
+        Callbacks are executed on the sensor thread of the CARLA client, in the order of
+        subscription. As callbacks are kept alive by the hub, they should only hold weak
+        references to their owners (see CollisionSensor).
+    """
+
+    _sensors = dict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def subscribe(vehicle, sensor_type, callback):
+        """
+        Call callback(event) for all events of the sensor of the given type attached to
+        the vehicle. Returns the Subscription.
+        """
+        key = (vehicle.id, sensor_type)
+        with SensorHub._lock:
+            sensor = SensorHub._sensors.get(key)
+            if sensor is None:
+                sensor = _SharedSensor(vehicle, sensor_type)
+                SensorHub._sensors[key] = sensor
+            subscription = Subscription(key, callback)
+            sensor.subscribers = sensor.subscribers + (subscription,)
+        return subscription
+
+    @staticmethod
+    def unsubscribe(subscription):
+        """
+        Stop the delivery of events to the subscription.
+        The sensor actor is destroyed after its last subscription ended.
+        """
+        with SensorHub._lock:
+            sensor = SensorHub._sensors.get(subscription.key)
+            if sensor is None or subscription not in sensor.subscribers:
+                return
+            sensor.subscribers = tuple(
+                other for other in sensor.subscribers if other is not subscription)
+            if not sensor.subscribers:
+                del SensorHub._sensors[subscription.key]
+                sensor.destroy()
+
+    @staticmethod
+    def get_sensor_count():
+        """
+        Returns the number of sensor actors currently used by the hub
+        """
+        return len(SensorHub._sensors)
+
+
+class Subscription(object):
+
+    """
+        Handle of a single subscriber of a shared sensor
+    """
+
+    def __init__(self, key, callback):
+        self.key = key
+        self.callback = callback
+
+    def unsubscribe(self):
+        """
+        Stop receiving events (can be called repeatedly)
+        """
+        SensorHub.unsubscribe(self)
+
+
+class _SharedSensor(object):
+
+    """
+        Sensor actor of a single (vehicle, sensor type) and its subscribers.
+        The tuple of subscribers is replaced on every change, so events are dispatched
+        without locking.
+    """
+
+    def __init__(self, vehicle, sensor_type):
+        self.subscribers = ()
+        world = vehicle.get_world()
+        blueprint = BlueprintCatalog.get(world).find(sensor_type)
+        self.actor = world.spawn_actor(blueprint, carla.Transform(), attach_to=vehicle)
+        # We need to pass the lambda a weak reference to self to avoid circular
+        # reference.
+        weak_self = weakref.ref(self)
+        self.actor.listen(lambda event: _SharedSensor._dispatch(weak_self, event))
+
+    def destroy(self):
+        if self.actor is not None:
+            self.actor.destroy()
+        self.actor = None
+
+    @staticmethod
+    def _dispatch(weak_self, event):
+        self = weak_self()
+        if not self:
+            return
+        for subscription in self.subscribers:
+            subscription.callback(event)
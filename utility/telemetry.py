@@ -0,0 +1,178 @@
+"""
+    The TelemetryRecorder writes the state of all scenario actors on every tick into a
+    binary file, so that a run can be analysed after the fact.
+
+    The file starts with a fixed size header (magic, number of written records and a JSON
+    description of the layout), followed by fixed-width records:
+
+        frame, game_time, actors[n](id, x, y, z, pitch, yaw, roll, vx, vy, vz,
+                                    throttle, steer, brake)
+
+    Records are written directly into a memory-mapped, preallocated file (no intermediate
+    buffers, no locks, there is exactly one writer: the tick callback). When the file is
+    full, its size is doubled and it is mapped again. load_telemetry() maps a recording as
+    NumPy array, i.e. it opens even multi-GB recordings instantly.
+"""
+
+import json
+import mmap
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    raise RuntimeError('cannot import numpy, make sure numpy package is installed')
+
+
+MAGIC = b'CARMATEL'
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096
+
+ACTOR_DTYPE = np.dtype([
+    ('id', np.int32),
+    ('x', np.float32), ('y', np.float32), ('z', np.float32),
+    ('pitch', np.float32), ('yaw', np.float32), ('roll', np.float32),
+    ('vx', np.float32), ('vy', np.float32), ('vz', np.float32),
+    ('throttle', np.float32), ('steer', np.float32), ('brake', np.float32)])
+
+
+def record_dtype(actor_count):
+    """
+    Returns the dtype of one record for the given number of actors
+    """
+    return np.dtype([
+        ('frame', np.int64),
+        ('game_time', np.float64),
+        ('actors', ACTOR_DTYPE, (actor_count,))])
+
+
+class TelemetryRecorder(object):
+
+    """
+        Records frame, game time and pose, velocity and control of a fixed set of actors.
+
+        The recorder is not thread-safe, record() must only be called by one thread
+        (e.g. the world.on_tick() callback). Use as context manager, or call close().
+
+        Important parameters:
+        - actors: List of CARLA actors, their order defines the order within the records
+        - capacity: Number of records preallocated, doubled whenever the file is full
+    """
+
+    def __init__(self, filename, actors, capacity=1024, metadata=None):
+        self._actors = [actor for actor in actors if actor is not None]
+        self._dtype = record_dtype(len(self._actors))
+        self._capacity = max(int(capacity), 1)
+        self._count = 0
+
+        header = {
+            "version": FORMAT_VERSION,
+            "actor_ids": [actor.id for actor in self._actors],
+            "actor_types": [actor.type_id for actor in self._actors],
+            "metadata": metadata or {}}
+        header = json.dumps(header).encode('utf-8')
+        if len(MAGIC) + 8 + 4 + len(header) > HEADER_SIZE:
+            raise ValueError("Telemetry header exceeds {} bytes".format(HEADER_SIZE))
+
+        directory = os.path.dirname(filename)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self._file = open(filename, 'w+b')
+        self._file.write(MAGIC + np.uint64(0).tobytes() + np.uint32(len(header)).tobytes() + header)
+        self._map = None
+        self._records = None
+        self._written = None
+        self._allocate(self._capacity)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def count(self):
+        """
+        Number of records written so far
+        """
+        return self._count
+
+    def record(self, frame, game_time):
+        """
+        Append one record with the current state of all actors
+        """
+        if self._count == self._capacity:
+            self._allocate(2 * self._capacity)
+
+        record = self._records[self._count]
+        record['frame'] = frame
+        record['game_time'] = game_time
+
+        actors = record['actors']
+        for i, actor in enumerate(self._actors):
+            if not actor.is_alive:
+                continue
+            transform = actor.get_transform()
+            velocity = actor.get_velocity()
+            control = actor.get_vehicle_control()
+            actors[i] = (actor.id,
+                         transform.location.x, transform.location.y, transform.location.z,
+                         transform.rotation.pitch, transform.rotation.yaw, transform.rotation.roll,
+                         velocity.x, velocity.y, velocity.z,
+                         control.throttle, control.steer, control.brake)
+
+        # Publish the record only after it was written completely
+        self._count += 1
+        self._written[0] = self._count
+
+    def close(self):
+        """
+        Shrink the file to the written records and close it
+        """
+        if self._file is None:
+            return
+        self._release()
+        self._file.truncate(HEADER_SIZE + self._count * self._dtype.itemsize)
+        self._file.close()
+        self._file = None
+
+    def _allocate(self, capacity):
+        """
+        (Re-)map the file with room for the given number of records
+        """
+        self._release()
+        self._file.truncate(HEADER_SIZE + capacity * self._dtype.itemsize)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._written = np.ndarray((1,), dtype=np.uint64, buffer=self._map, offset=len(MAGIC))
+        self._records = np.ndarray((capacity,), dtype=self._dtype, buffer=self._map,
+                                   offset=HEADER_SIZE)
+        self._capacity = capacity
+
+    def _release(self):
+        if self._map is not None:
+            self._records = None
+            self._written = None
+            self._map.flush()
+            self._map.close()
+            self._map = None
+
+
+def load_telemetry(filename):
+    """
+    Opens a recording without reading it.
+    Returns the header (dict) and the records (read-only, memory-mapped NumPy array).
+    """
+    with open(filename, 'rb') as file_handle:
+        prefix = file_handle.read(len(MAGIC) + 8 + 4)
+        if prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError("{} is not a telemetry recording".format(filename))
+        count = int(np.frombuffer(prefix, dtype=np.uint64, count=1, offset=len(MAGIC))[0])
+        header_length = int(np.frombuffer(prefix, dtype=np.uint32, count=1, offset=len(MAGIC) + 8)[0])
+        header = json.loads(file_handle.read(header_length).decode('utf-8'))
+
+    dtype = record_dtype(len(header["actor_ids"]))
+    if count == 0:
+        return header, np.zeros(0, dtype=dtype)
+    records = np.memmap(filename, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+    return header, records
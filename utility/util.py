@@ -47,5 +47,11 @@ def parse_args():
         metavar='WIDTHxHEIGHT',
         default='1280x720',
         help='window resolution (default: 1280x720)')
+    argparser.add_argument(
+        '--seed',
+        metavar='S',
+        default=None,
+        type=int,
+        help='seed of the random number generator (default: random)')
 
     return argparser.parse_args()
@@ -0,0 +1,137 @@
+"""
+    The WriterPool moves slow output (PNG encoding, disk I/O) off the sensor callback thread.
+
+    Sensor callbacks only submit the write to a bounded queue, worker threads execute it:
+
+        writer = WriterPool()
+        camera.listen(lambda image: writer.submit(image.save_to_disk, '_out/%06d' % image.frame_number))
+        ...
+        writer.close()
+
+    If the workers fall behind and the queue is full, the policy decides:
+    - WriterPool.DROP_OLDEST: The oldest pending write is dropped (and counted), so the
+      sensor callback never waits.
+    - WriterPool.BLOCK: The callback waits until there is space, so no frame is lost.
+"""
+
+import collections
+import logging
+import threading
+import time
+
+
+class WriterPool(object):
+
+    """
+        Worker threads executing submitted writes from a bounded queue.
+
+        Counters (see get_statistics()): submitted, written, dropped and failed writes.
+    """
+
+    DROP_OLDEST = 'drop_oldest'
+    BLOCK = 'block'
+
+    def __init__(self, workers=2, capacity=64, policy=DROP_OLDEST, name="WriterPool"):
+        if policy not in (WriterPool.DROP_OLDEST, WriterPool.BLOCK):
+            raise ValueError("Unknown writer pool policy '{}'".format(policy))
+        self.capacity = capacity
+        self.policy = policy
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._pending = collections.deque()
+        self._active = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._start_time = time.time()
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name="{}-{}".format(name, i))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, function, *args):
+        """
+        Execute function(*args) on a worker thread.
+        Returns False (without raising, e.g. in a sensor callback that races with
+        close()) if the pool is closed and the write was discarded, else True
+        """
+        with self._condition:
+            while not self._closed and len(self._pending) >= self.capacity:
+                if self.policy == WriterPool.DROP_OLDEST:
+                    self._pending.popleft()
+                    self.dropped += 1
+                else:
+                    self._condition.wait()
+            if self._closed:
+                return False
+            self._pending.append((function, args))
+            self.submitted += 1
+            self._condition.notify_all()
+            return True
+
+    def flush(self):
+        """
+        Block until all submitted writes are done
+        """
+        with self._condition:
+            while self._pending or self._active:
+                self._condition.wait()
+
+    def close(self):
+        """
+        Finish all submitted writes and stop the workers (can be called repeatedly)
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def get_statistics(self):
+        """
+        Returns the counters, the number of pending writes and the write throughput
+        """
+        with self._condition:
+            elapsed_time = time.time() - self._start_time
+            return {
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "pending": len(self._pending),
+                "writes_per_second": self.written / elapsed_time if elapsed_time > 0.0 else 0.0}
+
+    def _work(self):
+        """
+        Worker thread: Execute pending writes until the pool is closed and drained
+        """
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                function, args = self._pending.popleft()
+                self._active += 1
+                self._condition.notify_all()
+
+            succeeded = False
+            try:
+                function(*args)
+                succeeded = True
+            except Exception:  # pylint: disable=broad-except
+                logging.exception("WriterPool: write failed")
+
+            with self._condition:
+                self._active -= 1
+                if succeeded:
+                    self.written += 1
+                else:
+                    self.failed += 1
+                self._condition.notify_all()